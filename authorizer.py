@@ -1,26 +1,43 @@
 import logging
 import os
 
-import boto3
 import jwt  # Make sure this is PyJWT
 
+from poshub_api.infrastructure.aws.parameters import get_parameter_provider
+from poshub_api.shared.token_cache import get_token_cache
+from poshub_api.shared.warmup import WarmupTask, is_warmup_event, warm_up
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 
+def jwt_secret_param() -> str:
+    return os.environ.get("JWT_SECRET_PARAM", "/pos/jwt-secret")
+
+
+def warmup_tasks():
+    """Return what a warm-up invocation loads."""
+    return [
+        WarmupTask(
+            "jwt_secret", lambda: get_parameter_provider().get(jwt_secret_param())
+        ),
+        WarmupTask("token_cache", get_token_cache),
+    ]
+
+
 def lambda_handler(event, context):
+    if is_warmup_event(event):
+        return warm_up(warmup_tasks())
+
     logger.info("=== Lambda invoked ===")
     logger.info(f"Event received: {event}")
 
-    ssm = boto3.client("ssm")
-    param_name = os.environ.get("JWT_SECRET_PARAM", "/pos/jwt-secret")
-    logger.info(f"Fetching JWT secret from SSM: {param_name}")
+    param_name = jwt_secret_param()
 
     try:
-        response = ssm.get_parameter(Name=param_name, WithDecryption=True)
-        secret = response["Parameter"]["Value"]
-        logger.info("Successfully retrieved JWT secret.")
+        # Cached across warm invocations of this container
+        secret = get_parameter_provider().get(param_name)
     except Exception as e:
         logger.error(f"Failed to get secret from SSM: {e}")
         raise Exception("Unauthorized")
@@ -34,12 +51,18 @@ def lambda_handler(event, context):
         raise Exception("Unauthorized")
 
     try:
-        decoded = jwt.decode(token, secret, algorithms=["HS256"])
+        # Warm containers skip the HMAC verify for tokens already seen
+        verified = get_token_cache().verify(
+            token,
+            lambda t: jwt.decode(t, secret, algorithms=["HS256"]),
+            namespace=secret,
+        )
+        decoded = verified.payload
     except Exception as e:
         logger.error(f"JWT decoding failed: {e}")
         raise Exception("Unauthorized")
 
-    if "orders:write" in decoded.get("scopes", ""):
+    if "orders:write" in verified.scopes:
         logger.info("Scope validated: 'orders:write' found.")
         return {
             "principalId": decoded.get("sub", "user"),
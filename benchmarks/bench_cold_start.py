@@ -0,0 +1,102 @@
+"""Cold-start benchmark of the Lambda entry point.
+
+Every run starts a fresh interpreter, imports ``poshub_api.main`` and sends
+``event.json`` through the Mangum ``handler``, as a Lambda cold start does.
+Reports the median import time and time-to-first-response with the
+cold-start mode on and off.
+
+Usage:
+    python -m benchmarks.bench_cold_start --runs 20 --output cold_start.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict
+
+from benchmarks.common import write_results
+
+MODES = {"cold": "true", "eager": "false"}
+
+
+def measure(event_path: str) -> Dict:
+    """Import the app and handle one event; runs in the child interpreter."""
+    started = time.perf_counter()
+    from poshub_api.main import handler
+
+    imported = time.perf_counter()
+    with open(event_path) as f:
+        event = json.load(f)
+    response = handler(event, None)
+    responded = time.perf_counter()
+    return {
+        "status": response["statusCode"],
+        "import_ms": (imported - started) * 1e3,
+        "first_response_ms": (responded - imported) * 1e3,
+        "boto3_imported": "boto3" in sys.modules,
+        "httpx_imported": "httpx" in sys.modules,
+    }
+
+
+def run_mode(mode: str, runs: int, event_path: str) -> Dict:
+    """Start ``runs`` fresh interpreters in the mode and aggregate them."""
+    env = {**os.environ, "COLD_START_MODE": MODES[mode]}
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        child = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_cold_start", "--child"]
+            + ["--event", event_path],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        sample = json.loads(child.stdout)
+        sample["process_ms"] = (time.perf_counter() - started) * 1e3
+        samples.append(sample)
+
+    def median(key: str) -> float:
+        return round(statistics.median(s[key] for s in samples), 1)
+
+    return {
+        "mode": mode,
+        "runs": runs,
+        "status": samples[-1]["status"],
+        "import_ms": median("import_ms"),
+        "first_response_ms": median("first_response_ms"),
+        "total_ms": round(median("import_ms") + median("first_response_ms"), 1),
+        "process_ms": median("process_ms"),
+        "boto3_imported": samples[-1]["boto3_imported"],
+        "httpx_imported": samples[-1]["httpx_imported"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--event", default="event.json")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.event)))
+        return
+
+    results = []
+    for mode in args.modes:
+        result = run_mode(mode, args.runs, args.event)
+        print(json.dumps(result))
+        results.append(result)
+
+    write_results(args.output, "cold_start", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Startup time of the journaled order store against replaying a JSON journal.
+
+The same synthetic orders are persisted three ways: as a JSON-lines journal
+of the order documents, as the binary journal of ``JournalOrderStore``
+without a snapshot, and as a snapshot. Each is then loaded in a fresh
+subprocess, so nothing is warm, and the time until every order can be read
+by id is reported with the size on disk.
+
+Usage:
+    python -m benchmarks.bench_journal --orders 1000000 --output journal.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from typing import Dict
+
+from benchmarks.common import write_results
+from poshub_api.domain.models import OrderIn, OrderOut
+from poshub_api.infrastructure.storage.columnar import ColumnarOrderStore
+from poshub_api.infrastructure.storage.journal import JournalOrderStore
+from poshub_api.services.order_service import OrderService
+
+CURRENCIES = ["EUR", "USD", "MAD", "GBP"]
+TERMINALS = [f"pos-terminal-{i}" for i in range(50)]
+
+
+def persist(directory: str, orders: int) -> None:
+    """Write the JSON journal, the binary journal and the snapshot."""
+    rng = random.Random(42)
+    inputs = [
+        OrderIn(
+            nom_client=f"Client {i}",
+            montant=round(rng.uniform(1, 500), 2),
+            devise=rng.choice(CURRENCIES),
+        )
+        for i in range(1_000)
+    ]
+    service = OrderService()
+    for i in range(orders):
+        service.create_order(inputs[i % 1_000], {"sub": TERMINALS[i % 50]})
+    created = list(service.orders.values())
+
+    with open(os.path.join(directory, "orders.jsonl"), "wb") as f:
+        for order in created:
+            f.write(order.to_json() + b"\n")
+    for name in ("binary", "snapshot"):
+        store = JournalOrderStore(os.path.join(directory, name), snapshot_interval=0)
+        for start in range(0, orders, 10_000):
+            end = start + 10_000
+            store.add_many(created[start:end])
+        if name == "snapshot":
+            store.compact()
+        store.close()
+
+
+def load(directory: str, method: str) -> Dict:
+    """Load the orders persisted by one method and time it."""
+    started = time.perf_counter()
+    if method == "json_replay":
+        path = os.path.join(directory, "orders.jsonl")
+        store = ColumnarOrderStore()
+        with open(path, "rb") as f:
+            for line in f:
+                store.add(OrderOut.model_validate_json(line))
+    else:
+        path = os.path.join(directory, method)
+        store = JournalOrderStore(path, snapshot_interval=0)
+    load_ms = (time.perf_counter() - started) * 1e3
+
+    if os.path.isdir(path):
+        size = sum(os.path.getsize(os.path.join(path, n)) for n in os.listdir(path))
+    else:
+        size = os.path.getsize(path)
+    last = store.at(len(store) - 1)
+    assert store[last.order_id] == last
+    return {
+        "method": method,
+        "orders": len(store),
+        "load_ms": round(load_ms, 1),
+        "bytes_on_disk": size,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        persist(directory, args.orders)
+        for method in ("json_replay", "binary", "snapshot"):
+            with context.Pool(1) as pool:
+                result = pool.apply(load, (directory, method))
+            print(json.dumps(result))
+            results.append(result)
+
+    write_results(args.output, "journal", results)
+
+
+if __name__ == "__main__":
+    main()
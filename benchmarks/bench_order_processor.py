@@ -0,0 +1,153 @@
+"""Throughput benchmark of the SQS order processor Lambda handler.
+
+Generates synthetic SQS events shaped like real ``Records`` and invokes
+``order_processor.lambda_handler`` in-process, over a grid of batch sizes,
+failure ratios (``montant == -1`` poison messages) and body sizes. Reports
+messages/sec, p50/p99 per-batch latency and peak RSS. No AWS access needed.
+
+Each case runs in a fresh subprocess: the peak RSS of a process never goes
+down, and the processor's dedupe store would carry message ids over.
+
+Usage:
+    python -m benchmarks.bench_order_processor --output processor.json
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import random
+import time
+import uuid
+from itertools import product
+from typing import Dict, List
+
+import order_processor
+from benchmarks.common import peak_rss_bytes, percentile, write_results
+
+QUEUE_ARN = "arn:aws:sqs:eu-north-1:000000000000:poshub-orders-bench"
+
+
+def make_record(body: str, sent_at_ms: int) -> Dict:
+    """Return one SQS record as delivered to a Lambda event source mapping."""
+    return {
+        "messageId": str(uuid.uuid4()),
+        "receiptHandle": uuid.uuid4().hex * 4,
+        "body": body,
+        "attributes": {
+            "ApproximateReceiveCount": "1",
+            "SentTimestamp": str(sent_at_ms),
+            "SenderId": "AROAEXAMPLE:poshub-api",
+            "ApproximateFirstReceiveTimestamp": str(sent_at_ms + 5),
+        },
+        "messageAttributes": {},
+        "md5OfBody": hashlib.md5(body.encode()).hexdigest(),
+        "eventSource": "aws:sqs",
+        "eventSourceARN": QUEUE_ARN,
+        "awsRegion": "eu-north-1",
+    }
+
+
+def make_event(
+    batch_size: int, failure_ratio: float, body_bytes: int, rng: random.Random
+) -> Dict:
+    """Return an SQS event with order bodies padded to about ``body_bytes``."""
+    now_ms = int(time.time() * 1000)
+    records = []
+    for _ in range(batch_size):
+        order = {
+            "order": str(uuid.uuid4()),
+            "created_at": "2025-07-14T09:50:00.000000",
+            "nom_client": "",
+            "montant": -1 if rng.random() < failure_ratio else 42.5,
+            "devise": "EUR",
+            "created_by": "pos-terminal-1",
+        }
+        padding = max(0, body_bytes - len(json.dumps(order)))
+        order["nom_client"] = "x" * padding
+        records.append(make_record(json.dumps(order), now_ms))
+    return {"Records": records}
+
+
+def run_case(
+    batch_size: int,
+    failure_ratio: float,
+    body_bytes: int,
+    batches: int,
+    seed: int,
+    log_level: str,
+) -> Dict:
+    """Invoke the handler on fresh batches and measure it."""
+    # Keep the cost of formatting log records, but not of printing them
+    logging.basicConfig(stream=open(os.devnull, "w"), level=log_level)
+    logging.getLogger().setLevel(log_level)
+
+    rng = random.Random(seed)
+    events = [
+        make_event(batch_size, failure_ratio, body_bytes, rng) for _ in range(batches)
+    ]
+    latencies: List[float] = []
+    failed = 0
+    started = time.perf_counter()
+    for event in events:
+        batch_started = time.perf_counter()
+        response = order_processor.lambda_handler(event, None)
+        latencies.append(time.perf_counter() - batch_started)
+        failed += len(response["batchItemFailures"])
+    elapsed = time.perf_counter() - started
+
+    messages = batch_size * batches
+    return {
+        "batch_size": batch_size,
+        "failure_ratio": failure_ratio,
+        "body_bytes": body_bytes,
+        "batches": batches,
+        "messages_per_sec": round(messages / elapsed, 1),
+        "p50_batch_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_batch_ms": round(percentile(latencies, 99) * 1000, 3),
+        "failed_messages": failed,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument(
+        "--failure-ratios", type=float, nargs="+", default=[0.0, 0.1, 0.5]
+    )
+    parser.add_argument("--body-bytes", type=int, nargs="+", default=[256, 4096])
+    parser.add_argument("--messages", type=int, default=5_000, help="Messages per case")
+    parser.add_argument("--log-level", default="INFO")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for case, (batch_size, failure_ratio, body_bytes) in enumerate(
+        product(args.batch_sizes, args.failure_ratios, args.body_bytes)
+    ):
+        batches = max(1, args.messages // batch_size)
+        with context.Pool(1) as pool:
+            result = pool.apply(
+                run_case,
+                (
+                    batch_size,
+                    failure_ratio,
+                    body_bytes,
+                    batches,
+                    args.seed + case,
+                    args.log_level,
+                ),
+            )
+        print(json.dumps(result))
+        results.append(result)
+
+    write_results(args.output, "order_processor", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Micro-benchmark of the per-order CPU cost of the order response path.
+
+Compares, per order, the previous path (validated ``OrderOut``, SQS body via
+``jsonable_encoder`` + ``json.dumps``, and FastAPI's response_model
+validation and serialization) with the single-serialization path (trusted
+``OrderOut`` and one ``to_json()`` reused for SQS and the response).
+
+Usage:
+    python -m benchmarks.bench_order_response --iterations 20000 --output response.json
+"""
+
+import argparse
+import json
+import timeit
+from datetime import datetime
+from typing import Callable, Dict, List
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from benchmarks.common import write_results
+from poshub_api.api.responses import order_list_json
+from poshub_api.domain.models import OrderOut
+from poshub_api.shared.serialization import HAS_ORJSON
+
+LIST_SIZE = 100
+
+order_adapter = TypeAdapter(OrderOut)
+list_adapter = TypeAdapter(List[OrderOut])
+
+
+def validated_order(order_id=None, created_at=None) -> OrderOut:
+    return OrderOut(
+        order=order_id or uuid4(),
+        created_at=created_at or datetime.utcnow(),
+        nom_client="Client 1",
+        montant=42.5,
+        devise="EUR",
+        created_by="pos-terminal-1",
+    )
+
+
+def trusted_order(order_id=None, created_at=None) -> OrderOut:
+    return OrderOut.trusted(
+        order_id=order_id or uuid4(),
+        created_at=created_at or datetime.utcnow(),
+        customer_name="Client 1",
+        total_amount=42.5,
+        currency="EUR",
+        created_by="pos-terminal-1",
+    )
+
+
+def response_model_body(order: OrderOut) -> bytes:
+    """What FastAPI does for ``response_model=OrderOut`` with JSONResponse."""
+    content = order_adapter.validate_python(order.model_dump(by_alias=True))
+    return JSONResponse(
+        order_adapter.dump_python(content, mode="json", by_alias=True)
+    ).body
+
+
+def create_before() -> bytes:
+    order = validated_order()
+    json.dumps(jsonable_encoder(order))
+    return response_model_body(order)
+
+
+def create_after() -> bytes:
+    body = trusted_order().to_json()
+    body.decode()
+    return body
+
+
+def measure(fn: Callable, iterations: int) -> float:
+    """Return the best per-call time in microseconds over 5 repeats."""
+    return min(timeit.repeat(fn, number=iterations, repeat=5)) / iterations * 1e6
+
+
+def run(iterations: int) -> List[Dict]:
+    order = validated_order()
+    page = [validated_order() for _ in range(LIST_SIZE)]
+    list_iterations = max(1, iterations // LIST_SIZE)
+
+    def list_before() -> bytes:
+        dumped = [o.model_dump(by_alias=True) for o in page]
+        content = list_adapter.validate_python(dumped)
+        return JSONResponse(
+            list_adapter.dump_python(content, mode="json", by_alias=True)
+        ).body
+
+    # Construction alone, without generating the id and timestamp
+    ids = (order.order_id, order.created_at)
+    cases = [
+        ("construct", lambda: validated_order(*ids), lambda: trusted_order(*ids), 1),
+        (
+            "sqs_body",
+            lambda: json.dumps(jsonable_encoder(order)),
+            lambda: order.to_json().decode(),
+            1,
+        ),
+        ("response", lambda: response_model_body(order), order.to_json, 1),
+        ("create_order", create_before, create_after, 1),
+        (
+            f"list_{LIST_SIZE}",
+            list_before,
+            lambda: order_list_json(page),
+            LIST_SIZE,
+        ),
+    ]
+
+    results = []
+    for name, before, after, per_call in cases:
+        n = list_iterations if per_call > 1 else iterations
+        before_us = measure(before, n) / per_call
+        after_us = measure(after, n) / per_call
+        results.append(
+            {
+                "case": name,
+                "before_us_per_order": round(before_us, 2),
+                "after_us_per_order": round(after_us, 2),
+                "speedup": round(before_us / after_us, 1),
+                "orjson": HAS_ORJSON,
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    for result in results:
+        print(json.dumps(result))
+    write_results(args.output, "order_response", results)
+
+
+if __name__ == "__main__":
+    main()
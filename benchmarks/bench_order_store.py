@@ -0,0 +1,95 @@
+"""Memory benchmark of the OrderService storage engines.
+
+Each engine is filled in a fresh subprocess so allocations of one run do not
+leak into the other. Reports the traced Python heap per order, the build
+time (under tracemalloc, so slower than in production), and the cost of row
+reads and point lookups by order id.
+
+Usage:
+    python -m benchmarks.bench_order_store --orders 1000000 --output store.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import time
+import tracemalloc
+from typing import Dict
+
+from benchmarks.common import write_results
+from poshub_api.domain.models import OrderIn
+from poshub_api.infrastructure.storage.columnar import ColumnarOrderStore
+from poshub_api.infrastructure.storage.memory import DictOrderStore
+from poshub_api.services.order_service import OrderService
+
+ENGINES = {"dict": DictOrderStore, "columnar": ColumnarOrderStore}
+CURRENCIES = ["EUR", "USD", "MAD", "GBP"]
+TERMINALS = [f"pos-terminal-{i}" for i in range(50)]
+LOOKUPS = 100_000
+
+
+def run_engine(engine: str, orders: int) -> Dict:
+    """Fill one engine with synthetic orders and measure it."""
+    rng = random.Random(42)
+    inputs = [
+        OrderIn(
+            nom_client=f"Client {i}",
+            montant=round(rng.uniform(1, 500), 2),
+            devise=rng.choice(CURRENCIES),
+        )
+        for i in range(1_000)
+    ]
+    contexts = [{"sub": terminal} for terminal in TERMINALS]
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    service = OrderService(store=ENGINES[engine]())
+    for i in range(orders):
+        service.create_order(inputs[i % 1_000], contexts[i % len(contexts)])
+    build_seconds = time.perf_counter() - started
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    rows = [rng.randrange(orders) for _ in range(min(LOOKUPS, orders))]
+    started = time.perf_counter()
+    ids = [service.orders.at(row).order_id for row in rows]
+    read_us = (time.perf_counter() - started) / len(rows) * 1e6
+
+    started = time.perf_counter()
+    for order_id in ids:
+        service.get_order_by_id(order_id)
+    lookup_us = (time.perf_counter() - started) / len(ids) * 1e6
+
+    return {
+        "engine": engine,
+        "orders": orders,
+        "heap_bytes": retained,
+        "bytes_per_order": round(retained / orders, 1),
+        "build_seconds": round(build_seconds, 2),
+        "read_us": round(read_us, 2),
+        "lookup_us": round(lookup_us, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES))
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for engine in args.engines:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_engine, (engine, args.orders))
+        print(json.dumps(result))
+        results.append(result)
+
+    write_results(args.output, "order_store", results)
+
+
+if __name__ == "__main__":
+    main()
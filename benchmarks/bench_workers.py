@@ -0,0 +1,124 @@
+"""Throughput of the shared SQLite order store from 1 to 8 worker processes.
+
+Each worker is a separate process with its own ``OrderService`` over the same
+database file, as with ``uvicorn --workers N``. All workers start together
+and run the workload for a fixed time: ``read`` mixes lookups by order id and
+``GET /orders/all`` pages, ``mixed`` adds 10% creates, and ``write`` only
+creates. Reports the total operations per second per worker count and the
+scaling relative to one worker. Scaling is capped by the cores available,
+which the results record.
+
+Usage:
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --output workers.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.common import write_results
+from poshub_api.domain.models import OrderFilter, OrderIn
+from poshub_api.infrastructure.storage.sqlite import SQLiteOrderStore
+from poshub_api.services.order_service import OrderService
+
+WORKLOADS = {"read": 0.0, "mixed": 0.1, "write": 1.0}
+CURRENCIES = ["EUR", "USD", "MAD", "GBP"]
+TERMINALS = [f"pos-terminal-{i}" for i in range(50)]
+
+
+def make_inputs(rng: random.Random) -> List[OrderIn]:
+    return [
+        OrderIn(
+            nom_client=f"Client {i}",
+            montant=round(rng.uniform(1, 500), 2),
+            devise=rng.choice(CURRENCIES),
+        )
+        for i in range(1_000)
+    ]
+
+
+def seed(path: str, orders: int) -> None:
+    """Fill the database with synthetic orders, in batches."""
+    rng = random.Random(42)
+    inputs = make_inputs(rng)
+    service = OrderService(store=SQLiteOrderStore(path))
+    for start in range(0, orders, 500):
+        batch = [inputs[i % 1_000] for i in range(start, min(orders, start + 500))]
+        service.create_orders(batch, {"sub": rng.choice(TERMINALS)})
+
+
+def run_worker(path: str, write_ratio: float, seconds: float, barrier, worker: int):
+    """Run the workload until the time is up and return the operation count."""
+    rng = random.Random(worker)
+    inputs = make_inputs(rng)
+    service = OrderService(store=SQLiteOrderStore(path))
+    ids = [order.order_id for order in service.orders.at_many(range(1_000))]
+    filters = [OrderFilter(currency=currency) for currency in CURRENCIES]
+
+    barrier.wait()
+    deadline = time.perf_counter() + seconds
+    operations = 0
+    while time.perf_counter() < deadline:
+        if rng.random() < write_ratio:
+            service.create_order(rng.choice(inputs), {"sub": rng.choice(TERMINALS)})
+        elif operations % 10:
+            service.get_order_by_id(rng.choice(ids))
+        else:
+            service.list_orders(rng.choice(filters), limit=100)
+        operations += 1
+    return operations
+
+
+def run(workload: str, workers: int, orders: int, seconds: float) -> Dict:
+    """Run the workload with the given number of workers on a fresh database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "orders.db")
+        seed(path, orders)
+        context = multiprocessing.get_context("spawn")
+        with context.Manager() as manager, context.Pool(workers) as pool:
+            barrier = manager.Barrier(workers)
+            counts = pool.starmap(
+                run_worker,
+                [
+                    (path, WORKLOADS[workload], seconds, barrier, worker)
+                    for worker in range(workers)
+                ],
+            )
+    return {
+        "workload": workload,
+        "workers": workers,
+        "orders": orders,
+        "ops_per_sec": round(sum(counts) / seconds, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--workloads", nargs="+", default=list(WORKLOADS))
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for workload in args.workloads:
+        single = None
+        for workers in args.workers:
+            result = run(workload, workers, args.orders, args.seconds)
+            single = single or result["ops_per_sec"] / workers
+            result["scaling"] = round(result["ops_per_sec"] / single, 2)
+            result["cpus"] = os.cpu_count()
+            print(json.dumps(result))
+            results.append(result)
+
+    write_results(args.output, "workers", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Helpers shared by the benchmark scripts."""
+
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Return the nearest-rank percentile of the samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def peak_rss_bytes() -> int:
+    """Return the peak resident set size of this process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_metadata() -> Dict:
+    """Return what identifies a run: commit, interpreter and machine."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def write_results(path: Optional[str], benchmark: str, results: List[Dict]) -> None:
+    """Write the results with the run metadata as JSON, if a path is given."""
+    if not path:
+        return
+    with open(path, "w") as f:
+        json.dump(
+            {"benchmark": benchmark, "run": run_metadata(), "results": results},
+            f,
+            indent=2,
+        )
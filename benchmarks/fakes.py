@@ -0,0 +1,84 @@
+"""In-process stand-ins for the AWS services used by the API.
+
+``install()`` registers them with ``poshub_api.infrastructure.aws.clients``
+so the real app, parameter provider and SQS outbox run unchanged against
+them, without network access or credentials.
+"""
+
+import itertools
+import os
+import threading
+import time
+from typing import Dict, List
+
+from poshub_api.infrastructure.aws import clients
+
+JWT_SECRET = "loadtest-secret"
+JWT_SECRET_PARAM = "/pos/loadtest/jwt-secret"
+QUEUE_URL_PARAM = "/pos/loadtest/queue-url"
+QUEUE_URL = "https://sqs.eu-north-1.amazonaws.com/000000000000/poshub-loadtest"
+
+
+class FakeSSM:
+    """SSM client serving a fixed set of parameters."""
+
+    def __init__(self, parameters: Dict[str, str], latency: float = 0.0):
+        self.parameters = parameters
+        self.latency = latency
+        self.calls = 0
+
+    def get_parameter(self, Name, WithDecryption=False):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {"Parameter": self._parameter(Name)}
+
+    def get_parameters(self, Names, WithDecryption=False):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {
+            "Parameters": [self._parameter(n) for n in Names if n in self.parameters],
+            "InvalidParameters": [n for n in Names if n not in self.parameters],
+        }
+
+    def _parameter(self, name: str) -> Dict:
+        return {"Name": name, "Type": "SecureString", "Value": self.parameters[name]}
+
+
+class FakeSQS:
+    """SQS client accepting every message, keeping only a count of them."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.messages = 0
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def send_message_batch(self, QueueUrl, Entries: List[Dict]):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            self.messages += len(Entries)
+            ids = [next(self._ids) for _ in Entries]
+        return {
+            "Successful": [
+                {"Id": entry["Id"], "MessageId": f"msg-{message_id}"}
+                for entry, message_id in zip(Entries, ids)
+            ],
+            "Failed": [],
+        }
+
+
+def install(ssm_latency: float = 0.0, sqs_latency: float = 0.0) -> Dict:
+    """Point the app at fresh fakes and return them by service name."""
+    os.environ["JWT_SECRET_PARAM"] = JWT_SECRET_PARAM
+    os.environ["QUEUE_URL_PARAM"] = QUEUE_URL_PARAM
+    fakes = {
+        "ssm": FakeSSM(
+            {JWT_SECRET_PARAM: JWT_SECRET, QUEUE_URL_PARAM: QUEUE_URL},
+            latency=ssm_latency,
+        ),
+        "sqs": FakeSQS(latency=sqs_latency),
+    }
+    clients._clients.update(fakes)
+    return fakes
@@ -0,0 +1,361 @@
+"""End-to-end load test of the API against in-process AWS fakes.
+
+Runs the real ``create_app()`` app, with SSM and SQS replaced by the fakes
+of ``benchmarks.fakes``, and drives each scenario at a fixed concurrency
+through httpx's ASGI transport: ``POST /orders``, ``GET /orders/{id}``,
+``GET /orders/all`` over 10^3 to 10^6 stored orders, and invocations of the
+Mangum ``handler`` with API Gateway events built from ``event.json``.
+
+Reports requests/sec and latency percentiles per scenario, then replays a
+few requests under tracemalloc to report the memory they allocate. Results
+can be compared with a baseline, e.g. in CI: allocation regressions fail
+against the stored baseline, while throughput, which varies from one machine
+or run to the next, only fails against a baseline measured in the same job.
+Latency percentiles are only reported.
+
+Usage:
+    python -m benchmarks.loadtest --output loadtest.json
+    python -m benchmarks.loadtest --quick --check benchmarks/baselines/loadtest.json
+    python -m benchmarks.loadtest --quick --output benchmarks/baselines/loadtest.json
+    # In one job: the merge base, then the change
+    python -m benchmarks.loadtest --quick --output base.json
+    python -m benchmarks.loadtest --quick --check base.json --check-timings
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import os
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import jwt
+
+from benchmarks import fakes
+from benchmarks.common import percentile, write_results
+
+CURRENCIES = ["EUR", "USD", "MAD", "GBP"]
+TERMINALS = [f"pos-terminal-{i}" for i in range(50)]
+ORDER_BODY = {"nom_client": "Client 1", "montant": 42.5, "devise": "EUR"}
+
+# Metrics compared with the baseline, and whether higher values are better.
+# Allocations barely depend on the machine, so a stored baseline is enough;
+# throughput only compares with a baseline measured on the same machine, and
+# the p95 of a short run is too noisy to gate on even there
+ALLOC_METRICS = {"alloc_bytes_per_request": False}
+THROUGHPUT_METRICS = {"requests_per_sec": True}
+REPORTED_METRICS = {"p95_ms": False}
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: Callable[[int], str]
+    body: Optional[Dict] = None
+    orders: int = 0
+
+
+def make_token() -> str:
+    """Return a JWT accepted by the app for the fake JWT secret."""
+    return jwt.encode(
+        {
+            "sub": "pos-terminal-1",
+            "iss": "poshub-api",
+            "scopes": ["orders:write"],
+            "exp": int(time.time()) + 3600,
+        },
+        fakes.JWT_SECRET,
+        algorithm="HS256",
+    )
+
+
+def seed(orders: int):
+    """Return an OrderService holding ``orders`` synthetic orders."""
+    from poshub_api.domain.models import OrderIn
+    from poshub_api.services.order_service import OrderService
+    from poshub_api.shared.dependencies import create_order_store
+
+    rng = random.Random(42)
+    inputs = [
+        OrderIn(
+            nom_client=f"Client {i}",
+            montant=round(rng.uniform(1, 500), 2),
+            devise=rng.choice(CURRENCIES),
+        )
+        for i in range(1_000)
+    ]
+    contexts = [{"sub": terminal} for terminal in TERMINALS]
+    service = OrderService(store=create_order_store())
+    for i in range(orders):
+        service.create_order(inputs[i % 1_000], contexts[i % len(contexts)])
+    return service
+
+
+def scenarios(order_counts: List[int]) -> List[Scenario]:
+    result = [Scenario("post_orders", "POST", lambda i: "/orders/", ORDER_BODY)]
+    result.append(Scenario("get_order", "GET", None, orders=10_000))
+    for count in order_counts:
+        result.append(
+            Scenario(
+                f"list_orders_{count}",
+                "GET",
+                lambda i: "/orders/all?limit=100&currency=EUR",
+                orders=count,
+            )
+        )
+    return result
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    path: Callable[[int], str],
+    requests: int,
+    concurrency: int,
+) -> Dict:
+    """Send ``requests`` requests from ``concurrency`` concurrent workers."""
+    latencies: List[float] = []
+    errors = 0
+    indexes = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in indexes:
+            started = time.perf_counter()
+            response = await client.request(
+                scenario.method, path(i), json=scenario.body
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, errors)
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int) -> Dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1e3, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1e3, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1e3, 3),
+    }
+
+
+async def run_http_scenario(
+    scenario: Scenario, requests: int, concurrency: int, alloc_requests: int
+) -> Dict:
+    """Run one scenario against a fresh app and order service."""
+    from poshub_api.main import create_app
+    from poshub_api.shared import dependencies
+
+    # Swapped in place: dependency_overrides would rebuild the dependency
+    # graph on every request and dominate the measurements
+    service = dependencies.order_service = seed(scenario.orders)
+    app = create_app()
+
+    path = scenario.path
+    if path is None:
+        ids = [
+            str(service.orders.at(row).order_id) for row in range(len(service.orders))
+        ]
+        path = lambda i: f"/orders/{ids[i % len(ids)]}"  # noqa: E731
+
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {make_token()}"}
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://loadtest", headers=headers
+        ) as client:
+            # Warm-up: SSM cache, JWT cache, lazy imports
+            await drive(client, scenario, path, concurrency, concurrency)
+            result = await drive(client, scenario, path, requests, concurrency)
+
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            await drive(client, scenario, path, alloc_requests, 1)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    result["alloc_bytes_per_request"] = round((peak - baseline) / alloc_requests)
+    result["retained_bytes_per_request"] = round((current - baseline) / alloc_requests)
+    return {"scenario": scenario.name, "orders": scenario.orders, **result}
+
+
+def make_event(template: Dict, method: str, path: str, body: Optional[Dict]) -> Dict:
+    """Return an API Gateway HTTP API event for the Mangum handler."""
+    event = copy.deepcopy(template)
+    event["rawPath"] = event["requestContext"]["http"]["path"] = path
+    event["requestContext"]["http"]["method"] = method
+    event["headers"]["authorization"] = f"Bearer {make_token()}"
+    event["body"] = json.dumps(body) if body is not None else None
+    return event
+
+
+def run_mangum_scenario(
+    name: str, event: Dict, requests: int, alloc_requests: int
+) -> Dict:
+    """Invoke the Mangum handler sequentially, as one Lambda instance does."""
+    from poshub_api.main import handler
+
+    handler(event, None)
+    latencies: List[float] = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        invoked = time.perf_counter()
+        response = handler(event, None)
+        latencies.append(time.perf_counter() - invoked)
+        if response["statusCode"] >= 400:
+            errors += 1
+    result = summarize(latencies, time.perf_counter() - started, errors)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for _ in range(alloc_requests):
+        handler(event, None)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result["alloc_bytes_per_request"] = round((peak - baseline) / alloc_requests)
+    result["retained_bytes_per_request"] = round((current - baseline) / alloc_requests)
+    return {"scenario": name, "orders": 0, **result}
+
+
+def check(
+    results: List[Dict],
+    baseline_path: str,
+    tolerance: float,
+    metrics: Dict[str, bool],
+) -> List[str]:
+    """Return the regressions of the metrics against the baseline file."""
+    with open(baseline_path) as f:
+        baseline = {r["scenario"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        base = baseline.get(result["scenario"])
+        if base is None:
+            continue
+        for metric, higher_is_better in metrics.items():
+            before, after = base.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            ratio = after / before
+            if (higher_is_better and ratio < 1 - tolerance) or (
+                not higher_is_better and ratio > 1 + tolerance
+            ):
+                regressions.append(
+                    f"{result['scenario']}: {metric} {before} -> {after} "
+                    f"({(ratio - 1) * 100:+.0f}%)"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--orders",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000, 1_000_000],
+        help="Stored order counts of the GET /orders/all scenarios",
+    )
+    parser.add_argument("--mangum-requests", type=int, default=500)
+    parser.add_argument("--alloc-requests", type=int, default=200)
+    parser.add_argument("--sqs-latency-ms", type=float, default=0.0)
+    parser.add_argument("--quick", action="store_true", help="Small run for CI")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument(
+        "--check", metavar="BASELINE", help="Fail on allocation regressions"
+    )
+    parser.add_argument(
+        "--check-timings",
+        action="store_true",
+        help="Also fail on throughput regressions; only for a baseline run in the same job",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument(
+        "--timing-tolerance",
+        type=float,
+        help="Tolerance of the timings; defaults to 0.3, or 0.5 with --quick",
+    )
+    args = parser.parse_args()
+
+    if args.quick:
+        args.requests, args.orders, args.mangum_requests = 1_000, [1_000, 10_000], 200
+    if args.timing_tolerance is None:
+        # Short runs are noisier
+        args.timing_tolerance = 0.5 if args.quick else 0.3
+
+    # Keep the cost of formatting log records, but not of printing them
+    os.environ["LOG_LEVEL"] = args.log_level
+    # A few terminals send every request: their rate limits would cap the run
+    os.environ.setdefault("ADMISSION_ENABLED", "false")
+    logging.basicConfig(stream=open(os.devnull, "w"), level=args.log_level)
+    fakes.install(sqs_latency=args.sqs_latency_ms / 1e3)
+
+    results = []
+    for scenario in scenarios(args.orders):
+        result = asyncio.run(
+            run_http_scenario(
+                scenario, args.requests, args.concurrency, args.alloc_requests
+            )
+        )
+        print(json.dumps(result))
+        results.append(result)
+
+    # Mangum uses the current event loop, which asyncio.run() has unset
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    with open("event.json") as f:
+        template = json.load(f)
+    for name, method, path, body in (
+        ("mangum_health", "GET", "/health", None),
+        ("mangum_post_orders", "POST", "/orders/", ORDER_BODY),
+    ):
+        result = run_mangum_scenario(
+            name,
+            make_event(template, method, path, body),
+            args.mangum_requests,
+            args.alloc_requests,
+        )
+        print(json.dumps(result))
+        results.append(result)
+
+    write_results(args.output, "loadtest", results)
+
+    if args.check:
+        regressions = check(results, args.check, args.tolerance, ALLOC_METRICS)
+        throughput = check(
+            results, args.check, args.timing_tolerance, THROUGHPUT_METRICS
+        )
+        reported = check(results, args.check, args.timing_tolerance, REPORTED_METRICS)
+        if args.check_timings:
+            regressions += throughput
+        else:
+            reported = throughput + reported
+        for timing in reported:
+            print(f"SLOWER (not checked) {timing}", file=sys.stderr)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
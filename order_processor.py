@@ -1,7 +1,9 @@
-import json
 import logging
+import os
 from typing import Any, Dict, List
 
+from poshub_api.services.sqs_batch import SQSBatchProcessor, create_dedupe_store
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
@@ -23,6 +25,15 @@ def process_order(message_body: Dict[str, Any]) -> None:
     logger.info(f"Order {order_id} processed successfully.")
 
 
+# Module-level so warm containers keep the processed message ids
+processor = SQSBatchProcessor(
+    process_order,
+    dedupe_store=create_dedupe_store(),
+    max_concurrency=int(os.getenv("ORDER_PROCESSOR_CONCURRENCY", "16")),
+    mode=os.getenv("ORDER_PROCESSOR_MODE", "thread"),
+)
+
+
 def lambda_handler(
     event: Dict[str, Any], context: Any
 ) -> Dict[str, List[Dict[str, str]]]:
@@ -30,24 +41,16 @@ def lambda_handler(
     Lambda handler to process a batch of SQS messages.
     Uses partial batch failure response to handle individual message failures.
     """
-    failed: List[Dict[str, str]] = []
     records = event.get("Records", [])
 
     logger.info(f"Received {len(records)} messages from SQS.")
 
-    for record in records:
-        message_id = record["messageId"]
-        try:
-            body = json.loads(record["body"])
-            logger.info(f"Message ID: {message_id} | Body: {body}")
-            process_order(body)
-        except Exception as e:
-            logger.error(f"Failed to process message {message_id}: {e}")
-            failed.append({"itemIdentifier": message_id})
+    response = processor.process(records, context)
+    failed = response["batchItemFailures"]
 
     if failed:
         logger.warning(
             f"{len(failed)} message(s) failed and will be retried or sent to DLQ."
         )
 
-    return {"batchItemFailures": failed}
+    return response
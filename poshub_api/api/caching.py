@@ -0,0 +1,83 @@
+"""This module implements the HTTP validators and cache headers of the orders.
+
+Orders never change once created, so the strong ETag of an order derives
+from its id alone and is known before the order is read. Listings derive
+theirs from the version of the order collection, which changes with every
+order created. A request whose ``If-None-Match`` matches gets a ``304``
+before any order is read or serialized.
+"""
+
+from typing import Dict, Optional
+from uuid import UUID
+
+from fastapi.responses import Response
+from pydantic.v1 import BaseSettings
+
+# Part of every ETag: bump it when the JSON of an order changes
+REPRESENTATION_VERSION = 1
+
+
+class HTTPCacheSettings(BaseSettings):
+    """Cache-Control settings of the order responses."""
+
+    # An order is immutable; only its age in caches needs a bound
+    order_cache_max_age: int = 24 * 3600
+    # 0: caches keep the listing but revalidate it, which a 304 makes cheap
+    order_list_cache_max_age: int = 0
+
+    class Config:
+        env_file = ".env"
+
+
+def cache_control(max_age: int, immutable: bool = False) -> str:
+    """Return the Cache-Control of a response cached for ``max_age`` seconds.
+
+    Responses are ``private``: shared caches must not serve them to callers
+    that the authorizer has not allowed.
+    """
+    if max_age <= 0:
+        return "private, no-cache"
+    return f"private, max-age={max_age}" + (", immutable" if immutable else "")
+
+
+settings = HTTPCacheSettings()
+ORDER_CACHE_CONTROL = cache_control(settings.order_cache_max_age, immutable=True)
+ORDER_LIST_CACHE_CONTROL = cache_control(settings.order_list_cache_max_age)
+
+
+def order_etag(order_id: UUID) -> str:
+    """Return the strong ETag of an order."""
+    return f'"o{REPRESENTATION_VERSION}-{order_id.hex}"'
+
+
+def collection_etag(version: str) -> str:
+    """Return the strong ETag of the listings at a collection version."""
+    return f'"c{REPRESENTATION_VERSION}-{version}"'
+
+
+def order_headers(order_id: UUID) -> Dict[str, str]:
+    return {"ETag": order_etag(order_id), "Cache-Control": ORDER_CACHE_CONTROL}
+
+
+def collection_headers(version: str) -> Dict[str, str]:
+    return {"ETag": collection_etag(version), "Cache-Control": ORDER_LIST_CACHE_CONTROL}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Return whether an If-None-Match header matches the ETag.
+
+    Uses the weak comparison that RFC 9110 specifies for If-None-Match, so a
+    ``W/`` tag added by a proxy still matches.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    """Return the 304 response carrying the validators of the cached response."""
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,70 @@
+"""This module implements routers imported on their first request.
+
+A ``LazyRouter`` is registered with the paths its router serves. The router
+module, and everything it imports, is only loaded when one of those paths is
+first requested; requests are then dispatched to the router's own routes.
+"""
+
+import importlib
+import re
+import threading
+from typing import List, Optional, Sequence
+
+from fastapi import APIRouter
+from starlette.routing import BaseRoute, Match, compile_path
+from starlette.types import Receive, Scope, Send
+
+# Scope key carrying the matched route from matches() to handle()
+ROUTE_SCOPE_KEY = "poshub.lazy_route"
+
+
+class LazyRouter(BaseRoute):
+    """Route placeholder that imports an ``APIRouter`` on first use."""
+
+    def __init__(self, import_path: str, paths: Sequence[str]):
+        """Initialize the placeholder.
+
+        Args:
+            import_path: ``"package.module:attribute"`` of the APIRouter.
+            paths: Path templates served by the router, used to match requests
+                before it is imported.
+        """
+        self.import_path = import_path
+        self.paths = list(paths)
+        self._patterns: List[re.Pattern] = [compile_path(p)[0] for p in paths]
+        self._router: Optional[APIRouter] = None
+        self._lock = threading.Lock()
+
+    @property
+    def router(self) -> APIRouter:
+        """Return the router, importing it on first access."""
+        if self._router is None:
+            with self._lock:
+                if self._router is None:
+                    module_name, attribute = self.import_path.split(":")
+                    module = importlib.import_module(module_name)
+                    self._router = getattr(module, attribute)
+        return self._router
+
+    def matches(self, scope: Scope):
+        if scope["type"] != "http":
+            return Match.NONE, {}
+        if not any(pattern.match(scope["path"]) for pattern in self._patterns):
+            return Match.NONE, {}
+
+        partial = None
+        for route in self.router.routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                return match, {**child_scope, ROUTE_SCOPE_KEY: route}
+            if match == Match.PARTIAL and partial is None:
+                partial = {**child_scope, ROUTE_SCOPE_KEY: route}
+        if partial is not None:
+            return Match.PARTIAL, partial
+        return Match.NONE, {}
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await scope[ROUTE_SCOPE_KEY].handle(scope, receive, send)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.import_path!r}, paths={self.paths!r})"
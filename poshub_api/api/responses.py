@@ -0,0 +1,30 @@
+"""This module implements the response classes of the API."""
+
+from typing import Any, Iterable
+
+from fastapi.responses import JSONResponse, Response
+
+from poshub_api.domain.models import OrderOut
+from poshub_api.shared.serialization import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed.
+
+    The default response class of the app, like FastAPI's ``ORJSONResponse``
+    but falling back to the standard library instead of failing.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """Response whose content is JSON bytes that are already serialized."""
+
+    media_type = "application/json"
+
+
+def order_list_json(orders: Iterable[OrderOut]) -> bytes:
+    """Return the JSON array of the orders from their canonical JSON."""
+    return b"[" + b",".join(order.to_json() for order in orders) + b"]"
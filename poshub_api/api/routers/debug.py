@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Request
+
+from poshub_api.infrastructure.http.breaker import breaker_stats
+from poshub_api.infrastructure.http.cache import get_response_cache
+from poshub_api.infrastructure.http.client import pool_stats
+from poshub_api.infrastructure.http.hedging import hedge_stats
+from poshub_api.shared.utils import log_api_key
+
+router = APIRouter(tags=["basics"])
+
+
+@router.get("/debug/ssm")
+def ssm():
+    """Debug endpoint to verify ssm access"""
+    return {"api_key": log_api_key()}
+
+
+@router.get("/debug/http")
+def http(request: Request):
+    """Outbound HTTP metrics: breakers, hedging, pool usage and cache"""
+    return {
+        "breakers": breaker_stats(),
+        "hedging": hedge_stats(),
+        "pool": pool_stats(getattr(request.app.state, "http", None)),
+        "cache": get_response_cache().stats(),
+    }
@@ -0,0 +1,76 @@
+from typing import Iterator, Literal, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from poshub_api.domain.models import OrderFilter, OrderOut
+from poshub_api.services.order_service import OrderService
+from poshub_api.shared.dependencies import get_order_service
+from poshub_api.shared.exceptions import InvalidCursorError, NotFoundError
+
+# Included before orders.router so /orders/export is not taken for an order id
+router = APIRouter(prefix="/orders", tags=["orders"])
+
+# Orders serialized per chunk written to the response
+EXPORT_CHUNK_SIZE = 500
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+def _chunks(orders: Iterator[OrderOut], fmt: str) -> Iterator[bytes]:
+    """Serialize orders into bounded chunks of NDJSON lines or JSON array items."""
+    separator = b"\n" if fmt == "ndjson" else b","
+    first = True
+    if fmt == "json":
+        yield b"["
+    buffer = []
+    for order in orders:
+        buffer.append(order.to_json())
+        if len(buffer) == EXPORT_CHUNK_SIZE:
+            yield _join(buffer, separator, first, fmt)
+            first = False
+            buffer = []
+    if buffer:
+        yield _join(buffer, separator, first, fmt)
+    if fmt == "json":
+        yield b"]"
+
+
+def _join(buffer, separator: bytes, first: bool, fmt: str) -> bytes:
+    body = separator.join(buffer)
+    if fmt == "ndjson":
+        return body + b"\n"
+    return body if first else b"," + body
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_orders(
+    filters: OrderFilter = Depends(),
+    cursor: Optional[str] = None,
+    after: Optional[UUID] = None,
+    format: Literal["ndjson", "json"] = "ndjson",
+    service: OrderService = Depends(get_order_service),
+):
+    """
+    Stream every matching order by creation time, in constant memory.
+    Resume an interrupted export with `after` (the last order id received)
+    or with a `cursor` from the paginated listing.
+    """
+    try:
+        if after is not None:
+            cursor = service.cursor_after(after)
+        orders = service.iter_orders(filters, cursor=cursor)
+        # Validate the cursor before the response status is sent
+        first = next(orders, None)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+
+    def rows() -> Iterator[OrderOut]:
+        if first is not None:
+            yield first
+            yield from orders
+
+    return StreamingResponse(_chunks(rows(), format), media_type=MEDIA_TYPES[format])
@@ -1,90 +1,317 @@
-import json
+import asyncio
 import logging
 import os
-from typing import List
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, TypeVar
 from uuid import UUID
 
-import boto3
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 
-from poshub_api.domain.models import OrderIn, OrderOut
+from poshub_api.api.caching import (
+    collection_headers,
+    etag_matches,
+    not_modified,
+    order_headers,
+)
+from poshub_api.api.responses import RawJSONResponse, order_list_json
+from poshub_api.domain.models import (
+    OrderBatchItem,
+    OrderBatchResult,
+    OrderFilter,
+    OrderIn,
+    OrderOut,
+    OrderStats,
+)
+from poshub_api.infrastructure.aws.outbox import SQSOutbox
+from poshub_api.infrastructure.aws.parameters import get_parameter_provider
+from poshub_api.services.idempotency import get_idempotency_cache, request_fingerprint
 from poshub_api.services.order_service import OrderService
 from poshub_api.shared.dependencies import get_order_service
-from poshub_api.shared.exceptions import NotFoundError
+from poshub_api.shared.exceptions import (
+    IdempotencyConflictError,
+    InvalidCursorError,
+    NotFoundError,
+)
 from poshub_api.shared.security import check_scopes
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 # Configure logging
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)  # or os.getenv("LOG_LEVEL", "INFO")
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
 
-sqs = boto3.client("sqs")
-ssm = boto3.client("ssm")
 
-# Cache the queue URL after first fetch
-QUEUE_URL = None
+def get_queue_url():
+    try:
+        param_name = os.environ["QUEUE_URL_PARAM"]
+        return get_parameter_provider().get(param_name)
+    except Exception:
+        logger.error("❌ Failed to retrieve QUEUE_URL from SSM", exc_info=True)
+        raise RuntimeError("QUEUE_URL could not be loaded")
 
 
-def get_queue_url():
-    global QUEUE_URL
-    if not QUEUE_URL:
-        try:
-            param_name = os.environ["QUEUE_URL_PARAM"]
-            QUEUE_URL = ssm.get_parameter(Name=param_name, WithDecryption=False)[
-                "Parameter"
-            ]["Value"]
-            logger.info(f"✅ Loaded QUEUE_URL from SSM: {QUEUE_URL}")
-        except Exception:
-            logger.error("❌ Failed to retrieve QUEUE_URL from SSM", exc_info=True)
-            raise RuntimeError("QUEUE_URL could not be loaded")
-    return QUEUE_URL
+# Micro-batched, non-blocking SQS publisher, flushed on app shutdown
+sqs_outbox = SQSOutbox(queue_url=get_queue_url)
+
+# Maximum number of orders accepted by POST /orders/batch
+BATCH_MAX_SIZE = int(os.getenv("ORDERS_BATCH_MAX_SIZE", "500"))
+
+# Built once: validates a whole batch in a single pydantic-core pass
+order_list_adapter = TypeAdapter(List[OrderIn])
+
+T = TypeVar("T")
+
+
+async def call_service(
+    service: OrderService, function: Callable[..., T], *args: Any
+) -> T:
+    """Call the service, in a worker thread when its store may block.
+
+    In-memory stores answer faster than a thread hop, but a SQLite write may
+    wait seconds for another worker's lock and must not stall the loop.
+    """
+    if service.orders.blocking:
+        return await asyncio.to_thread(function, *args)
+    return function(*args)
 
 
 @router.post("/", response_model=OrderOut, status_code=201)
 async def create_order(
     order: OrderIn,
+    request: Request,
     service: OrderService = Depends(get_order_service),
     token_payload: dict = Depends(check_scopes(required_scope="orders:write")),
-) -> OrderOut:
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+) -> RawJSONResponse:
     """
     Create a new order.
     Requires 'orders:write' scope in the JWT token.
+    A retry with the same Idempotency-Key returns the order created first.
     """
+
+    async def create() -> Tuple[int, bytes]:
+        try:
+            created_order = await call_service(
+                service, service.create_order, order, token_payload
+            )
+            # Serialized once: the same bytes are the SQS message and the response
+            body = created_order.to_json()
+
+            message_id = await sqs_outbox.publish(body.decode())
+
+            logger.info("✅ Order created: %s", created_order.order_id)
+            if message_id:
+                logger.info("📨 Message sent to SQS (ID: %s)", message_id)
+            else:
+                logger.info("📨 Message queued for SQS")
+
+            return 201, body
+        except Exception:
+            logger.error("❌ Failed to create order or send to SQS", exc_info=True)
+            raise HTTPException(status_code=500, detail="Internal server error")
+
+    cache = get_idempotency_cache() if idempotency_key else None
+    if cache is None:
+        status_code, body = await create()
+        return RawJSONResponse(body, status_code=status_code)
+
+    # Scoped by caller so terminals cannot replay each other's orders
+    key = f"{token_payload.get('sub')}:{idempotency_key}"
+    try:
+        response, replayed = await cache.run(
+            key, request_fingerprint(await request.body()), create
+        )
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=e.message)
+    if replayed:
+        logger.info("♻️ Replayed order for Idempotency-Key %s", idempotency_key)
+    return RawJSONResponse(
+        response.body,
+        status_code=response.status_code,
+        headers={"Idempotent-Replayed": "true"} if replayed else None,
+    )
+
+
+def validate_batch(
+    items: List[Any],
+) -> Tuple[Dict[int, OrderIn], Dict[int, List[Dict[str, Any]]]]:
+    """Validate a batch, splitting it into valid orders and per-item errors."""
     try:
-        created_order = service.create_order(order, user_context=token_payload)
-        message = json.dumps(jsonable_encoder(created_order))
+        return dict(enumerate(order_list_adapter.validate_python(items))), {}
+    except ValidationError as e:
+        errors: Dict[int, List[Dict[str, Any]]] = {}
+        for error in e.errors(include_url=False, include_context=False):
+            index, *loc = error["loc"]
+            errors.setdefault(index, []).append({**error, "loc": loc})
 
-        queue_url = get_queue_url()
-        response = sqs.send_message(QueueUrl=queue_url, MessageBody=message)
+    valid_indexes = [i for i in range(len(items)) if i not in errors]
+    valid = order_list_adapter.validate_python([items[i] for i in valid_indexes])
+    return dict(zip(valid_indexes, valid)), errors
 
-        logger.info(f"✅ Order created: {created_order.order_id}")
-        logger.info(f"📨 Message sent to SQS (ID: {response['MessageId']})")
 
-        return created_order
-    except Exception:
-        logger.error("❌ Failed to create order or send to SQS", exc_info=True)
-        raise HTTPException(status_code=500, detail="Internal server error")
+# The body is taken as raw items, validated one by one in the handler, but
+# documented as the list of OrderIn it must be. The component exists since
+# POST /orders/ takes an OrderIn.
+BATCH_REQUEST_BODY = {
+    "content": {
+        "application/json": {
+            "schema": {
+                "title": "Orders",
+                "items": {"$ref": "#/components/schemas/OrderIn"},
+            }
+        }
+    }
+}
+
+
+@router.post(
+    "/batch",
+    response_model=OrderBatchResult,
+    status_code=207,
+    openapi_extra={"requestBody": BATCH_REQUEST_BODY},
+)
+async def create_orders_batch(
+    items: List[Any] = Body(...),
+    service: OrderService = Depends(get_order_service),
+    token_payload: dict = Depends(check_scopes(required_scope="orders:write")),
+) -> OrderBatchResult:
+    """
+    Create up to ORDERS_BATCH_MAX_SIZE orders in one request.
+    Invalid items are reported individually and do not reject the valid ones.
+    Requires 'orders:write' scope in the JWT token.
+    """
+    if len(items) > BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413, detail=f"Batch size exceeds {BATCH_MAX_SIZE} orders"
+        )
+
+    valid, errors = validate_batch(items)
+    results = {
+        index: OrderBatchItem(index=index, status=422, errors=jsonable_encoder(error))
+        for index, error in errors.items()
+    }
+
+    created_orders = await call_service(
+        service, service.create_orders, list(valid.values()), token_payload
+    )
+    # The outbox coalesces these into SendMessageBatch calls of 10
+    sent = await asyncio.gather(
+        *(sqs_outbox.publish(order.to_json().decode()) for order in created_orders),
+        return_exceptions=True,
+    )
+    for index, order, outcome in zip(valid, created_orders, sent):
+        if isinstance(outcome, Exception):
+            logger.error(
+                "❌ Failed to send order %s to SQS: %s", order.order_id, outcome
+            )
+            results[index] = OrderBatchItem(
+                index=index,
+                status=500,
+                order=order,
+                errors=[{"msg": "Failed to send order to SQS"}],
+            )
+        else:
+            results[index] = OrderBatchItem(index=index, status=201, order=order)
+
+    created = sum(1 for result in results.values() if result.status == 201)
+    logger.info("✅ Batch processed: %d/%d orders created", created, len(items))
+    return OrderBatchResult(
+        created=created,
+        failed=len(items) - created,
+        items=[results[index] for index in range(len(items))],
+    )
 
 
 @router.get("/all", response_model=List[OrderOut])
 async def get_orders(
+    filters: OrderFilter = Depends(),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
     service: OrderService = Depends(get_order_service),
-) -> List[OrderOut]:
+    if_none_match: Optional[str] = Header(None),
+) -> RawJSONResponse:
+    """
+    List orders by creation time, one page at a time.
+    The cursor of the next page is returned in the X-Next-Cursor header.
+    The ETag changes with every order created; If-None-Match gets a 304.
+    """
+    # Read before the page: a page that already holds newer orders is only
+    # revalidated in full once more
+    headers = collection_headers(await call_service(service, lambda: service.version))
+    if etag_matches(if_none_match, headers["ETag"]):
+        return not_modified(headers)
     try:
-        return list(service.orders.values())
+        page = await call_service(service, service.list_orders, filters, cursor, limit)
+        if page.next_cursor:
+            headers["X-Next-Cursor"] = page.next_cursor
+        return RawJSONResponse(order_list_json(page.items), headers=headers)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=e.message)
     except NotFoundError as e:
         logger.warning("❗ Orders not found")
         raise HTTPException(status_code=404, detail=e.message)
 
 
+@router.get("/feed", response_class=StreamingResponse)
+async def get_order_feed(
+    filters: OrderFilter = Depends(),
+    service: OrderService = Depends(get_order_service),
+    last_event_id: Optional[int] = Header(None, ge=-1),
+) -> StreamingResponse:
+    """
+    Stream the orders matching the filters as they are created, as
+    server-sent events whose id is the order sequence number.
+    Reconnecting with Last-Event-ID replays the orders missed meanwhile; a
+    reset event means they are no longer available and the client should
+    resynchronize through GET /orders/all.
+    """
+    return StreamingResponse(
+        await call_service(service, service.subscribe, filters, last_event_id),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: no keeps nginx-style proxies from buffering
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/stats", response_model=OrderStats)
+async def get_order_stats(
+    granularity: Literal["minute", "hour", "day"] = "hour",
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    currency: Optional[str] = Query(None, pattern="^[A-Z]{3}$"),
+    service: OrderService = Depends(get_order_service),
+) -> OrderStats:
+    """
+    Order counts and amount sum, min and max per currency, per created_by,
+    and per time bucket between created_from and created_to.
+    Served from aggregates maintained on insert, without reading the orders.
+    """
+    return await call_service(
+        service, service.order_stats, granularity, created_from, created_to, currency
+    )
+
+
 @router.get("/{id}", response_model=OrderOut)
 async def get_order(
-    id: UUID, service: OrderService = Depends(get_order_service)
-) -> OrderOut:
+    id: UUID,
+    service: OrderService = Depends(get_order_service),
+    if_none_match: Optional[str] = Header(None),
+) -> RawJSONResponse:
+    """
+    Return an order, with a strong ETag; If-None-Match gets a 304.
+    """
+    headers = order_headers(id)
+    # Orders never change: a matching ETag only needs the order to exist
+    if etag_matches(if_none_match, headers["ETag"]) and await call_service(
+        service, service.has_order, id
+    ):
+        return not_modified(headers)
     try:
-        return service.get_order_by_id(id)
+        order = await call_service(service, service.get_order_by_id, id)
+        return RawJSONResponse(order.to_json(), headers=headers)
     except NotFoundError as e:
-        logger.warning(f"❗ Order not found: {id}")
+        logger.warning("❗ Order not found: %s", id)
         raise HTTPException(status_code=404, detail=e.message)
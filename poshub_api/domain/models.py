@@ -1,9 +1,15 @@
 from datetime import datetime
-from typing import Annotated, Optional
+from typing import Annotated, Any, Dict, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field, StrictFloat, StrictStr
 
+from poshub_api.shared.serialization import dumps
+
+# Bypass BaseModel.__setattr__, as pydantic itself does in model_construct
+_object_new = object.__new__
+_object_setattr = object.__setattr__
+
 
 class OrderIn(BaseModel):
     customer_name: Annotated[StrictStr, Field(alias="nom_client", max_length=128)]
@@ -18,3 +24,101 @@ class OrderOut(BaseModel):
     total_amount: Annotated[StrictFloat, Field(alias="montant")]
     currency: Annotated[StrictStr, Field(alias="devise")]
     created_by: Optional[str]
+
+    @classmethod
+    def trusted(
+        cls,
+        order_id: UUID,
+        created_at: datetime,
+        customer_name: str,
+        total_amount: float,
+        currency: str,
+        created_by: Optional[str],
+    ) -> "OrderOut":
+        """Build an order from values that are already valid, skipping validation.
+
+        Only for values the service generated or read back from its own store.
+        Also faster than ``model_construct``, which still resolves defaults
+        and aliases.
+        """
+        order = _object_new(cls)
+        _object_setattr(
+            order,
+            "__dict__",
+            {
+                "order_id": order_id,
+                "created_at": created_at,
+                "customer_name": customer_name,
+                "total_amount": total_amount,
+                "currency": currency,
+                "created_by": created_by,
+            },
+        )
+        _object_setattr(order, "__pydantic_fields_set__", set(_ORDER_OUT_FIELDS))
+        _object_setattr(order, "__pydantic_extra__", None)
+        _object_setattr(order, "__pydantic_private__", None)
+        return order
+
+    def to_json(self) -> bytes:
+        """Return the canonical JSON of the order, as served and sent to SQS."""
+        values = self.__dict__
+        return dumps(
+            {
+                "order": values["order_id"],
+                "created_at": values["created_at"],
+                "nom_client": values["customer_name"],
+                "montant": values["total_amount"],
+                "devise": values["currency"],
+                "created_by": values["created_by"],
+            }
+        )
+
+
+_ORDER_OUT_FIELDS = frozenset(OrderOut.model_fields)
+
+
+class OrderFilter(BaseModel):
+    created_by: Optional[str] = None
+    currency: Annotated[Optional[str], Field(pattern="^[A-Z]{3}$")] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+
+class OrderBatchItem(BaseModel):
+    index: int
+    status: int
+    order: Optional[OrderOut] = None
+    errors: Optional[List[Dict[str, Any]]] = None
+
+
+class OrderBatchResult(BaseModel):
+    created: int
+    failed: int
+    items: List[OrderBatchItem]
+
+
+class OrderAggregate(BaseModel):
+    count: int
+    sum: float
+    min: float
+    max: float
+
+
+class OrderStatsGroup(BaseModel):
+    created_by: Optional[str]
+    by_currency: Dict[str, OrderAggregate]
+
+
+class OrderStatsBucket(BaseModel):
+    start: datetime
+    by_currency: Dict[str, OrderAggregate]
+
+
+class OrderStats(BaseModel):
+    count: int
+    by_currency: Dict[str, OrderAggregate]
+    by_created_by: List[OrderStatsGroup]
+    granularity: str
+    buckets: List[OrderStatsBucket]
@@ -0,0 +1,24 @@
+"""This module provides the process-wide boto3 clients.
+
+Clients are created on first use and boto3 itself is only imported then, which
+keeps both out of the Lambda cold-start path of requests that never call AWS.
+"""
+
+import threading
+from typing import Any, Dict
+
+_clients: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def get_client(service: str) -> Any:
+    """Return the boto3 client of the service, creating it on first use."""
+    client = _clients.get(service)
+    if client is None:
+        with _lock:
+            client = _clients.get(service)
+            if client is None:
+                import boto3
+
+                client = _clients[service] = boto3.client(service)
+    return client
@@ -0,0 +1,242 @@
+"""This module implements the micro-batched SQS outbox.
+
+Messages are handed to an asyncio queue and coalesced by background workers
+into ``SendMessageBatch`` calls of up to 10 entries within a linger window.
+The blocking boto3 call runs in a worker thread so the event loop is never
+held for an AWS round-trip. Entries that fail inside a partially successful
+batch are retried individually.
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+import structlog
+from pydantic.v1 import BaseSettings
+
+from poshub_api.infrastructure.aws.clients import get_client
+from poshub_api.shared.metrics import timed_phase
+
+logger = structlog.get_logger(__name__)
+
+# SQS SendMessageBatch accepts at most 10 entries per call
+SEND_MESSAGE_BATCH_MAX_ENTRIES = 10
+
+
+class OutboxSettings(BaseSettings):
+    """SQS outbox settings."""
+
+    sqs_outbox_linger_ms: float = 5.0
+    sqs_outbox_max_queue_size: int = 10_000
+    sqs_outbox_max_retries: int = 3
+    sqs_outbox_workers: int = 2
+    sqs_outbox_wait_for_ack: bool = True
+
+    class Config:
+        env_file = ".env"
+
+
+class OutboxError(Exception):
+    """Raised when a message could not be published to SQS."""
+
+
+@dataclass
+class _Message:
+    body: str
+    future: Optional[asyncio.Future]
+    attempts: int = 0
+    message_id: Optional[str] = field(default=None)
+
+
+class SQSOutbox:
+    """Asyncio-fed publisher that sends SQS messages in batches."""
+
+    def __init__(
+        self,
+        queue_url: Callable[[], str],
+        client_factory: Optional[Callable] = None,
+        linger: Optional[float] = None,
+        max_queue_size: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        workers: Optional[int] = None,
+        wait_for_ack: Optional[bool] = None,
+    ):
+        """Initialize the outbox.
+
+        Args:
+            queue_url: Callable returning the target queue URL.
+            client_factory: Callable returning an SQS client, called on first send.
+            linger: Seconds a batch waits for more messages before being sent.
+            max_queue_size: Pending messages after which ``publish`` waits.
+            max_retries: Retries of an entry that failed inside a batch.
+            workers: Number of batches that may be in flight at once.
+            wait_for_ack: Whether ``publish`` waits for SQS to acknowledge.
+        """
+        settings = OutboxSettings()
+        self._queue_url = queue_url
+        self._client_factory = client_factory or (lambda: get_client("sqs"))
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.linger = settings.sqs_outbox_linger_ms / 1000 if linger is None else linger
+        self.max_queue_size = max_queue_size or settings.sqs_outbox_max_queue_size
+        self.max_retries = (
+            settings.sqs_outbox_max_retries if max_retries is None else max_retries
+        )
+        self.workers = workers or settings.sqs_outbox_workers
+        self.wait_for_ack = (
+            settings.sqs_outbox_wait_for_ack if wait_for_ack is None else wait_for_ack
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def client(self):
+        """Return the SQS client, creating it on first use."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._client_factory()
+        return self._client
+
+    @property
+    def pending(self) -> int:
+        """Return the number of messages waiting to be sent."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def publish(self, body: str, wait: Optional[bool] = None) -> Optional[str]:
+        """Enqueue a message, waiting for room when the queue is full.
+
+        Args:
+            body: The message body.
+            wait: Whether to wait for the SQS acknowledgement; defaults to the
+                configured ``wait_for_ack``.
+
+        Returns:
+            The SQS ``MessageId`` when waiting for the acknowledgement, else None.
+
+        Raises:
+            OutboxError: If waiting and the message could not be sent.
+        """
+        with timed_phase("sqs"):
+            self._ensure_started()
+            wait = self.wait_for_ack if wait is None else wait
+            future = self._loop.create_future() if wait else None
+            await self._queue.put(_Message(body, future))
+            if future is None:
+                return None
+            return await future
+
+    async def flush(self) -> None:
+        """Wait until every enqueued message has been handled."""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def stop(self) -> None:
+        """Flush pending messages and stop the workers."""
+        await self.flush()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        # (Re)bind to the running loop, e.g. after a test client created a new one
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._tasks = [
+            loop.create_task(self._worker(self._queue), name=f"sqs-outbox-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = await self._collect(queue)
+            try:
+                await self._send(batch)
+            except Exception as e:
+                logger.error("SQS outbox batch failed", error=str(e))
+                self._fail(batch, e)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _collect(self, queue: asyncio.Queue) -> List[_Message]:
+        batch = [await queue.get()]
+        deadline = self._loop.time() + self.linger
+        while len(batch) < SEND_MESSAGE_BATCH_MAX_ENTRIES:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _send(self, batch: List[_Message]) -> None:
+        queue_url = await asyncio.to_thread(self._queue_url)
+        pending = batch
+        while pending:
+            entries = [
+                {"Id": str(i), "MessageBody": message.body}
+                for i, message in enumerate(pending)
+            ]
+            try:
+                response = await asyncio.to_thread(
+                    self.client.send_message_batch,
+                    QueueUrl=queue_url,
+                    Entries=entries,
+                )
+            except Exception as e:
+                failed = [(message, e, False) for message in pending]
+            else:
+                for success in response.get("Successful", []):
+                    self._resolve(pending[int(success["Id"])], success["MessageId"])
+                failed = [
+                    (
+                        pending[int(failure["Id"])],
+                        OutboxError(failure.get("Message", failure.get("Code"))),
+                        failure.get("SenderFault", False),
+                    )
+                    for failure in response.get("Failed", [])
+                ]
+
+            pending = []
+            for message, error, sender_fault in failed:
+                message.attempts += 1
+                if sender_fault or message.attempts > self.max_retries:
+                    logger.error(
+                        "SQS outbox message dropped",
+                        error=str(error),
+                        attempts=message.attempts,
+                    )
+                    self._fail([message], error)
+                else:
+                    pending.append(message)
+            if pending:
+                attempt = max(message.attempts for message in pending)
+                await asyncio.sleep(min(0.05 * 2**attempt, 1.0))
+
+    @staticmethod
+    def _resolve(message: _Message, message_id: str) -> None:
+        message.message_id = message_id
+        if message.future is not None and not message.future.done():
+            message.future.set_result(message_id)
+
+    @staticmethod
+    def _fail(batch: List[_Message], error: Exception) -> None:
+        for message in batch:
+            if message.future is not None and not message.future.done():
+                message.future.set_exception(OutboxError(str(error)))
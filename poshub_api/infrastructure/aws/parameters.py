@@ -0,0 +1,304 @@
+"""This module implements the process-wide SSM parameter provider.
+
+Parameters are cached per process with a TTL. Entries past their refresh point,
+expired ones included, are served from cache at once while a single background
+thread reloads them (stale-while-revalidate), so requests never wait on SSM
+once a value is cached. A failed reload is retried with exponential backoff
+rather than on every request, and an entry is only fetched inline once past
+the maximum staleness. Concurrent misses for the same name share a single SSM
+call. Only SecureString parameters are requested with decryption.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import structlog
+from pydantic.v1 import BaseSettings
+
+from poshub_api.infrastructure.aws.clients import get_client
+
+logger = structlog.get_logger(__name__)
+
+# SSM GetParameters accepts at most 10 names per call
+GET_PARAMETERS_MAX_NAMES = 10
+
+# Environment variables holding the names of the parameters used by the app
+PARAMETER_ENV_VARS = ("JWT_SECRET_PARAM", "QUEUE_URL_PARAM", "API_KEY_PARAM")
+
+# Those of them naming SecureString parameters, fetched with decryption
+SECURE_PARAMETER_ENV_VARS = ("JWT_SECRET_PARAM", "API_KEY_PARAM")
+
+
+class ParameterSettings(BaseSettings):
+    """SSM parameter cache settings."""
+
+    ssm_cache_ttl_seconds: float = 300.0
+    ssm_cache_refresh_ratio: float = 0.8
+    ssm_cache_max_stale_seconds: float = 3600.0
+    ssm_refresh_backoff_seconds: float = 1.0
+    ssm_refresh_max_backoff_seconds: float = 60.0
+
+    class Config:
+        env_file = ".env"
+
+
+@dataclass
+class _Entry:
+    parameter: Dict
+    fetched_at: float
+
+
+class _Flight:
+    """An in-progress fetch that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.parameter: Optional[Dict] = None
+        self.error: Optional[BaseException] = None
+
+
+class ParameterProvider:
+    """TTL cache in front of SSM with single-flight and background refresh."""
+
+    def __init__(
+        self,
+        client_factory: Optional[Callable] = None,
+        ttl: Optional[float] = None,
+        refresh_ratio: Optional[float] = None,
+        max_stale: Optional[float] = None,
+        backoff: Optional[float] = None,
+        max_backoff: Optional[float] = None,
+        secure_names: Optional[Iterable[str]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the parameter provider.
+
+        Args:
+            client_factory: Callable returning an SSM client, called on first fetch.
+            ttl: Seconds an entry is considered fresh.
+            refresh_ratio: Fraction of the TTL after which a background refresh
+                is started while the cached value keeps being served.
+            max_stale: Seconds past expiry an entry may still be served while
+                it is being refreshed, after which it is fetched inline.
+            backoff: Seconds before retrying a failed background refresh,
+                doubled after each further failure.
+            max_backoff: Upper bound of the retry delay.
+            secure_names: SecureString parameters, fetched with decryption;
+                defaults to those named by ``SECURE_PARAMETER_ENV_VARS``.
+            clock: Monotonic clock, injectable for tests.
+        """
+        settings = ParameterSettings()
+        self._client_factory = client_factory or (lambda: get_client("ssm"))
+        self._client = None
+        self.ttl = settings.ssm_cache_ttl_seconds if ttl is None else ttl
+        self.refresh_ratio = (
+            settings.ssm_cache_refresh_ratio if refresh_ratio is None else refresh_ratio
+        )
+        self.max_stale = (
+            settings.ssm_cache_max_stale_seconds if max_stale is None else max_stale
+        )
+        self.backoff = (
+            settings.ssm_refresh_backoff_seconds if backoff is None else backoff
+        )
+        self.max_backoff = (
+            settings.ssm_refresh_max_backoff_seconds
+            if max_backoff is None
+            else max_backoff
+        )
+        self._secure = set(
+            secure_parameter_names() if secure_names is None else secure_names
+        )
+        self._clock = clock
+        self._entries: Dict[str, _Entry] = {}
+        self._flights: Dict[str, _Flight] = {}
+        self._refreshing: Set[str] = set()
+        # name -> (consecutive refresh failures, time before which not to retry)
+        self._failures: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def client(self):
+        """Return the SSM client, creating it on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._client_factory()
+        return self._client
+
+    def get(self, name: str) -> str:
+        """Return the value of the parameter."""
+        return self.get_parameter(name)["Value"]
+
+    def cached(self, name: str) -> Optional[str]:
+        """Return the cached value of the parameter, never calling SSM."""
+        entry = self._entries.get(name)
+        if (
+            entry is None
+            or self._clock() - entry.fetched_at >= self.ttl + self.max_stale
+        ):
+            return None
+        return entry.parameter["Value"]
+
+    def get_parameter(self, name: str) -> Dict:
+        """Return the full SSM parameter dict (Name, Value, ARN, ...)."""
+        entry = self._entries.get(name)
+        if entry is not None:
+            age = self._clock() - entry.fetched_at
+            if age < self.ttl * self.refresh_ratio:
+                return entry.parameter
+            if age < self.ttl + self.max_stale:
+                self._refresh_in_background(name)
+                return entry.parameter
+        return self._fetch_single_flight(name)
+
+    def preload(self, names: Iterable[str]) -> None:
+        """Load the parameters not cached yet with batched GetParameters calls.
+
+        Mangum runs the app lifespan on every Lambda invocation, so parameters
+        that are still fresh must not be fetched again.
+        """
+        now = self._clock()
+        names = [
+            name
+            for name in dict.fromkeys(names)
+            if name not in self._entries
+            or now - self._entries[name].fetched_at >= self.ttl
+        ]
+        if not names:
+            return
+        for decrypt in (True, False):
+            group = [name for name in names if self._decrypt(name) is decrypt]
+            for start in range(0, len(group), GET_PARAMETERS_MAX_NAMES):
+                end = start + GET_PARAMETERS_MAX_NAMES
+                self._load_batch(group[start:end], decrypt)
+        logger.info("SSM parameters preloaded", count=len(names))
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop one cached parameter, or all of them."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def _decrypt(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        if entry is not None and "Type" in entry.parameter:
+            return entry.parameter["Type"] == "SecureString"
+        return name in self._secure
+
+    def _load_batch(self, names: List[str], decrypt: bool) -> None:
+        response = self.client.get_parameters(Names=names, WithDecryption=decrypt)
+        fetched_at = self._clock()
+        encrypted = []
+        with self._lock:
+            for parameter in response.get("Parameters", []):
+                if not decrypt and parameter.get("Type") == "SecureString":
+                    # Not declared secure: its value is still ciphertext
+                    self._secure.add(parameter["Name"])
+                    encrypted.append(parameter["Name"])
+                else:
+                    self._entries[parameter["Name"]] = _Entry(parameter, fetched_at)
+        if response.get("InvalidParameters"):
+            logger.warning(
+                "SSM parameters not found",
+                parameters=response["InvalidParameters"],
+            )
+        if encrypted:
+            self._load_batch(encrypted, decrypt=True)
+
+    def _fetch(self, name: str) -> Dict:
+        decrypt = self._decrypt(name)
+        response = self.client.get_parameter(Name=name, WithDecryption=decrypt)
+        if not decrypt and response["Parameter"].get("Type") == "SecureString":
+            # Not declared secure: its value is still ciphertext
+            self._secure.add(name)
+            response = self.client.get_parameter(Name=name, WithDecryption=True)
+        return response["Parameter"]
+
+    def _fetch_single_flight(self, name: str) -> Dict:
+        with self._lock:
+            flight = self._flights.get(name)
+            leader = flight is None
+            if leader:
+                flight = self._flights[name] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.parameter
+
+        try:
+            flight.parameter = self._fetch(name)
+            with self._lock:
+                self._entries[name] = _Entry(flight.parameter, self._clock())
+                self._failures.pop(name, None)
+            logger.info("Fetched SSM parameter", parameter=name)
+            return flight.parameter
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(name, None)
+            flight.done.set()
+
+    def _refresh_in_background(self, name: str) -> None:
+        with self._lock:
+            if name in self._flights or name in self._refreshing:
+                return
+            if self._failures.get(name, (0, 0.0))[1] > self._clock():
+                return
+            self._refreshing.add(name)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="ssm-refresh"
+                )
+        self._executor.submit(self._refresh, name)
+
+    def _refresh(self, name: str) -> None:
+        try:
+            self._fetch_single_flight(name)
+        except Exception:
+            with self._lock:
+                failures = self._failures.get(name, (0, 0.0))[0] + 1
+                delay = min(self.max_backoff, self.backoff * 2 ** (failures - 1))
+                self._failures[name] = (failures, self._clock() + delay)
+            logger.warning(
+                "Background SSM refresh failed, serving the cached value",
+                parameter=name,
+                retry_in=delay,
+            )
+        finally:
+            with self._lock:
+                self._refreshing.discard(name)
+
+
+def configured_parameter_names() -> List[str]:
+    """Return the parameter names configured through environment variables."""
+    return [os.environ[var] for var in PARAMETER_ENV_VARS if os.environ.get(var)]
+
+
+def secure_parameter_names() -> List[str]:
+    """Return the configured names of SecureString parameters."""
+    return [os.environ[var] for var in SECURE_PARAMETER_ENV_VARS if os.environ.get(var)]
+
+
+_provider: Optional[ParameterProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_parameter_provider() -> ParameterProvider:
+    """Return the process-wide parameter provider."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = ParameterProvider()
+    return _provider
@@ -0,0 +1,165 @@
+"""This module implements the per-host circuit breakers of outbound HTTP.
+
+A breaker opens after consecutive failures and then fails fast, so a slow or
+broken upstream does not hold pool connections for the whole timeout. After
+a cool-down it lets a few trial requests through (half-open) and closes again
+once one of them succeeds.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import structlog
+from pydantic.v1 import BaseSettings
+
+logger = structlog.get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class BreakerSettings(BaseSettings):
+    """Circuit breaker settings."""
+
+    http_breaker_failure_threshold: int = 5
+    http_breaker_reset_seconds: float = 30.0
+    http_breaker_half_open_max_calls: int = 1
+
+    class Config:
+        env_file = ".env"
+
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker of one upstream host."""
+
+    def __init__(
+        self,
+        name: str = "",
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        half_open_max_calls: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the breaker, closed.
+
+        Args:
+            name: What the breaker protects, used in logs.
+            failure_threshold: Consecutive failures that open the breaker.
+            reset_timeout: Seconds the breaker stays open before trial calls.
+            half_open_max_calls: Trial calls allowed at once while half-open.
+            clock: Monotonic clock, injectable for tests.
+        """
+        settings = BreakerSettings()
+        self.name = name
+        self.failure_threshold = (
+            failure_threshold or settings.http_breaker_failure_threshold
+        )
+        self.reset_timeout = (
+            settings.http_breaker_reset_seconds
+            if reset_timeout is None
+            else reset_timeout
+        )
+        self.half_open_max_calls = (
+            half_open_max_calls or settings.http_breaker_half_open_max_calls
+        )
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self._trial_started_at = 0.0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        """Return the current state, moving from open to half-open when due."""
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        """Return whether a call may go through; count it if half-open."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN:
+                # A trial call that never reported back must not wedge the
+                # breaker half-open, so trials are re-allowed after a timeout
+                now = self._clock()
+                if now - self._trial_started_at >= self.reset_timeout:
+                    self._trial_calls = 0
+                if self._trial_calls < self.half_open_max_calls:
+                    self._trial_calls += 1
+                    self._trial_started_at = now
+                    return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the breaker if half-open."""
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit breaker closed", upstream=self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_calls = 0
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker past the threshold."""
+        with self._lock:
+            self._failures += 1
+            state = self._current_state()
+            if state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != OPEN:
+                    self.opened += 1
+                    logger.warning(
+                        "Circuit breaker opened",
+                        upstream=self.name,
+                        failures=self._failures,
+                    )
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._trial_calls = 0
+
+    def stats(self) -> Dict:
+        """Return the state and counters of the breaker."""
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+    def _current_state(self) -> str:
+        if (
+            self._state == OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = HALF_OPEN
+            self._trial_calls = 0
+        return self._state
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    """Return the process-wide breaker of the host."""
+    breaker = _breakers.get(host)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(host)
+            if breaker is None:
+                breaker = _breakers[host] = CircuitBreaker(name=host)
+    return breaker
+
+
+def breaker_stats() -> Dict[str, Dict]:
+    """Return the stats of every breaker, by host."""
+    return {host: breaker.stats() for host, breaker in list(_breakers.items())}
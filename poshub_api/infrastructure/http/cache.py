@@ -0,0 +1,198 @@
+"""This module implements the cache in front of upstream HTTP calls.
+
+Responses are cached per URL for the lifetime given by their ``Cache-Control``
+header, or a default TTL when they carry none. Concurrent misses for the same
+URL share one upstream request, expired entries with an ``ETag`` are
+revalidated with ``If-None-Match``, and an expired entry is still served
+(stale-if-error) when the upstream fails.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import structlog
+from pydantic.v1 import BaseSettings
+
+logger = structlog.get_logger(__name__)
+
+
+class ResponseCacheSettings(BaseSettings):
+    """Upstream response cache settings."""
+
+    http_cache_ttl_seconds: float = 60.0
+    http_cache_max_stale_seconds: float = 3600.0
+    http_cache_max_entries: int = 1_000
+
+    class Config:
+        env_file = ".env"
+
+
+@dataclass
+class UpstreamResponse:
+    """What a fetch returned; ``data`` is None when ``not_modified``."""
+
+    data: Any
+    etag: Optional[str] = None
+    cache_control: Optional[str] = None
+    not_modified: bool = False
+
+
+@dataclass
+class _Entry:
+    data: Any
+    etag: Optional[str]
+    fetched_at: float
+    ttl: float
+
+
+def cache_ttl(cache_control: Optional[str], default: float) -> Optional[float]:
+    """Return how long a response may be cached, or None if it must not be.
+
+    ``no-store`` and ``private`` responses are not cached, ``no-cache`` ones
+    are cached but revalidated on every use, and ``s-maxage`` wins over
+    ``max-age`` since this cache is shared by every caller.
+    """
+    if not cache_control:
+        return default
+    directives: Dict[str, Optional[str]] = {}
+    for directive in cache_control.lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name] = value.strip('"') or None
+    if "no-store" in directives or "private" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        try:
+            return max(0.0, float(directives[name]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return default
+
+
+Fetch = Callable[[Optional[str]], Awaitable[UpstreamResponse]]
+
+
+class ResponseCache:
+    """Per-URL response cache with single-flight and conditional requests."""
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_stale: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the cache.
+
+        Args:
+            ttl: Lifetime of responses that carry no ``Cache-Control``.
+            max_stale: Seconds past expiry an entry may still be served when
+                the upstream fails.
+            max_entries: URLs kept before the least recently used is evicted.
+            clock: Monotonic clock, injectable for tests.
+        """
+        settings = ResponseCacheSettings()
+        self.ttl = settings.http_cache_ttl_seconds if ttl is None else ttl
+        self.max_stale = (
+            settings.http_cache_max_stale_seconds if max_stale is None else max_stale
+        )
+        self.max_entries = max_entries or settings.http_cache_max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._flights: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Task]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale_served = 0
+
+    async def get(self, key: str, fetch: Fetch) -> Any:
+        """Return the cached data of the key, calling ``fetch`` when expired.
+
+        ``fetch`` is called with the ETag of the cached entry, if any, and must
+        report a ``304`` with ``not_modified``.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and self._clock() - entry.fetched_at < entry.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.data
+
+        # Flights are tied to the loop that started them; Mangum and the test
+        # client may run each request on a new loop
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        if flight is None or flight[0] is not loop or flight[1].done():
+            self.misses += 1
+            task = loop.create_task(self._refresh(key, fetch))
+            flight = self._flights[key] = (loop, task)
+        # Shielded so a cancelled caller does not cancel the shared request
+        return await asyncio.shield(flight[1])
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one cached entry, or all of them."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss counters and the current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "stale_served": self.stale_served,
+            "size": len(self._entries),
+        }
+
+    async def _refresh(self, key: str, fetch: Fetch) -> Any:
+        entry = self._entries.get(key)
+        try:
+            response = await fetch(entry.etag if entry is not None else None)
+        except Exception:
+            if entry is not None and self._clock() - entry.fetched_at < (
+                entry.ttl + self.max_stale
+            ):
+                self.stale_served += 1
+                logger.warning("Serving stale upstream response", url=key)
+                return entry.data
+            raise
+        finally:
+            flight = self._flights.get(key)
+            if flight is not None and flight[1] is asyncio.current_task():
+                del self._flights[key]
+
+        ttl = cache_ttl(response.cache_control, self.ttl)
+        if response.not_modified and entry is not None:
+            self.revalidated += 1
+            data, etag = entry.data, response.etag or entry.etag
+        else:
+            data, etag = response.data, response.etag
+
+        if ttl is None:
+            self._entries.pop(key, None)
+            return data
+        self._entries[key] = _Entry(data, etag, self._clock(), ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return data
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide upstream response cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
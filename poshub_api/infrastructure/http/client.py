@@ -1,29 +1,157 @@
 """This module implements the HTTP client configuration."""
 
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
 import httpx
 import structlog
 from fastapi import HTTPException
+from pydantic.v1 import BaseSettings
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
 
+from poshub_api.infrastructure.http.breaker import get_breaker
+from poshub_api.infrastructure.http.cache import UpstreamResponse, get_response_cache
+from poshub_api.infrastructure.http.hedging import (
+    HedgeSettings,
+    LatencyTracker,
+    get_latency_tracker,
+    hedged,
+)
+
 logger = structlog.getLogger()
 
 
+class HTTPClientSettings(BaseSettings):
+    """Outbound HTTP client and connection pool settings."""
+
+    http_timeout_seconds: float = 30.0
+    http_request_timeout_seconds: float = 10.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 5.0
+
+    class Config:
+        env_file = ".env"
+
+
+def create_http_client(
+    settings: Optional[HTTPClientSettings] = None,
+) -> httpx.AsyncClient:
+    """Return an AsyncClient with the configured pool limits and keep-alive."""
+    settings = settings or HTTPClientSettings()
+    return httpx.AsyncClient(
+        timeout=settings.http_timeout_seconds,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        ),
+    )
+
+
+def pool_stats(client: Optional[httpx.AsyncClient]) -> Dict:
+    """Return the connection usage of the client's pool.
+
+    httpx has no public pool API, so this reads the httpcore pool behind the
+    default transport and reports nothing for other transports.
+    """
+    settings = HTTPClientSettings()
+    stats = {
+        "max_connections": settings.http_max_connections,
+        "max_keepalive_connections": settings.http_max_keepalive_connections,
+        "requests_in_flight": _in_flight,
+    }
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is not None:
+        idle = sum(1 for connection in connections if connection.is_idle())
+        stats.update(
+            connections=len(connections),
+            idle_connections=idle,
+            active_connections=len(connections) - idle,
+        )
+    return stats
+
+
+_in_flight = 0
+_settings = HTTPClientSettings()
+_hedge_enabled = HedgeSettings().http_hedge_enabled
+
+
+async def safe_get(client: httpx.AsyncClient, url: str):
+    """Return the JSON body of the URL through the upstream response cache."""
+    return await get_response_cache().get(url, lambda etag: fetch(client, url, etag))
+
+
 @retry(
     reraise=True,
     stop=stop_after_attempt(2),
     wait=wait_fixed(1),
     retry=retry_if_exception_type(httpx.RequestError),
 )
-async def safe_get(client: httpx.AsyncClient, url: str):
+async def _send(
+    attempt: Callable[[], Awaitable[httpx.Response]], tracker: LatencyTracker
+) -> httpx.Response:
+    """Send the request, retried once on a network error."""
+    return await hedged(attempt, tracker, enabled=_hedge_enabled)
+
+
+async def fetch(
+    client: httpx.AsyncClient, url: str, etag: Optional[str] = None
+) -> UpstreamResponse:
+    """Fetch the URL, conditionally on ``etag`` when one is given.
+
+    Calls fail fast with a 503 while the host's circuit breaker is open, and
+    may be hedged when HTTP_HEDGE_ENABLED is set. A network error is retried
+    once before it counts as a breaker failure and becomes a 408.
+    """
+    global _in_flight
+    host = httpx.URL(url).host
+    breaker = get_breaker(host)
+    if not breaker.allow():
+        logger.warning("External API circuit open", url=url)
+        raise HTTPException(status_code=503, detail="External API unavailable")
+
+    tracker = get_latency_tracker(host)
+    headers = {"If-None-Match": etag} if etag else None
+
+    async def attempt() -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.get(
+            url, headers=headers, timeout=_settings.http_request_timeout_seconds
+        )
+        if response.status_code < 500:
+            tracker.record(time.perf_counter() - started)
+        return response
+
+    _in_flight += 1
     try:
-        response = await client.get(url, timeout=10)
+        response = await _send(attempt, tracker)
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        if response.status_code == 304:
+            return UpstreamResponse(
+                data=None,
+                etag=response.headers.get("ETag"),
+                cache_control=response.headers.get("Cache-Control"),
+                not_modified=True,
+            )
         response.raise_for_status()
-        return response.json()
+        return UpstreamResponse(
+            data=response.json(),
+            etag=response.headers.get("ETag"),
+            cache_control=response.headers.get("Cache-Control"),
+        )
     except httpx.HTTPStatusError as e:
         logger.error(
             "External API responded with error", status=e.response.status_code, url=url
         )
         raise HTTPException(status_code=400, detail="External API returned an error")
     except httpx.RequestError as e:
+        breaker.record_failure()
         logger.error("External API request failed", error=str(e))
         raise HTTPException(status_code=408, detail="Failed to reach external API")
+    finally:
+        _in_flight -= 1
@@ -0,0 +1,147 @@
+"""This module implements hedged outbound requests.
+
+When a request has not answered after the upstream's recent p95 latency, a
+second identical request is sent and whichever answers first wins. Only the
+slowest few percent of requests are duplicated, which trims the latency tail
+for a small amount of extra upstream load. Only idempotent requests may be
+hedged.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from pydantic.v1 import BaseSettings
+
+T = TypeVar("T")
+
+
+class HedgeSettings(BaseSettings):
+    """Hedged request settings."""
+
+    http_hedge_enabled: bool = False
+    http_hedge_percentile: float = 95.0
+    http_hedge_min_delay_ms: float = 20.0
+    http_hedge_max_delay_ms: float = 2_000.0
+    http_hedge_min_samples: int = 20
+
+    class Config:
+        env_file = ".env"
+
+
+class LatencyTracker:
+    """Recent latencies of an upstream and the hedge delay derived from them."""
+
+    def __init__(
+        self,
+        window: int = 256,
+        percentile: Optional[float] = None,
+        min_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        min_samples: Optional[int] = None,
+    ):
+        """Initialize the tracker.
+
+        Args:
+            window: Number of recent latencies kept.
+            percentile: Latency percentile used as the hedge delay.
+            min_delay: Lower bound of the delay, in seconds.
+            max_delay: Upper bound of the delay, in seconds.
+            min_samples: Samples needed before any request is hedged.
+        """
+        settings = HedgeSettings()
+        self.percentile = percentile or settings.http_hedge_percentile
+        self.min_delay = (
+            settings.http_hedge_min_delay_ms / 1e3 if min_delay is None else min_delay
+        )
+        self.max_delay = (
+            settings.http_hedge_max_delay_ms / 1e3 if max_delay is None else max_delay
+        )
+        self.min_samples = (
+            settings.http_hedge_min_samples if min_samples is None else min_samples
+        )
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record(self, seconds: float) -> None:
+        """Record the latency of a successful request."""
+        self._samples.append(seconds)
+
+    def delay(self) -> Optional[float]:
+        """Return the hedge delay, or None while there are too few samples."""
+        if len(self._samples) < max(1, self.min_samples):
+            return None
+        ordered = sorted(self._samples)
+        rank = max(0, round(self.percentile / 100 * len(ordered)) - 1)
+        return min(self.max_delay, max(self.min_delay, ordered[rank]))
+
+    def stats(self) -> Dict:
+        """Return the hedge counters and the current delay."""
+        delay = self.delay()
+        return {
+            "samples": len(self._samples),
+            "delay_ms": None if delay is None else round(delay * 1e3, 1),
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+async def hedged(
+    call: Callable[[], Awaitable[T]], tracker: LatencyTracker, enabled: bool = True
+) -> T:
+    """Await ``call()``, racing a second call if the first one is slow.
+
+    The first successful result wins and the other attempt is cancelled. If
+    both fail, the error of the last one to fail is raised.
+    """
+    delay = tracker.delay() if enabled else None
+    if delay is None:
+        return await call()
+
+    first = asyncio.ensure_future(call())
+    pending = {first}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return first.result()
+
+        tracker.hedged += 1
+        second = asyncio.ensure_future(call())
+        pending.add(second)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        tracker.hedge_wins += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(host: str) -> LatencyTracker:
+    """Return the process-wide latency tracker of the host."""
+    tracker = _trackers.get(host)
+    if tracker is None:
+        with _trackers_lock:
+            tracker = _trackers.get(host)
+            if tracker is None:
+                tracker = _trackers[host] = LatencyTracker()
+    return tracker
+
+
+def hedge_stats() -> Dict[str, Dict]:
+    """Return the hedge stats of every tracked host."""
+    return {host: tracker.stats() for host, tracker in list(_trackers.items())}
@@ -0,0 +1,77 @@
+"""This module defines the storage engine interface of the Order service."""
+
+from abc import abstractmethod
+from collections.abc import Mapping
+from typing import Iterator, List, Optional, Sequence
+from uuid import UUID, uuid4
+
+from poshub_api.domain.models import OrderOut
+
+
+class OrderStore(Mapping):
+    """Append-only order storage, addressable by order id and by row number.
+
+    Rows are numbered in insertion order starting at 0, which lets the
+    Order service indexes refer to orders by row.
+    """
+
+    # Whether calls may wait on I/O, e.g. on disk or on a lock shared with
+    # other processes, in which case the routes call the store off the loop
+    blocking = False
+
+    @property
+    def store_id(self) -> str:
+        """Return the id of the stored collection, unique to it.
+
+        Row numbers restart from 0 in every process holding its own store, so
+        the id tells such collections apart. In-memory stores get a random id;
+        persistent stores set ``_store_id`` to the one kept with their data.
+        """
+        return self.__dict__.setdefault("_store_id", uuid4().hex)
+
+    @abstractmethod
+    def add(self, order: OrderOut) -> int:
+        """Store the order and return its row number."""
+
+    def add_many(self, orders: Sequence[OrderOut]) -> List[int]:
+        """Store the orders and return their row numbers."""
+        return [self.add(order) for order in orders]
+
+    @abstractmethod
+    def at(self, row: int) -> OrderOut:
+        """Return the order stored at the row."""
+
+    def at_many(self, rows: Sequence[int]) -> List[OrderOut]:
+        """Return the orders stored at the rows, in the same order."""
+        return [self.at(row) for row in rows]
+
+    def rows(self, start: int, stop: Optional[int] = None) -> Iterator[OrderOut]:
+        """Yield the orders from row ``start`` up to ``stop``, in row order."""
+        for row in range(start, len(self) if stop is None else stop):
+            yield self.at(row)
+
+    @abstractmethod
+    def row_of(self, order_id: UUID) -> Optional[int]:
+        """Return the row of the order, or None if it is not stored."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Return the number of stored orders."""
+
+    def __getitem__(self, order_id: UUID) -> OrderOut:
+        row = self.row_of(order_id)
+        if row is None:
+            raise KeyError(order_id)
+        return self.at(row)
+
+    def __iter__(self) -> Iterator[UUID]:
+        for order in self.values():
+            yield order.order_id
+
+    def flush(self) -> None:
+        """Make every stored order durable; nothing to do for in-memory stores."""
+
+    def values(self) -> Iterator[OrderOut]:
+        """Yield the stored orders in insertion order."""
+        for row in range(len(self)):
+            yield self.at(row)
@@ -0,0 +1,207 @@
+"""This module implements the compact, array-backed order store.
+
+Each attribute is kept in its own column: 16-byte UUIDs in a bytearray,
+epoch-microsecond timestamps and float64 amounts in typed arrays, currency
+and ``created_by`` as codes into interned string tables, and customer names
+as UTF-8 bytes with an offsets column. The UUID-to-row index is an
+open-addressing hash table of row numbers that compares against the UUID
+column, so no per-order Python objects are kept at all. ``OrderOut`` objects
+are only built when a row is read.
+"""
+
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional
+from uuid import UUID
+from zlib import crc32
+
+from poshub_api.domain.models import OrderOut
+from poshub_api.infrastructure.storage.base import OrderStore
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+UUID_SIZE = 16
+EMPTY_SLOT = -1
+
+# Typed columns, by attribute and array typecode, exported as raw bytes
+ARRAY_COLUMNS = {
+    "_created_at": "q",
+    "_amounts": "d",
+    "_currency": "I",
+    "_created_by": "I",
+    "_name_offsets": "Q",
+    "_slots": "q",
+}
+BYTE_COLUMNS = ("_uuids", "_names")
+
+
+class _StringTable:
+    """Interns strings into dense integer codes; code 0 stands for None."""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ColumnarOrderStore(OrderStore):
+    """Stores orders column by column in typed arrays."""
+
+    def __init__(self, initial_slots: int = 1024):
+        """Initialize an empty store.
+
+        Args:
+            initial_slots: Initial size of the UUID hash table (a power of two).
+        """
+        self._uuids = bytearray()
+        self._created_at = array("q")
+        self._amounts = array("d")
+        self._currency = array("I")
+        self._created_by = array("I")
+        self._names = bytearray()
+        self._name_offsets = array("Q", [0])
+        self._currencies = _StringTable()
+        self._users = _StringTable()
+        self._slots = array("q", [EMPTY_SLOT]) * initial_slots
+        self._count = 0
+
+    def add(self, order: OrderOut) -> int:
+        """Store the order and return its row number."""
+        created_at = order.created_at
+        if created_at.tzinfo is not None:
+            created_at = created_at.replace(tzinfo=None) - created_at.utcoffset()
+        return self.add_row(
+            order.order_id.bytes,
+            (created_at - EPOCH) // MICROSECOND,
+            order.customer_name.encode(),
+            order.total_amount,
+            order.currency,
+            order.created_by,
+        )
+
+    def add_row(
+        self,
+        order_id: bytes,
+        created_at: int,
+        customer_name: bytes,
+        total_amount: float,
+        currency: str,
+        created_by: Optional[str],
+    ) -> int:
+        """Store an order given as column values and return its row number.
+
+        ``created_at`` is in epoch microseconds and ``customer_name`` UTF-8.
+        """
+        row = self._count
+        self._uuids += order_id
+        self._created_at.append(created_at)
+        self._amounts.append(total_amount)
+        self._currency.append(self._currencies.code(currency))
+        self._created_by.append(self._users.code(created_by))
+        self._names += customer_name
+        self._name_offsets.append(len(self._names))
+
+        if (row + 1) * 2 > len(self._slots):
+            self._grow()
+        self._insert_slot(self._slots, order_id, row)
+        # Published last so concurrent readers never see a partial row
+        self._count = row + 1
+        return row
+
+    def at(self, row: int) -> OrderOut:
+        """Build the ``OrderOut`` of the row."""
+        if not 0 <= row < self._count:
+            raise IndexError(row)
+        name_start, name_end = self._name_offsets[row], self._name_offsets[row + 1]
+        return OrderOut.trusted(
+            order_id=UUID(bytes=self._uuid_at(row)),
+            created_at=EPOCH + self._created_at[row] * MICROSECOND,
+            customer_name=self._names[name_start:name_end].decode(),
+            total_amount=self._amounts[row],
+            currency=self._currencies.values[self._currency[row]],
+            created_by=self._users.values[self._created_by[row]],
+        )
+
+    def row_of(self, order_id: UUID) -> Optional[int]:
+        """Return the row of the order, or None if it is not stored."""
+        key = order_id.bytes
+        mask = len(self._slots) - 1
+        slot = crc32(key) & mask
+        while True:
+            row = self._slots[slot]
+            if row == EMPTY_SLOT:
+                return None
+            if self._uuid_at(row) == key:
+                return row if row < self._count else None
+            slot = (slot + 1) & mask
+
+    def __len__(self) -> int:
+        return self._count
+
+    def export_columns(self) -> Dict[str, Any]:
+        """Return copies of the columns, hash table and string tables.
+
+        Callers must keep writers out while this runs.
+        """
+        columns: Dict[str, Any] = {
+            name: bytes(getattr(self, name)) for name in BYTE_COLUMNS
+        }
+        for name in ARRAY_COLUMNS:
+            columns[name] = getattr(self, name)[:]
+        columns["count"] = self._count
+        columns["currencies"] = self._currencies.values[1:]
+        columns["users"] = self._users.values[1:]
+        return columns
+
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, Any]) -> "ColumnarOrderStore":
+        """Build a store from exported columns, given as buffers of raw bytes.
+
+        The buffers are copied in bulk, rows are not decoded one by one.
+        """
+        store = cls(initial_slots=1)
+        for name in BYTE_COLUMNS:
+            setattr(store, name, bytearray(columns[name]))
+        for name, typecode in ARRAY_COLUMNS.items():
+            column = array(typecode)
+            column.frombytes(columns[name])
+            setattr(store, name, column)
+        for table, values in (
+            (store._currencies, columns["currencies"]),
+            (store._users, columns["users"]),
+        ):
+            for value in values:
+                table.code(value)
+        store._count = columns["count"]
+        return store
+
+    def _uuid_at(self, row: int) -> bytes:
+        start = row * UUID_SIZE
+        end = start + UUID_SIZE
+        return bytes(self._uuids[start:end])
+
+    @staticmethod
+    def _insert_slot(slots: array, key: bytes, row: int) -> None:
+        # CRC32 rather than hash(), which is salted per process, so the table
+        # exported by one process stays valid in another
+        mask = len(slots) - 1
+        slot = crc32(key) & mask
+        while slots[slot] != EMPTY_SLOT:
+            slot = (slot + 1) & mask
+        slots[slot] = row
+
+    def _grow(self) -> None:
+        # Rebuilt aside and swapped in so lookups never see a partial table
+        slots = array("q", [EMPTY_SLOT]) * (len(self._slots) * 2)
+        for row in range(self._count):
+            self._insert_slot(slots, self._uuid_at(row), row)
+        self._slots = slots
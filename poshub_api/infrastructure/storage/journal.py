@@ -0,0 +1,518 @@
+"""This module implements the journaled order store, persisted across restarts.
+
+Orders are kept in a ``ColumnarOrderStore`` and every write is appended to a
+binary journal. A background thread commits the journal in groups: records
+appended during one commit interval are written and fsynced together, so
+the fsync cost is shared by every order of the group. Writers may wait for
+their group to be durable, or return right away and accept losing the last
+interval on a crash.
+
+Periodically, once enough orders were journaled, a compaction rotates to a
+new journal file and writes a snapshot: the raw bytes of the columnar
+store's typed columns and hash table. On startup the snapshot is
+memory-mapped and the columns are copied in bulk, without decoding orders
+one by one, and only the journals written after it are replayed. Journals
+covered by a snapshot are deleted.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
+
+import structlog
+from pydantic.v1 import BaseSettings
+
+from poshub_api.domain.models import OrderOut
+from poshub_api.infrastructure.storage.base import OrderStore
+from poshub_api.infrastructure.storage.columnar import (
+    ARRAY_COLUMNS,
+    BYTE_COLUMNS,
+    ColumnarOrderStore,
+)
+
+logger = structlog.get_logger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+JOURNAL_PREFIX = "journal."
+SNAPSHOT_NAME = "orders.snapshot"
+STORE_ID_NAME = "store.id"
+SNAPSHOT_MAGIC = b"POSHUBS1"
+
+# Record: payload length and CRC32, then the fixed fields and the strings
+RECORD_HEADER = struct.Struct("<II")
+RECORD_FIELDS = struct.Struct("<16sqdHBH")
+NO_CREATED_BY = 0xFFFF
+SNAPSHOT_HEADER = struct.Struct("<8sQ")
+
+
+class JournalSettings(BaseSettings):
+    """Journaled order store settings."""
+
+    order_journal_dir: str = "poshub_journal"
+    order_journal_commit_interval_ms: float = 5.0
+    order_journal_durable_writes: bool = False
+    order_journal_snapshot_interval_seconds: float = 60.0
+    order_journal_snapshot_min_orders: int = 10_000
+
+    class Config:
+        env_file = ".env"
+
+
+def encode_record(order: OrderOut) -> bytes:
+    """Return the journal record of the order."""
+    created_at = order.created_at
+    if created_at.tzinfo is not None:
+        created_at = created_at.replace(tzinfo=None) - created_at.utcoffset()
+    name = order.customer_name.encode()
+    currency = order.currency.encode()
+    created_by = order.created_by.encode() if order.created_by is not None else b""
+    payload = (
+        RECORD_FIELDS.pack(
+            order.order_id.bytes,
+            (created_at - EPOCH) // MICROSECOND,
+            order.total_amount,
+            len(name),
+            len(currency),
+            len(created_by) if order.created_by is not None else NO_CREATED_BY,
+        )
+        + name
+        + currency
+        + created_by
+    )
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_records(data: bytes) -> Tuple[List[tuple], int]:
+    """Decode the records of a journal into ``ColumnarOrderStore.add_row`` args.
+
+    Returns the rows and the offset where the valid records end, which is
+    short of the end of the data when the last write was torn by a crash.
+    """
+    rows = []
+    offset, end = 0, len(data)
+    unpack_header, unpack_fields = RECORD_HEADER.unpack_from, RECORD_FIELDS.unpack_from
+    while offset + RECORD_HEADER.size <= end:
+        length, crc = unpack_header(data, offset)
+        start = offset + RECORD_HEADER.size
+        next_offset = start + length
+        payload = data[start:next_offset]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        order_id, created_at, amount, name_len, currency_len, created_by_len = (
+            unpack_fields(payload)
+        )
+        name_start = RECORD_FIELDS.size
+        currency_start = name_start + name_len
+        created_by_start = currency_start + currency_len
+        created_by = None
+        if created_by_len != NO_CREATED_BY:
+            created_by = payload[created_by_start:].decode()
+        rows.append(
+            (
+                order_id,
+                created_at,
+                payload[name_start:currency_start],
+                amount,
+                payload[currency_start:created_by_start].decode(),
+                created_by,
+            )
+        )
+        offset = next_offset
+    return rows, offset
+
+
+class GroupCommitWriter:
+    """Appends to a file from any thread, with one fsync per group of writes."""
+
+    def __init__(self, path: str, interval: float):
+        """Open the file for appending and start the commit thread.
+
+        Args:
+            path: Path of the journal file.
+            interval: Seconds appends are collected before a commit.
+        """
+        self.path = path
+        self.interval = interval
+        self.commits = 0
+        self._file = open(path, "ab")
+        self._buffer = bytearray()
+        self._appended = 0
+        self._durable = 0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name="journal-commit", daemon=True
+        )
+        self._thread.start()
+
+    def append(self, data: bytes) -> int:
+        """Queue the data and return the position to wait on for durability.
+
+        Raises:
+            OSError: If a commit failed: nothing appended since would ever be
+                written, so writes fail rather than being acknowledged.
+        """
+        with self._condition:
+            if self._closed:
+                raise ValueError(f"Journal {self.path} is closed")
+            self._raise_error()
+            self._buffer += data
+            self._appended += len(data)
+            self._condition.notify_all()
+            return self._appended
+
+    def wait(self, position: int) -> None:
+        """Block until the data up to the position is fsynced."""
+        with self._condition:
+            while self._durable < position:
+                self._raise_error()
+                self._condition.wait()
+
+    def flush(self) -> None:
+        """Block until everything appended so far is fsynced."""
+        with self._condition:
+            self.wait(self._appended)
+
+    def _raise_error(self) -> None:
+        # A new exception each time, so the stored one's traceback stays put
+        if self._error is not None:
+            raise OSError(f"Journal {self.path} commit failed") from self._error
+
+    def close(self) -> None:
+        """Commit what is queued, stop the commit thread and close the file."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._file.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._buffer and not self._closed:
+                    self._condition.wait()
+                if not self._buffer:
+                    return
+                closed = self._closed
+            if not closed:
+                # Appends arriving meanwhile join this group
+                time.sleep(self.interval)
+            with self._condition:
+                data, self._buffer = bytes(self._buffer), bytearray()
+                position = self._appended
+            try:
+                self._file.write(data)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                logger.error("Journal commit failed", path=self.path, error=str(e))
+                with self._condition:
+                    self._error = e
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                self._durable = position
+                self.commits += 1
+                self._condition.notify_all()
+
+
+def write_snapshot(path: str, columns: Dict[str, Any], next_generation: int) -> None:
+    """Write exported columns as a snapshot file, atomically replacing any."""
+    sections: Dict[str, List[int]] = {}
+    buffers = []
+    offset = 0
+    for name in BYTE_COLUMNS + tuple(ARRAY_COLUMNS):
+        data = columns[name]
+        raw = data.tobytes() if isinstance(data, array) else data
+        sections[name] = [offset, len(raw)]
+        buffers.append(raw)
+        # Keep every section aligned for the typed arrays
+        padding = -len(raw) % 8
+        buffers.append(b"\0" * padding)
+        offset += len(raw) + padding
+
+    header = json.dumps(
+        {
+            "count": columns["count"],
+            "next_generation": next_generation,
+            "byteorder": sys.byteorder,
+            "itemsizes": {
+                name: array(typecode).itemsize
+                for name, typecode in ARRAY_COLUMNS.items()
+            },
+            "currencies": columns["currencies"],
+            "users": columns["users"],
+            "sections": sections,
+        }
+    ).encode()
+    header += b" " * (-(SNAPSHOT_HEADER.size + len(header)) % 8)
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(header)))
+        f.write(header)
+        for buffer in buffers:
+            f.write(buffer)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+    _fsync_directory(os.path.dirname(path))
+
+
+def read_snapshot(path: str) -> Tuple[ColumnarOrderStore, int]:
+    """Load a snapshot file; return the store and the next journal generation."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        magic, header_length = SNAPSHOT_HEADER.unpack_from(m)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not an order snapshot: {path}")
+        start = SNAPSHOT_HEADER.size
+        end = start + header_length
+        header = json.loads(m[start:end])
+        itemsizes = {
+            name: array(typecode).itemsize for name, typecode in ARRAY_COLUMNS.items()
+        }
+        if header["byteorder"] != sys.byteorder or header["itemsizes"] != itemsizes:
+            raise ValueError(f"Snapshot written on another platform: {path}")
+
+        view = memoryview(m)[end:]
+        sections = {
+            name: view[offset:][:length]
+            for name, (offset, length) in header["sections"].items()
+        }
+        try:
+            store = ColumnarOrderStore.from_columns(
+                {
+                    **sections,
+                    "count": header["count"],
+                    "currencies": header["currencies"],
+                    "users": header["users"],
+                }
+            )
+        finally:
+            # Views must be released before the map is closed
+            for section in sections.values():
+                section.release()
+            view.release()
+    return store, header["next_generation"]
+
+
+def _fsync_directory(directory: str) -> None:
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class JournalOrderStore(OrderStore):
+    """Columnar order store persisted by a journal and periodic snapshots."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        commit_interval: Optional[float] = None,
+        durable_writes: Optional[bool] = None,
+        snapshot_interval: Optional[float] = None,
+        snapshot_min_orders: Optional[int] = None,
+    ):
+        """Load the snapshot and journals of the directory, creating it if needed.
+
+        Args:
+            directory: Directory of the snapshot and journal files.
+            commit_interval: Seconds journal appends are grouped before a fsync.
+            durable_writes: Whether writes wait until their group is fsynced.
+            snapshot_interval: Seconds between compaction checks; 0 disables
+                background compaction.
+            snapshot_min_orders: Orders journaled since the last snapshot
+                before a compaction writes a new one.
+        """
+        settings = JournalSettings()
+        self.directory = directory or settings.order_journal_dir
+        self.commit_interval = (
+            settings.order_journal_commit_interval_ms / 1e3
+            if commit_interval is None
+            else commit_interval
+        )
+        self.durable_writes = (
+            settings.order_journal_durable_writes
+            if durable_writes is None
+            else durable_writes
+        )
+        self.snapshot_interval = (
+            settings.order_journal_snapshot_interval_seconds
+            if snapshot_interval is None
+            else snapshot_interval
+        )
+        self.snapshot_min_orders = (
+            settings.order_journal_snapshot_min_orders
+            if snapshot_min_orders is None
+            else snapshot_min_orders
+        )
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Held by writers and by compactions, never by readers
+        self._lock = threading.Lock()
+        self._orders = ColumnarOrderStore()
+        self._generation, self._unsnapshotted = self._load()
+        self._store_id = self._load_store_id()
+        self._writer = GroupCommitWriter(
+            self._journal_path(self._generation), self.commit_interval
+        )
+        self._stop = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+        if self.snapshot_interval > 0:
+            self._compactor = threading.Thread(
+                target=self._compact_periodically, name="journal-compact", daemon=True
+            )
+            self._compactor.start()
+
+    @property
+    def blocking(self) -> bool:
+        # Only durable writes wait for the disk
+        return self.durable_writes
+
+    def add(self, order: OrderOut) -> int:
+        """Store and journal the order, and return its row number."""
+        return self.add_many([order])[0]
+
+    def add_many(self, orders: Sequence[OrderOut]) -> List[int]:
+        """Store and journal the orders, and return their row numbers."""
+        records = b"".join(encode_record(order) for order in orders)
+        with self._lock:
+            writer = self._writer
+            # Journaled first, so orders that cannot be are not stored either
+            position = writer.append(records)
+            rows = [self._orders.add(order) for order in orders]
+            self._unsnapshotted += len(orders)
+        if self.durable_writes:
+            writer.wait(position)
+        return rows
+
+    def at(self, row: int) -> OrderOut:
+        """Return the order stored at the row."""
+        return self._orders.at(row)
+
+    def row_of(self, order_id: UUID) -> Optional[int]:
+        """Return the row of the order, or None if it is not stored."""
+        return self._orders.row_of(order_id)
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def flush(self) -> None:
+        """Block until every stored order is fsynced to the journal."""
+        self._writer.flush()
+
+    def compact(self) -> None:
+        """Snapshot the store and delete the journals the snapshot covers."""
+        with self._lock:
+            previous = self._writer
+            self._generation += 1
+            self._writer = GroupCommitWriter(
+                self._journal_path(self._generation), self.commit_interval
+            )
+            columns = self._orders.export_columns()
+            generation, self._unsnapshotted = self._generation, 0
+        previous.close()
+
+        started = time.perf_counter()
+        write_snapshot(self._snapshot_path(), columns, generation)
+        for old in self._journal_generations():
+            if old < generation:
+                os.remove(self._journal_path(old))
+        logger.info(
+            "Order snapshot written",
+            orders=columns["count"],
+            duration_ms=round((time.perf_counter() - started) * 1e3, 1),
+        )
+
+    def close(self) -> None:
+        """Stop background compaction and commit the journal."""
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+        self._writer.close()
+
+    def _load(self) -> Tuple[int, int]:
+        started = time.perf_counter()
+        generation = 0
+        if os.path.exists(self._snapshot_path()):
+            self._orders, generation = read_snapshot(self._snapshot_path())
+
+        replayed = 0
+        last = None
+        for journal in self._journal_generations():
+            path = self._journal_path(journal)
+            if journal < generation:
+                # Left behind by a compaction interrupted before deleting it
+                os.remove(path)
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            rows, end = decode_records(data)
+            add_row = self._orders.add_row
+            for row in rows:
+                add_row(*row)
+            replayed += len(rows)
+            if end < len(data):
+                logger.warning("Truncating torn journal record", path=path)
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+            last = journal
+
+        logger.info(
+            "Order journal loaded",
+            orders=len(self._orders),
+            replayed=replayed,
+            duration_ms=round((time.perf_counter() - started) * 1e3, 1),
+        )
+        # New orders are appended to the last journal, if any
+        return (generation if last is None else last), replayed
+
+    def _load_store_id(self) -> str:
+        """Return the id kept in the directory, creating it on first use."""
+        path = os.path.join(self.directory, STORE_ID_NAME)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            with open(path) as f:
+                return f.read().strip()
+        store_id = uuid4().hex
+        with os.fdopen(fd, "w") as f:
+            f.write(store_id)
+        return store_id
+
+    def _compact_periodically(self) -> None:
+        while not self._stop.wait(self.snapshot_interval):
+            if self._unsnapshotted < self.snapshot_min_orders:
+                continue
+            try:
+                self.compact()
+            except Exception as e:
+                logger.warning("Order snapshot failed", error=str(e))
+
+    def _journal_generations(self) -> List[int]:
+        suffixes = (
+            name.removeprefix(JOURNAL_PREFIX)
+            for name in os.listdir(self.directory)
+            if name.startswith(JOURNAL_PREFIX)
+        )
+        return sorted(int(suffix) for suffix in suffixes if suffix.isdigit())
+
+    def _journal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"{JOURNAL_PREFIX}{generation:08d}")
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_NAME)
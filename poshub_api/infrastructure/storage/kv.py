@@ -0,0 +1,206 @@
+"""This module implements small TTL key-value stores.
+
+They back the processed-message dedupe of the order processor. The in-memory
+store is a bounded LRU for a single process; the SQLite store is a local
+stand-in for a shared store such as DynamoDB and survives process restarts.
+"""
+
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+
+class KeyValueStore(ABC):
+    """Key-value store whose entries expire after a TTL."""
+
+    # Whether calls may wait on I/O or on a lock shared with other processes,
+    # in which case async callers call the store off the loop
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the value of the key, or None if absent or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Store the value, replacing any previous one."""
+
+    @abstractmethod
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Store the value only if the key is absent; return whether it was stored."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove the key."""
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed.
+
+        Nothing to do for stores that drop expired entries on their own.
+        """
+        return 0
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+
+class MemoryKeyValueStore(KeyValueStore):
+    """Bounded LRU with per-entry expiry, local to the process."""
+
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        default_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the store.
+
+        Args:
+            max_entries: Entries kept before the least recently used is evicted.
+            default_ttl: TTL of entries stored without one; None never expires.
+            clock: Monotonic clock, injectable for tests.
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the value of the key, or None if absent or expired."""
+        with self._lock:
+            return self._get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Store the value, replacing any previous one."""
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Store the value only if the key is absent; return whether it was stored."""
+        with self._lock:
+            if self._get(key) is not None:
+                return False
+            self._set(key, value, ttl)
+            return True
+
+    def delete(self, key: str) -> None:
+        """Remove the key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: bytes, ttl: Optional[float]) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = float("inf") if ttl is None else self._clock() + ttl
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class SQLiteKeyValueStore(KeyValueStore):
+    """SQLite-backed store, shared by every process using the same file."""
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: str,
+        default_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Initialize the store, creating the database file if needed.
+
+        Args:
+            path: Path of the SQLite database file.
+            default_ttl: TTL of entries stored without one; None never expires.
+            clock: Wall clock, shared across processes.
+        """
+        self.path = path
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._local = threading.local()
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS kv_expires_at ON kv(expires_at)")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the value of the key, or None if absent or expired."""
+        row = (
+            self._connection()
+            .execute(
+                "SELECT value FROM kv WHERE key = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (key, self._clock()),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Store the value, replacing any previous one."""
+        with self._connection() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, self._expires_at(ttl)),
+            )
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Store the value only if the key is absent; return whether it was stored."""
+        with self._connection() as db:
+            db.execute(
+                "DELETE FROM kv WHERE key = ? AND expires_at <= ?",
+                (key, self._clock()),
+            )
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, self._expires_at(ttl)),
+            )
+            return cursor.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        """Remove the key."""
+        with self._connection() as db:
+            db.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed."""
+        with self._connection() as db:
+            cursor = db.execute(
+                "DELETE FROM kv WHERE expires_at <= ?", (self._clock(),)
+            )
+            return cursor.rowcount
+
+    def _expires_at(self, ttl: Optional[float]) -> Optional[float]:
+        ttl = self.default_ttl if ttl is None else ttl
+        return None if ttl is None else self._clock() + ttl
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
@@ -0,0 +1,34 @@
+"""This module implements the default in-memory order store."""
+
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from poshub_api.domain.models import OrderOut
+from poshub_api.infrastructure.storage.base import OrderStore
+
+
+class DictOrderStore(OrderStore):
+    """Keeps one ``OrderOut`` object per order in a dict."""
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self._orders: List[OrderOut] = []
+        self._rows: Dict[UUID, int] = {}
+
+    def add(self, order: OrderOut) -> int:
+        """Store the order and return its row number."""
+        row = len(self._orders)
+        self._orders.append(order)
+        self._rows[order.order_id] = row
+        return row
+
+    def at(self, row: int) -> OrderOut:
+        """Return the order stored at the row."""
+        return self._orders[row]
+
+    def row_of(self, order_id: UUID) -> Optional[int]:
+        """Return the row of the order, or None if it is not stored."""
+        return self._rows.get(order_id)
+
+    def __len__(self) -> int:
+        return len(self._orders)
@@ -0,0 +1,190 @@
+"""This module implements the SQLite order store shared by worker processes.
+
+Every uvicorn worker opens the same database file, so an order created by
+one worker is visible to all of them. The database runs in WAL mode, where
+readers never wait for each other or for the writer, and each thread has its
+own connection, so the read path takes no Python lock. Rows are numbered by
+the SQLite rowid, which stays dense since orders are never deleted, and
+order ids are looked up through a unique index. Batches of orders are
+written in a single transaction.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Sequence
+from uuid import UUID, uuid4
+
+from poshub_api.domain.models import OrderOut
+from poshub_api.infrastructure.storage.base import OrderStore
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# SQLite accepts at most 999 bound parameters per statement in older builds
+MAX_PARAMETERS = 999
+
+COLUMNS = "order_id, created_at, customer_name, total_amount, currency, created_by"
+
+
+class SQLiteOrderStore(OrderStore):
+    """Stores orders in a SQLite database shared by every process using it."""
+
+    blocking = True
+
+    def __init__(self, path: str, busy_timeout: float = 30.0):
+        """Initialize the store, creating the database file if needed.
+
+        Args:
+            path: Path of the SQLite database file.
+            busy_timeout: Seconds a write waits for the writer lock of
+                another process.
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS orders ("
+            "row INTEGER PRIMARY KEY, order_id BLOB NOT NULL UNIQUE, "
+            "created_at INTEGER NOT NULL, customer_name TEXT NOT NULL, "
+            "total_amount REAL NOT NULL, currency TEXT NOT NULL, created_by TEXT)"
+        )
+        db = self._connection()
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        # Kept in the database, so every worker sharing it has the same id
+        db.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES ('store_id', ?)",
+            (uuid4().hex,),
+        )
+        (self._store_id,) = db.execute(
+            "SELECT value FROM meta WHERE key = 'store_id'"
+        ).fetchone()
+
+    def add(self, order: OrderOut) -> int:
+        """Store the order and return its row number."""
+        cursor = self._connection().execute(
+            f"INSERT INTO orders ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+            _to_row(order),
+        )
+        return cursor.lastrowid - 1
+
+    def add_many(self, orders: Sequence[OrderOut]) -> List[int]:
+        """Store the orders in one transaction and return their row numbers."""
+        db = self._connection()
+        # Taken up front so no other process can insert between our rows
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            (start,) = db.execute("SELECT COALESCE(MAX(row), 0) FROM orders").fetchone()
+            db.executemany(
+                f"INSERT INTO orders (row, {COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((start + i + 1, *_to_row(order)) for i, order in enumerate(orders)),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return list(range(start, start + len(orders)))
+
+    def at(self, row: int) -> OrderOut:
+        """Return the order stored at the row."""
+        found = (
+            self._connection()
+            .execute(f"SELECT {COLUMNS} FROM orders WHERE row = ?", (row + 1,))
+            .fetchone()
+        )
+        if found is None:
+            raise IndexError(row)
+        return _from_row(found)
+
+    def at_many(self, rows: Sequence[int]) -> List[OrderOut]:
+        """Return the orders stored at the rows, in the same order."""
+        found = {}
+        db = self._connection()
+        for start in range(0, len(rows), MAX_PARAMETERS):
+            end = start + MAX_PARAMETERS
+            chunk = rows[start:end]
+            placeholders = ",".join("?" * len(chunk))
+            for values in db.execute(
+                f"SELECT row, {COLUMNS} FROM orders WHERE row IN ({placeholders})",
+                [row + 1 for row in chunk],
+            ):
+                found[values[0] - 1] = _from_row(values[1:])
+        return [found[row] for row in rows]
+
+    def rows(self, start: int, stop: Optional[int] = None) -> Iterator[OrderOut]:
+        """Yield the orders from row ``start`` up to ``stop``, in row order."""
+        query = f"SELECT {COLUMNS} FROM orders WHERE row > ?"
+        params = [start]
+        if stop is not None:
+            query += " AND row <= ?"
+            params.append(stop)
+        for values in self._connection().execute(query + " ORDER BY row", params):
+            yield _from_row(values)
+
+    def row_of(self, order_id: UUID) -> Optional[int]:
+        """Return the row of the order, or None if it is not stored."""
+        found = (
+            self._connection()
+            .execute("SELECT row FROM orders WHERE order_id = ?", (order_id.bytes,))
+            .fetchone()
+        )
+        return found[0] - 1 if found else None
+
+    def __getitem__(self, order_id: UUID) -> OrderOut:
+        found = (
+            self._connection()
+            .execute(
+                f"SELECT {COLUMNS} FROM orders WHERE order_id = ?", (order_id.bytes,)
+            )
+            .fetchone()
+        )
+        if found is None:
+            raise KeyError(order_id)
+        return _from_row(found)
+
+    def __len__(self) -> int:
+        return (
+            self._connection()
+            .execute("SELECT COALESCE(MAX(row), 0) FROM orders")
+            .fetchone()[0]
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            # Commits append to the WAL without an fsync; a power loss may
+            # lose the last transactions but never corrupts the database
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+
+def _to_row(order: OrderOut) -> tuple:
+    created_at = order.created_at
+    if created_at.tzinfo is not None:
+        created_at = created_at.replace(tzinfo=None) - created_at.utcoffset()
+    return (
+        order.order_id.bytes,
+        (created_at - EPOCH) // MICROSECOND,
+        order.customer_name,
+        order.total_amount,
+        order.currency,
+        order.created_by,
+    )
+
+
+def _from_row(values: tuple) -> OrderOut:
+    order_id, created_at, customer_name, total_amount, currency, created_by = values
+    return OrderOut.trusted(
+        order_id=UUID(bytes=order_id),
+        created_at=EPOCH + created_at * MICROSECOND,
+        customer_name=customer_name,
+        total_amount=total_amount,
+        currency=currency,
+        created_by=created_by,
+    )
@@ -1,27 +1,65 @@
 """The main entry point for the poshub API."""
 
+import asyncio
+import json
+import os
 from contextlib import asynccontextmanager
-from typing import Dict
+from pathlib import Path
+from typing import Dict, List, Optional
 
-import httpx
 import structlog
 from fastapi import FastAPI, status
 from fastapi.openapi.utils import get_openapi
 from mangum import Mangum
 from starlette.responses import JSONResponse
 
-from poshub_api.api.routers import basics, externals, orders
+from poshub_api.api.lazy import LazyRouter
+from poshub_api.api.responses import FastJSONResponse
+from poshub_api.api.routers import basics, exports, metrics, orders
+from poshub_api.infrastructure.aws.clients import get_client
+from poshub_api.infrastructure.aws.parameters import (
+    configured_parameter_names,
+    get_parameter_provider,
+)
+from poshub_api.shared.admission import AdmissionMiddleware, AdmissionSettings
+from poshub_api.shared.compression import (
+    CompressionMiddleware,
+    CompressionSettings,
+    base64_body,
+)
+from poshub_api.shared.dependencies import (
+    close_http_client,
+    ensure_http_client,
+    get_order_service,
+)
 from poshub_api.shared.exception_handler import (
     auth_exception_handler,
     scope_exception_handler,
 )
 from poshub_api.shared.exceptions import AuthError, ScopeError
-from poshub_api.shared.logging import configure_logging
+from poshub_api.shared.logging import configure_logging, flush_logging
 from poshub_api.shared.middleware import correlation_id_middleware
+from poshub_api.shared.security import get_jwt_settings
+from poshub_api.shared.warmup import WarmupTask, is_warmup_event, warm_up
 
 # Configure logger early to catch all logs
 logger = structlog.get_logger(__name__)
 
+# Checked-in OpenAPI document, served as-is in cold-start mode
+OPENAPI_PATH = Path(__file__).resolve().parent.parent / "openapi" / "poshub_v1.json"
+
+
+def cold_start_mode() -> bool:
+    """Return whether the app is built for fast Lambda cold starts.
+
+    Set COLD_START_MODE to force it on or off; it defaults to on when running
+    inside Lambda.
+    """
+    value = os.getenv("COLD_START_MODE")
+    if value is None:
+        return "AWS_LAMBDA_FUNCTION_NAME" in os.environ
+    return value.lower() in ("1", "true", "yes")
+
 
 def custom_openapi(app: FastAPI) -> Dict:
     """Generate custom OpenAPI schema with security requirements.
@@ -40,6 +78,14 @@ def custom_openapi(app: FastAPI) -> Dict:
             routes=app.routes,
             servers=[
                 {"url": "http://localhost:8000", "description": "Local development"},
+                {
+                    "url": "https://api.staging.poshub.com",
+                    "description": "Staging environment (Not Running)",
+                },
+                {
+                    "url": "https://api.poshub.com",
+                    "description": "Production environment (Not Running)",
+                },
             ],
         )
 
@@ -62,10 +108,51 @@ def custom_openapi(app: FastAPI) -> Dict:
         raise
 
 
-def configure_routes(app: FastAPI) -> None:
+def load_openapi(app: FastAPI) -> Dict:
+    """Return the checked-in OpenAPI schema instead of generating it.
+
+    Falls back to generating the schema if the file is missing. The file is
+    written by ``export_openapi``, and a test checks it is up to date.
+    """
+    if app.openapi_schema:
+        return app.openapi_schema
+    try:
+        app.openapi_schema = json.loads(OPENAPI_PATH.read_text())
+    except FileNotFoundError:
+        logger.warning("OpenAPI file not found", path=str(OPENAPI_PATH))
+        return custom_openapi(app)
+    return app.openapi_schema
+
+
+def export_openapi(path: Path = OPENAPI_PATH) -> None:
+    """Write the OpenAPI schema of the fully loaded app to the file."""
+    schema = custom_openapi(create_app(cold_start=False))
+    path.write_text(json.dumps(schema, indent=2, ensure_ascii=False) + "\n")
+
+
+def configure_routes(app: FastAPI, lazy: bool = False) -> None:
     app.include_router(basics.router)
+    app.include_router(metrics.router)
+    app.include_router(exports.router)
     app.include_router(orders.router)
-    app.include_router(externals.router)
+    if lazy:
+        # Optional routers are only imported when first requested
+        app.router.routes.extend(
+            [
+                LazyRouter(
+                    "poshub_api.api.routers.externals:router", ["/external-demo"]
+                ),
+                LazyRouter(
+                    "poshub_api.api.routers.debug:router",
+                    ["/debug/ssm", "/debug/http"],
+                ),
+            ]
+        )
+    else:
+        from poshub_api.api.routers import debug, externals
+
+        app.include_router(externals.router)
+        app.include_router(debug.router)
 
 
 def configure_exception_handlers(app: FastAPI) -> None:
@@ -96,35 +183,99 @@ async def lifespan(app: FastAPI):
     """
     logger.info("Application startup - initializing resources")
 
-    # Initialize HTTP client
-    app.state.http = httpx.AsyncClient(timeout=30.0)
-    logger.info("HTTP client initialized")
+    # Initialize HTTP client, or leave it to the first request that needs it
+    if not app.state.cold_start:
+        ensure_http_client(app)
+        logger.info("HTTP client initialized")
+
+    # Batch-load SSM parameters so the first requests hit a warm cache
+    names = configured_parameter_names()
+    if names:
+        try:
+            await asyncio.to_thread(get_parameter_provider().preload, names)
+        except Exception as e:
+            logger.warning("Failed to preload SSM parameters", error=str(e))
 
     try:
         yield
     finally:
         logger.info("Application shutdown - cleaning up resources")
-        await app.state.http.aclose()
-        logger.info("HTTP client closed")
+        await orders.sqs_outbox.stop()
+        logger.info("SQS outbox flushed")
+        # Lambda may freeze the process before the journal commits
+        await asyncio.to_thread(get_order_service().orders.flush)
+        # Mangum runs the lifespan around every invocation, on the same event
+        # loop: a client created on demand is kept for the next invocations
+        if not app.state.cold_start and await close_http_client(app):
+            logger.info("HTTP client closed")
+        # Lambda may freeze the process once the response is returned
+        flush_logging()
+
 
+def create_app(cold_start: Optional[bool] = None) -> FastAPI:
+    """Create and configure the FastAPI application.
 
-def create_app() -> FastAPI:
-    """Create and configure the FastAPI application."""
+    Args:
+        cold_start: Build for cold starts; defaults to ``cold_start_mode()``.
+    """
     configure_logging()
-    app = FastAPI(lifespan=lifespan)
+    if cold_start is None:
+        cold_start = cold_start_mode()
+    app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+    app.state.cold_start = cold_start
 
     # Configure components
     app.middleware("http")(correlation_id_middleware)
-    configure_routes(app)
+    # Outermost, so the correlation and timing headers are set on the response
+    if CompressionSettings().compression_enabled:
+        app.add_middleware(CompressionMiddleware)
+    # Outermost, so shed requests cost as little as possible
+    admission = AdmissionSettings()
+    enabled = admission.admission_enabled
+    if enabled if enabled is not None else not cold_start:
+        app.add_middleware(AdmissionMiddleware, settings=admission)
+    configure_routes(app, lazy=cold_start)
     configure_exception_handlers(app)
 
     # Configure openapi
-    custom_openapi(app)
+    if cold_start:
+        app.openapi = lambda: load_openapi(app)
+    else:
+        custom_openapi(app)
 
     return app
 
 
+def warmup_tasks(app: FastAPI) -> List[WarmupTask]:
+    """Return what a warm-up invocation of ``handler`` loads."""
+    tasks = [
+        WarmupTask(
+            "ssm_parameters",
+            lambda: get_parameter_provider().preload(configured_parameter_names()),
+        ),
+        WarmupTask("sqs_client", lambda: get_client("sqs")),
+        WarmupTask("http_client", lambda: ensure_http_client(app)),
+    ]
+    if os.getenv("JWT_SECRET_PARAM"):
+        tasks.append(WarmupTask("jwt_settings", get_jwt_settings, "ssm_parameters"))
+    if os.getenv("QUEUE_URL_PARAM"):
+        tasks.append(WarmupTask("queue_url", orders.get_queue_url, "ssm_parameters"))
+    return tasks
+
+
 # Create application
 app: FastAPI = create_app()
 
-handler = Mangum(app)
+mangum_handler = Mangum(app)
+
+
+def handler(event, context):
+    """Lambda entry point; keep-warm pings are answered before ASGI dispatch."""
+    if is_warmup_event(event):
+        return warm_up(warmup_tasks(app))
+    return base64_body(mangum_handler(event, context))
+
+
+if __name__ == "__main__":
+    # python -m poshub_api.main regenerates openapi/poshub_v1.json
+    export_openapi()
@@ -0,0 +1,237 @@
+"""This module implements ``Idempotency-Key`` handling for order creation.
+
+The response of a request carrying an ``Idempotency-Key`` is stored under the
+key, scoped by caller, in a TTL key-value store: the in-memory LRU for one
+process or the SQLite store shared by every worker using the same file. A
+retry with the same key gets the stored response back without the order
+being created or published again. While the first request is in progress
+the key holds a pending marker, and concurrent requests with the same key
+wait for its outcome instead of creating a second order. Calls to a blocking
+store, such as the SQLite one waiting on another worker's lock, run in a
+worker thread so they never stall the event loop.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import structlog
+from pydantic.v1 import BaseSettings
+
+from poshub_api.infrastructure.storage.kv import (
+    KeyValueStore,
+    MemoryKeyValueStore,
+    SQLiteKeyValueStore,
+)
+from poshub_api.shared.exceptions import IdempotencyConflictError
+
+logger = structlog.get_logger(__name__)
+
+# Status code stored while the first request with a key is in progress
+PENDING = 0
+
+T = TypeVar("T")
+
+
+class IdempotencySettings(BaseSettings):
+    """Idempotency-Key store settings."""
+
+    idempotency_store: str = "memory"
+    idempotency_ttl_seconds: float = 24 * 3600.0
+    idempotency_max_entries: int = 100_000
+    idempotency_lock_timeout_seconds: float = 30.0
+
+    class Config:
+        env_file = ".env"
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    """The response stored under a key, with the digest of its request."""
+
+    status_code: int
+    body: bytes
+    fingerprint: str
+
+    def encode(self) -> bytes:
+        return b"%s\n%d\n%s" % (self.fingerprint.encode(), self.status_code, self.body)
+
+    @classmethod
+    def decode(cls, value: bytes) -> "StoredResponse":
+        fingerprint, status_code, body = value.split(b"\n", 2)
+        return cls(int(status_code), body, fingerprint.decode())
+
+
+def request_fingerprint(body: bytes) -> str:
+    """Return the digest identifying the request sent with a key."""
+    return hashlib.sha256(body).hexdigest()
+
+
+Handler = Callable[[], Awaitable[Tuple[int, bytes]]]
+
+
+class IdempotencyCache:
+    """Stores responses per key and serializes requests sharing a key."""
+
+    def __init__(
+        self,
+        store: KeyValueStore,
+        ttl: Optional[float] = None,
+        lock_timeout: Optional[float] = None,
+        poll_interval: float = 0.05,
+    ):
+        """Initialize the cache.
+
+        Args:
+            store: Store of the responses and pending markers.
+            ttl: Seconds a response is replayed for its key.
+            lock_timeout: Seconds a pending marker is honoured, after which a
+                request whose first attempt crashed can be retried.
+            poll_interval: Seconds between checks of a key pending in another
+                process.
+        """
+        settings = IdempotencySettings()
+        self.store = store
+        self.ttl = settings.idempotency_ttl_seconds if ttl is None else ttl
+        self.lock_timeout = (
+            settings.idempotency_lock_timeout_seconds
+            if lock_timeout is None
+            else lock_timeout
+        )
+        self.poll_interval = poll_interval
+        # In-progress requests of this process, tied to the loop running them
+        self._flights: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = {}
+        self.replayed = 0
+
+    async def run(
+        self, key: str, fingerprint: str, handler: Handler
+    ) -> Tuple[StoredResponse, bool]:
+        """Return the response of the key, calling ``handler`` once per key.
+
+        ``handler`` returns the status code and body of the response, which
+        is stored when successful. Returns the response and whether it was
+        replayed. Raises ``IdempotencyConflictError`` when the key was used
+        with a different request, or is still pending past the lock timeout.
+        """
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            stored = await self._get(key)
+            if stored is not None and stored.status_code != PENDING:
+                if stored.fingerprint != fingerprint:
+                    raise IdempotencyConflictError(
+                        "Idempotency-Key already used with a different request"
+                    )
+                self.replayed += 1
+                return stored, True
+
+            loop = asyncio.get_running_loop()
+            flight = self._flights.get(key)
+            if flight is not None and flight[0] is loop:
+                await flight[1].wait()
+                continue
+
+            pending = StoredResponse(PENDING, b"", fingerprint).encode()
+            if stored is None and await self._call(
+                self.store.add, key, pending, self.lock_timeout
+            ):
+                return await self._lead(key, fingerprint, handler, loop), False
+
+            # Pending in another process, or on another loop of this one
+            if time.monotonic() >= deadline:
+                raise IdempotencyConflictError(
+                    "A request with this Idempotency-Key is still in progress"
+                )
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the replay counter and the in-progress requests."""
+        return {"replayed": self.replayed, "in_flight": len(self._flights)}
+
+    async def _lead(
+        self,
+        key: str,
+        fingerprint: str,
+        handler: Handler,
+        loop: asyncio.AbstractEventLoop,
+    ) -> StoredResponse:
+        done = asyncio.Event()
+        self._flights[key] = (loop, done)
+        try:
+            status_code, body = await handler()
+        except BaseException:
+            # Not stored: the client may retry with the same key
+            await self._delete(key)
+            raise
+        else:
+            response = StoredResponse(status_code, body, fingerprint)
+            if 200 <= status_code < 300:
+                await self._set(key, response)
+            else:
+                await self._delete(key)
+            return response
+        finally:
+            if self._flights.get(key, (None, None))[1] is done:
+                del self._flights[key]
+            done.set()
+
+    async def _call(self, function: Callable[..., T], *args: Any) -> T:
+        # Same as call_service in the orders router, for the key-value store
+        if self.store.blocking:
+            return await asyncio.to_thread(function, *args)
+        return function(*args)
+
+    async def _get(self, key: str) -> Optional[StoredResponse]:
+        value = await self._call(self.store.get, key)
+        return StoredResponse.decode(value) if value is not None else None
+
+    async def _set(self, key: str, response: StoredResponse) -> None:
+        try:
+            await self._call(self.store.set, key, response.encode(), self.ttl)
+        except Exception:
+            # The order exists either way; a retry would just create another
+            logger.warning("Failed to store idempotent response", key=key)
+            await self._delete(key)
+
+    async def _delete(self, key: str) -> None:
+        try:
+            await self._call(self.store.delete, key)
+        except Exception:
+            logger.warning("Failed to release Idempotency-Key", key=key)
+
+
+def create_idempotency_store(
+    settings: Optional[IdempotencySettings] = None,
+) -> Optional[KeyValueStore]:
+    """Return the store selected by IDEMPOTENCY_STORE.
+
+    ``memory`` (default) keeps an in-process LRU, ``none`` disables
+    Idempotency-Key handling and any other value is used as the path of a
+    SQLite database.
+    """
+    settings = settings or IdempotencySettings()
+    backend = settings.idempotency_store
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryKeyValueStore(max_entries=settings.idempotency_max_entries)
+    return SQLiteKeyValueStore(backend)
+
+
+_cache: Optional[IdempotencyCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_idempotency_cache() -> Optional[IdempotencyCache]:
+    """Return the process-wide cache, or None when disabled."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                store = create_idempotency_store()
+                if store is None:
+                    return None
+                _cache = IdempotencyCache(store)
+    return _cache
@@ -0,0 +1,209 @@
+"""This module implements the change feed of the created orders.
+
+Every order stored by the Order service is published to the feed with its
+row number as sequence number, and kept in a bounded ring buffer of the
+latest orders. A subscriber receives the orders matching its filters, as
+server-sent events serialized once per order whatever the number of
+subscribers. A subscriber reconnecting with the last sequence number it
+received first gets the orders it missed from the ring buffer, or a
+``reset`` event when they are no longer there.
+
+Each subscriber has a bounded queue: one that does not keep up is sent a
+``dropped`` event and disconnected rather than buffered without limit, and
+resumes from its last sequence number once it reconnects.
+
+The feed is per process: with several workers, a subscriber only receives
+the orders created by the worker it is connected to.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from typing import AsyncIterator, Deque, List, Optional, Sequence, Set, Tuple
+
+import structlog
+from pydantic.v1 import BaseSettings
+
+from poshub_api.domain.models import OrderFilter, OrderOut
+from poshub_api.services.order_index import to_micros
+
+logger = structlog.get_logger(__name__)
+
+# Sent instead of the missed orders when they left the ring buffer
+RESET_EVENT = b'event: reset\ndata: {"reason":"history unavailable"}\n\n'
+# Last event of a subscriber disconnected for not keeping up
+DROPPED_EVENT = b'event: dropped\ndata: {"reason":"slow consumer"}\n\n'
+HEARTBEAT = b": heartbeat\n\n"
+
+
+class OrderFeedSettings(BaseSettings):
+    """Order change feed settings."""
+
+    order_feed_buffer_size: int = 10_000
+    order_feed_subscriber_queue_size: int = 1_000
+    order_feed_heartbeat_seconds: float = 15.0
+
+    class Config:
+        env_file = ".env"
+
+
+def sse_event(sequence: int, order: OrderOut) -> bytes:
+    """Return the server-sent event of an order."""
+    return b"id: %d\nevent: order\ndata: %s\n\n" % (sequence, order.to_json())
+
+
+def matches(order: OrderOut, filters: OrderFilter) -> bool:
+    """Return whether the order matches the filters of the order listing."""
+    if filters.created_by is not None and order.created_by != filters.created_by:
+        return False
+    if filters.currency is not None and order.currency != filters.currency:
+        return False
+    if filters.min_amount is not None and order.total_amount < filters.min_amount:
+        return False
+    if filters.max_amount is not None and order.total_amount > filters.max_amount:
+        return False
+    if filters.created_from is not None or filters.created_to is not None:
+        created_at = to_micros(order.created_at)
+        if filters.created_from is not None and created_at < to_micros(
+            filters.created_from
+        ):
+            return False
+        if filters.created_to is not None and created_at > to_micros(
+            filters.created_to
+        ):
+            return False
+    return True
+
+
+class _Subscriber:
+    """The queue of events of one subscriber, bound to its event loop."""
+
+    def __init__(self, filters: OrderFilter, max_size: int):
+        self.filters = filters
+        self.max_size = max_size
+        self.events: Deque[bytes] = deque()
+        self.dropped = False
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+
+    def push(self, event: bytes) -> bool:
+        """Queue an event; return False if the subscriber is too far behind."""
+        if self._loop.is_closed():
+            # Abandoned without its generator being closed
+            return False
+        if len(self.events) >= self.max_size:
+            self.dropped = True
+            self._wake()
+            return False
+        self.events.append(event)
+        self._wake()
+        return True
+
+    def _wake(self) -> None:
+        # Orders may be created outside the event loop of the subscriber
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._ready.set()
+        else:
+            self._loop.call_soon_threadsafe(self._ready.set)
+
+    async def wait(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._ready.clear()
+
+
+class OrderFeed:
+    """Publishes the created orders to their subscribers."""
+
+    def __init__(self, settings: Optional[OrderFeedSettings] = None):
+        settings = settings or OrderFeedSettings()
+        # Orders are only serialized once a subscriber needs them
+        self._buffer: Deque[Tuple[int, OrderOut]] = deque(
+            maxlen=settings.order_feed_buffer_size
+        )
+        self._queue_size = settings.order_feed_subscriber_queue_size
+        self._heartbeat = settings.order_feed_heartbeat_seconds
+        self._subscribers: Set[_Subscriber] = set()
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, sequences: Sequence[int], orders: Sequence[OrderOut]) -> None:
+        """Publish stored orders with their sequence numbers, in order."""
+        with self._lock:
+            self._buffer.extend(zip(sequences, orders))
+            if not self._subscribers:
+                return
+            for sequence, order in zip(sequences, orders):
+                event = None
+                for subscriber in list(self._subscribers):
+                    if not matches(order, subscriber.filters):
+                        continue
+                    event = event or sse_event(sequence, order)
+                    if not subscriber.push(event):
+                        self._subscribers.discard(subscriber)
+                        self.dropped += 1
+                        logger.warning(
+                            "Slow order feed subscriber dropped",
+                            queued=len(subscriber.events),
+                        )
+
+    def _subscribe(
+        self, filters: OrderFilter, last_sequence: Optional[int], head: int
+    ) -> Tuple[_Subscriber, List[bytes]]:
+        """Register a subscriber and return the events it missed."""
+        subscriber = _Subscriber(filters, self._queue_size)
+        with self._lock:
+            missed: List[bytes] = []
+            if last_sequence is not None:
+                if self._buffer:
+                    oldest = self._buffer[0][0]
+                    head = max(head, self._buffer[-1][0] + 1)
+                else:
+                    oldest = head
+                # Ahead of this process, e.g. after a restart, or too far behind
+                if last_sequence >= head or last_sequence + 1 < oldest:
+                    missed.append(RESET_EVENT)
+                else:
+                    missed.extend(
+                        sse_event(sequence, order)
+                        for sequence, order in self._buffer
+                        if sequence > last_sequence and matches(order, filters)
+                    )
+            self._subscribers.add(subscriber)
+        return subscriber, missed
+
+    async def subscribe(
+        self, filters: OrderFilter, last_sequence: Optional[int] = None, head: int = 0
+    ) -> AsyncIterator[bytes]:
+        """Yield the server-sent events of the matching orders as they come.
+
+        Starts with the orders after ``last_sequence`` when given, ``head``
+        being the sequence number of the next order, and sends a heartbeat
+        comment when there is nothing to send for a while.
+        """
+        subscriber, missed = self._subscribe(filters, last_sequence, head)
+        try:
+            for event in missed:
+                yield event
+            while True:
+                while subscriber.events:
+                    yield subscriber.events.popleft()
+                if subscriber.dropped:
+                    yield DROPPED_EVENT
+                    return
+                await subscriber.wait(self._heartbeat)
+                if not subscriber.events and not subscriber.dropped:
+                    yield HEARTBEAT
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
@@ -0,0 +1,296 @@
+"""This module implements the secondary indexes of the Order service.
+
+Rows are identified by their insertion number in the order store, and
+posting lists are typed arrays of row numbers rather than lists of ints. The time index keeps rows
+sorted by ``(created_at, row)``, which is also the keyset used by cursors;
+the ``created_by`` and ``currency`` hash indexes keep per-value posting lists
+in the same order, and the amount index keeps rows sorted by amount. A scan
+starts from the most selective index, seeks to the cursor with a binary search
+and walks forward lazily, so a page read stops as soon as the page is full.
+
+Writers hold the lock of the index around ``add``. Scans copy the rows they
+read under the same lock, a bounded batch at a time, and resume each batch
+from the key of the last row rather than from a position, so an insert
+while a scan is suspended neither breaks nor shifts it.
+"""
+
+import base64
+import binascii
+import heapq
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from poshub_api.domain.models import OrderFilter, OrderOut
+from poshub_api.shared.exceptions import InvalidCursorError
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Keyset position: (created_at in epoch microseconds, row)
+Key = Tuple[int, int]
+
+# Rows copied from an index per lock acquisition while scanning
+SCAN_BATCH_SIZE = 1_000
+
+
+def to_micros(value: datetime) -> int:
+    """Return a naive-UTC or aware datetime as epoch microseconds."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // MICROSECOND
+
+
+def encode_cursor(key: Key) -> str:
+    """Encode a keyset position as an opaque cursor."""
+    raw = f"{key[0]}:{key[1]}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Key:
+    """Decode a cursor produced by ``encode_cursor``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        micros, row = raw.split(":")
+        return int(micros), int(row)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise InvalidCursorError(f"Invalid cursor: {cursor}")
+
+
+def _rows() -> array:
+    """Return an empty posting list of row numbers."""
+    return array("q")
+
+
+class _SortedRows:
+    """Rows sorted by a key, stored as bounded chunks so inserts stay cheap.
+
+    A single sorted array would need an O(n) memmove for every out-of-order
+    insert; chunks cap that cost at the chunk size.
+    """
+
+    CHUNK_SIZE = 1_000
+
+    def __init__(self, key: Callable[[int], tuple]):
+        self._key = key
+        self._chunks: List[array] = []
+        self._maxes: List[tuple] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, row: int) -> None:
+        key = self._key(row)
+        self._len += 1
+        if not self._chunks:
+            self._chunks.append(array("q", [row]))
+            self._maxes.append(key)
+            return
+
+        i = bisect_left(self._maxes, key)
+        if i == len(self._chunks):
+            i -= 1
+            self._chunks[i].append(row)
+            self._maxes[i] = key
+        else:
+            insort(self._chunks[i], row, key=self._key)
+
+        chunk = self._chunks[i]
+        if len(chunk) > 2 * self.CHUNK_SIZE:
+            split = self.CHUNK_SIZE
+            self._chunks[i] = chunk[:split]
+            self._chunks.insert(i + 1, chunk[split:])
+            self._maxes.insert(i, self._key(chunk[split - 1]))
+
+    def _bounds(self, lo: tuple, hi: tuple) -> List[Tuple[int, int, int]]:
+        # (chunk, start, end) of each run of rows with lo <= key <= hi
+        start = bisect_left(self._maxes, lo)
+        end = bisect_right(self._maxes, hi)
+        if start >= len(self._chunks):
+            return []
+        start_at = bisect_left(self._chunks[start], lo, key=self._key)
+        if end < len(self._chunks):
+            end_at = bisect_right(self._chunks[end], hi, key=self._key)
+        else:
+            end, end_at = len(self._chunks) - 1, len(self._chunks[-1])
+
+        bounds = []
+        for i in range(start, end + 1):
+            lo_at = start_at if i == start else 0
+            hi_at = end_at if i == end else len(self._chunks[i])
+            bounds.append((i, lo_at, hi_at))
+        return bounds
+
+    def count(self, lo: tuple, hi: tuple) -> int:
+        """Return the number of rows with ``lo <= key <= hi``."""
+        return sum(hi_at - lo_at for _, lo_at, hi_at in self._bounds(lo, hi))
+
+    def range(self, lo: tuple, hi: tuple) -> List[array]:
+        """Return copies of the runs of rows with ``lo <= key <= hi``.
+
+        Copies, since inserts shift and split the chunks.
+        """
+        return [
+            self._chunks[i][lo_at:hi_at] for i, lo_at, hi_at in self._bounds(lo, hi)
+        ]
+
+
+@dataclass
+class IndexPage:
+    """Rows of one page and the cursor of the next one."""
+
+    rows: List[int]
+    next_key: Optional[Key]
+
+
+class OrderIndex:
+    """Time, hash and amount indexes over the stored orders."""
+
+    def __init__(self, lock: Optional[threading.Lock] = None):
+        """Initialize empty indexes.
+
+        Args:
+            lock: Lock held by the writers around ``add``; scans take it to
+                copy the rows they read.
+        """
+        self._lock = lock if lock is not None else threading.Lock()
+        self._created_at = array("q")
+        self._amounts = array("d")
+        self._created_by: List[Optional[str]] = []
+        self._currency: List[str] = []
+        self._by_time = _rows()
+        self._by_created_by: Dict[Optional[str], array] = defaultdict(_rows)
+        self._by_currency: Dict[str, array] = defaultdict(_rows)
+        self._by_amount = _SortedRows(self._amount_key)
+
+    def __len__(self) -> int:
+        return len(self._created_at)
+
+    def time_key(self, row: int) -> Key:
+        """Return the keyset position of the row."""
+        return self._created_at[row], row
+
+    def _amount_key(self, row: int) -> Tuple[float, int]:
+        return self._amounts[row], row
+
+    def add(self, order: OrderOut) -> int:
+        """Index the order and return its row number."""
+        row = len(self._created_at)
+        self._created_at.append(to_micros(order.created_at))
+        self._amounts.append(order.total_amount)
+        created_by = order.created_by
+        self._created_by.append(sys.intern(created_by) if created_by else created_by)
+        self._currency.append(sys.intern(order.currency))
+
+        key = self.time_key(row)
+        self._append(self._by_time, row, key)
+        self._append(self._by_created_by[order.created_by], row, key)
+        self._append(self._by_currency[order.currency], row, key)
+        self._by_amount.add(row)
+        return row
+
+    def _append(self, rows: array, row: int, key: Key) -> None:
+        # Orders arrive in time order, so this almost never needs a search
+        if not rows or self.time_key(rows[-1]) <= key:
+            rows.append(row)
+        else:
+            insort(rows, row, key=self.time_key)
+
+    def scan(
+        self,
+        filters: OrderFilter,
+        after: Optional[Key] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[int]:
+        """Yield matching rows past ``after`` lazily, in time order.
+
+        Yields at most ``limit`` rows when given. A page may then be read from
+        the amount index, which bounds its work to the page rather than every
+        match. Without a limit, e.g. for an export, the scan always walks a
+        time-ordered index, so memory stays constant however many rows match.
+        """
+        start: Key = (-(2**63), -1)
+        if after is not None:
+            start = max(start, after)
+        if filters.created_from is not None:
+            start = max(start, (to_micros(filters.created_from), -1))
+        end = to_micros(filters.created_to) if filters.created_to else None
+
+        has_amount = filters.min_amount is not None or filters.max_amount is not None
+        with self._lock:
+            candidates = [self._by_time]
+            if filters.created_by is not None:
+                candidates.append(self._by_created_by.get(filters.created_by, _rows()))
+            if filters.currency is not None:
+                candidates.append(self._by_currency.get(filters.currency, _rows()))
+            rows = min(candidates, key=len)
+            if not rows:
+                return
+            # Orders indexed after this point are not part of this scan
+            last = self.time_key(rows[-1])
+
+            runs = None
+            if has_amount and limit is not None:
+                lo = -float("inf") if filters.min_amount is None else filters.min_amount
+                hi = float("inf") if filters.max_amount is None else filters.max_amount
+                bounds = (lo, -1), (hi, float("inf"))
+                if self._by_amount.count(*bounds) < len(rows):
+                    runs = self._by_amount.range(*bounds)
+
+        if runs is not None:
+            # In amount order: keep the earliest of the rows past the cursor,
+            # with a heap of the page size rather than a sort
+            selected = (
+                row
+                for run in runs
+                for row in run
+                if self.time_key(row) > start
+                and (end is None or self._created_at[row] <= end)
+                and self._matches(row, filters)
+            )
+            yield from heapq.nsmallest(limit, selected, key=self.time_key)
+            return
+
+        while True:
+            with self._lock:
+                i = bisect_right(rows, start, key=self.time_key)
+                stop = i + SCAN_BATCH_SIZE
+                batch = rows[i:stop]
+            if not batch:
+                return
+            for row in batch:
+                key = self.time_key(row)
+                if key > last or (end is not None and self._created_at[row] > end):
+                    return
+                if self._matches(row, filters):
+                    yield row
+            start = key
+
+    def query(
+        self, filters: OrderFilter, after: Optional[Key] = None, limit: int = 100
+    ) -> IndexPage:
+        """Return up to ``limit`` matching rows past ``after``, in time order."""
+        page = list(islice(self.scan(filters, after, limit), limit))
+        next_key = self.time_key(page[-1]) if len(page) == limit else None
+        return IndexPage(page, next_key)
+
+    def _matches(self, row: int, filters: OrderFilter) -> bool:
+        if (
+            filters.created_by is not None
+            and self._created_by[row] != filters.created_by
+        ):
+            return False
+        if filters.currency is not None and self._currency[row] != filters.currency:
+            return False
+        if filters.min_amount is not None and self._amounts[row] < filters.min_amount:
+            return False
+        if filters.max_amount is not None and self._amounts[row] > filters.max_amount:
+            return False
+        return True
@@ -1,35 +1,116 @@
 """This class represents the Order service."""
 
+import threading
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, Iterator, List, Optional
 from uuid import UUID, uuid4
 
-from poshub_api.domain.models import OrderIn, OrderOut
+from poshub_api.domain.models import OrderFilter, OrderIn, OrderOut, OrderStats
+from poshub_api.infrastructure.storage.base import OrderStore
+from poshub_api.infrastructure.storage.memory import DictOrderStore
+from poshub_api.services.order_feed import OrderFeed
+from poshub_api.services.order_index import OrderIndex, decode_cursor, encode_cursor
+from poshub_api.services.order_stats import OrderStatsAggregator
 from poshub_api.shared.exceptions import NotFoundError
+from poshub_api.shared.metrics import timed_phase
+
+
+@dataclass
+class OrderPage:
+    """One page of orders and the cursor of the next page."""
+
+    items: List[OrderOut]
+    next_cursor: Optional[str]
 
 
 class OrderService:
     """This class represents the Order service."""
 
-    def __init__(self):
-        """Initialize the Order service."""
-        self.orders = {}
+    def __init__(self, store: Optional[OrderStore] = None):
+        """Initialize the Order service.
+
+        Args:
+            store: Storage engine of the orders; defaults to ``DictOrderStore``.
+        """
+        self.orders: OrderStore = store if store is not None else DictOrderStore()
+        self._index_lock = threading.Lock()
+        # Held around every index write; scans take it to copy what they read
+        self._index = OrderIndex(self._index_lock)
+        # Maintained with the indexes, under the same lock
+        self._stats = OrderStatsAggregator()
+        self.feed = OrderFeed()
 
+    def _sync_index(self) -> None:
+        """Index the orders stored since the last call.
+
+        A store shared by several processes also holds the orders created by
+        the other workers, and a persistent store the orders it loaded, which
+        the indexes catch up with on the first listing rather than at startup.
+        """
+        if len(self.orders) == len(self._index):
+            return
+        with self._index_lock:
+            for order in self.orders.rows(len(self._index)):
+                self._index.add(order)
+                self._stats.add(order)
+
+    @timed_phase("service")
     def create_order(
         self, order_in: OrderIn, user_context: Optional[Dict] = None
     ) -> OrderOut:
         """Create a new order."""
-        order = OrderOut(
-            order=uuid4(),
+        order = self._new_order(order_in, user_context)
+        self._store([order])
+        return order
+
+    @timed_phase("service")
+    def create_orders(
+        self, orders_in: List[OrderIn], user_context: Optional[Dict] = None
+    ) -> List[OrderOut]:
+        """Create several orders in one call, written to the store as one batch."""
+        orders = [self._new_order(order_in, user_context) for order_in in orders_in]
+        self._store(orders)
+        return orders
+
+    @staticmethod
+    def _new_order(order_in: OrderIn, user_context: Optional[Dict]) -> OrderOut:
+        # Every value is either generated here or comes from a validated OrderIn
+        return OrderOut.trusted(
+            order_id=uuid4(),
             created_at=datetime.utcnow(),
-            nom_client=order_in.customer_name,
-            montant=order_in.total_amount,
-            devise=order_in.currency,
+            customer_name=order_in.customer_name,
+            total_amount=order_in.total_amount,
+            currency=order_in.currency,
             created_by=user_context.get("sub") if user_context else None,
         )
-        self.orders[order.order_id] = order
-        return order
 
+    def _store(self, orders: List[OrderOut]) -> None:
+        rows = self.orders.add_many(orders)
+        self.feed.publish(rows, orders)
+        with self._index_lock:
+            # Otherwise left to the next listing to catch up with
+            if rows and rows[0] == len(self._index):
+                for order in orders:
+                    self._index.add(order)
+                    self._stats.add(order)
+
+    @property
+    def version(self) -> str:
+        """Return the version of the order collection.
+
+        The id of the store and its number of orders: the store is
+        append-only, so the count changes with every order created, by any
+        worker sharing the store, and the id tells apart the stores of
+        processes that count from 0 on their own.
+        """
+        return f"{self.orders.store_id}-{len(self.orders)}"
+
+    def has_order(self, order_id: UUID) -> bool:
+        """Return whether the order exists, without reading it."""
+        return self.orders.row_of(order_id) is not None
+
+    @timed_phase("service")
     def get_order_by_id(self, order_id: UUID) -> OrderOut:
         """Return the order by id."""
         order = self.orders.get(order_id)
@@ -37,3 +118,73 @@ class OrderService:
             raise NotFoundError(f"Order {order_id} not found")
         else:
             return order
+
+    @timed_phase("service")
+    def list_orders(
+        self,
+        filters: Optional[OrderFilter] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> OrderPage:
+        """Return a page of orders ordered by creation time.
+
+        Raises:
+            InvalidCursorError: If the cursor was not produced by this service.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        self._sync_index()
+        page = self._index.query(filters or OrderFilter(), after=after, limit=limit)
+        return OrderPage(
+            items=self.orders.at_many(page.rows),
+            next_cursor=encode_cursor(page.next_key) if page.next_key else None,
+        )
+
+    @timed_phase("service")
+    def order_stats(
+        self,
+        granularity: str = "hour",
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        currency: Optional[str] = None,
+    ) -> OrderStats:
+        """Return the order statistics, from aggregates kept up to date on insert.
+
+        Only the orders not indexed yet, created by other workers or loaded
+        from a persistent store, are read to catch up.
+        """
+        self._sync_index()
+        with self._index_lock:
+            return self._stats.stats(granularity, created_from, created_to, currency)
+
+    def subscribe(
+        self, filters: Optional[OrderFilter] = None, last_event_id: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """Return the server-sent events of the orders created from now on.
+
+        The row number of an order is its event id, so a client resuming with
+        the id of the last event received gets the orders it missed.
+        """
+        return self.feed.subscribe(
+            filters or OrderFilter(), last_event_id, head=len(self.orders)
+        )
+
+    def iter_orders(
+        self, filters: Optional[OrderFilter] = None, cursor: Optional[str] = None
+    ) -> Iterator[OrderOut]:
+        """Yield every matching order past the cursor without materializing them.
+
+        Raises:
+            InvalidCursorError: If the cursor was not produced by this service.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        self._sync_index()
+        for row in self._index.scan(filters or OrderFilter(), after=after):
+            yield self.orders.at(row)
+
+    def cursor_after(self, order_id: UUID) -> str:
+        """Return the cursor positioned right after the given order."""
+        row = self.orders.row_of(order_id)
+        if row is None:
+            raise NotFoundError(f"Order {order_id} not found")
+        self._sync_index()
+        return encode_cursor(self._index.time_key(row))
@@ -0,0 +1,173 @@
+"""This module implements the order statistics of the Order service.
+
+Aggregates (count, sum, min and max of the amounts) are kept per currency,
+per ``created_by`` and currency, and per minute, hour and day bucket and
+currency, and updated as orders are indexed. A read copies the aggregates,
+so its cost depends on the number of buckets and never on the number of
+orders. Amounts are only summed within a currency.
+
+Minute and hour buckets are only kept for a retention window, counted in
+buckets, so the statistics of a long-running process stay bounded.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from pydantic.v1 import BaseSettings
+
+from poshub_api.domain.models import (
+    OrderAggregate,
+    OrderOut,
+    OrderStats,
+    OrderStatsBucket,
+    OrderStatsGroup,
+)
+from poshub_api.services.order_index import EPOCH, to_micros
+
+MINUTE = 60_000_000
+
+# Bucket width in microseconds
+GRANULARITIES = {"minute": MINUTE, "hour": 60 * MINUTE, "day": 24 * 60 * MINUTE}
+
+
+class OrderStatsSettings(BaseSettings):
+    """Order statistics settings."""
+
+    # Buckets kept per granularity; 0 keeps every bucket
+    order_stats_minute_buckets: int = 24 * 60
+    order_stats_hour_buckets: int = 90 * 24
+    order_stats_day_buckets: int = 0
+
+    class Config:
+        env_file = ".env"
+
+
+@dataclass
+class _Aggregate:
+    count: int = 0
+    total: float = 0.0
+    min: float = float("inf")
+    max: float = float("-inf")
+
+    def add(self, amount: float) -> None:
+        self.count += 1
+        self.total += amount
+        if amount < self.min:
+            self.min = amount
+        if amount > self.max:
+            self.max = amount
+
+    def out(self) -> OrderAggregate:
+        return OrderAggregate(
+            count=self.count, sum=self.total, min=self.min, max=self.max
+        )
+
+
+# Aggregates of one group, by currency
+_ByCurrency = Dict[str, _Aggregate]
+
+
+def _out(aggregates: _ByCurrency) -> Dict[str, OrderAggregate]:
+    return {currency: aggregate.out() for currency, aggregate in aggregates.items()}
+
+
+class _Buckets:
+    """Aggregates by bucket start of one granularity, with a bounded retention."""
+
+    def __init__(self, width: int, retention: int):
+        self.width = width
+        self.retention = retention
+        self.buckets: Dict[int, _ByCurrency] = {}
+
+    def get(self, micros: int) -> _ByCurrency:
+        start = micros - micros % self.width
+        aggregates = self.buckets.get(start)
+        if aggregates is None:
+            aggregates = self.buckets[start] = {}
+            # Pruned in batches, so each insert stays O(1) amortized
+            if self.retention and len(self.buckets) > self.retention * 5 // 4:
+                kept = sorted(self.buckets, reverse=True)[: self.retention]
+                self.buckets = {key: self.buckets[key] for key in kept}
+                aggregates = self.buckets.setdefault(start, aggregates)
+        return aggregates
+
+
+class OrderStatsAggregator:
+    """Incrementally maintained order statistics."""
+
+    def __init__(self, settings: Optional[OrderStatsSettings] = None):
+        settings = settings or OrderStatsSettings()
+        self._by_currency: _ByCurrency = {}
+        self._by_created_by: Dict[Optional[str], _ByCurrency] = {}
+        retentions = {
+            "minute": settings.order_stats_minute_buckets,
+            "hour": settings.order_stats_hour_buckets,
+            "day": settings.order_stats_day_buckets,
+        }
+        self._buckets = {
+            name: _Buckets(width, retentions[name])
+            for name, width in GRANULARITIES.items()
+        }
+
+    def add(self, order: OrderOut) -> None:
+        """Count an order in every aggregate it belongs to."""
+        micros = to_micros(order.created_at)
+        currency = order.currency
+        groups = [
+            self._by_currency,
+            self._by_created_by.setdefault(order.created_by, {}),
+        ]
+        groups += [buckets.get(micros) for buckets in self._buckets.values()]
+        for aggregates in groups:
+            aggregate = aggregates.get(currency)
+            if aggregate is None:
+                aggregate = aggregates[currency] = _Aggregate()
+            aggregate.add(order.total_amount)
+
+    def stats(
+        self,
+        granularity: str = "hour",
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        currency: Optional[str] = None,
+    ) -> OrderStats:
+        """Return the statistics, with the buckets overlapping the time range.
+
+        The per-currency and per-``created_by`` aggregates cover every order,
+        and ``currency`` restricts every aggregate to that currency.
+        """
+        buckets = self._buckets[granularity]
+        lo = to_micros(created_from) if created_from else None
+        hi = to_micros(created_to) if created_to else None
+        selected: List[Tuple[int, _ByCurrency]] = sorted(
+            (start, aggregates)
+            for start, aggregates in buckets.buckets.items()
+            if (lo is None or start + buckets.width > lo)
+            and (hi is None or start <= hi)
+        )
+
+        def pick(aggregates: _ByCurrency) -> _ByCurrency:
+            if currency is None:
+                return aggregates
+            return {currency: aggregates[currency]} if currency in aggregates else {}
+
+        by_currency = pick(self._by_currency)
+        return OrderStats(
+            count=sum(aggregate.count for aggregate in by_currency.values()),
+            by_currency=_out(by_currency),
+            by_created_by=[
+                OrderStatsGroup(created_by=by, by_currency=_out(pick(aggregates)))
+                for by, aggregates in self._by_created_by.items()
+                if pick(aggregates)
+            ],
+            granularity=granularity,
+            buckets=[
+                OrderStatsBucket(
+                    start=EPOCH + timedelta(microseconds=start),
+                    by_currency=_out(pick(aggregates)),
+                )
+                for start, aggregates in selected
+                if pick(aggregates)
+            ],
+        )
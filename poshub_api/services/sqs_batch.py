@@ -0,0 +1,175 @@
+"""This module implements the SQS batch processing engine.
+
+Records of an SQS event are processed concurrently with a bounded number of
+workers, either threads or asyncio tasks. Message ids already processed are
+skipped using a dedupe store, so redeliveries are not processed twice, and
+failures are reported with the ``batchItemFailures`` partial-batch contract.
+When the Lambda is about to time out, records not yet started are reported
+as failures so SQS redelivers them instead of the whole batch.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from poshub_api.infrastructure.storage.kv import (
+    KeyValueStore,
+    MemoryKeyValueStore,
+    SQLiteKeyValueStore,
+)
+
+logger = logging.getLogger(__name__)
+
+PROCESSED = b"1"
+
+
+class SQSBatchProcessor:
+    """Runs a handler over SQS records with bounded concurrency and dedupe."""
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Any],
+        dedupe_store: Optional[KeyValueStore] = None,
+        max_concurrency: int = 16,
+        mode: str = "thread",
+        dedupe_ttl: Optional[float] = 24 * 3600,
+        timeout_margin_ms: int = 2_000,
+        purge_every: int = 100,
+    ):
+        """Initialize the processor.
+
+        Args:
+            handler: Called with the decoded body of each message; may be a
+                coroutine function in asyncio mode. Raising marks it as failed.
+            dedupe_store: Store of processed message ids; None disables dedupe.
+            max_concurrency: Messages processed at the same time.
+            mode: ``"thread"`` for a thread pool or ``"asyncio"`` for tasks.
+            dedupe_ttl: Seconds a processed message id is remembered.
+            timeout_margin_ms: Remaining Lambda time below which no new
+                message is started.
+            purge_every: Batches between purges of the expired message ids,
+                the first batch of the process included.
+        """
+        if mode not in ("thread", "asyncio"):
+            raise ValueError(f"Unknown processing mode: {mode}")
+        self.handler = handler
+        self.dedupe_store = dedupe_store
+        self.max_concurrency = max_concurrency
+        self.mode = mode
+        self.dedupe_ttl = dedupe_ttl
+        self.timeout_margin_ms = timeout_margin_ms
+        self.purge_every = purge_every
+        self._batches = 0
+
+    def process(self, records: List[Dict[str, Any]], context: Any = None) -> Dict:
+        """Process the records and return the partial batch response."""
+        if self.dedupe_store is not None and self._batches % self.purge_every == 0:
+            self._purge_expired()
+        self._batches += 1
+        if self.mode == "asyncio":
+            outcomes = asyncio.run(self._process_async(records, context))
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                outcomes = list(
+                    executor.map(lambda r: self._process_record(r, context), records)
+                )
+
+        failed = [
+            {"itemIdentifier": record["messageId"]}
+            for record, outcome in zip(records, outcomes)
+            if outcome != "processed" and outcome != "duplicate"
+        ]
+        duplicates = outcomes.count("duplicate")
+        logger.info(
+            f"Batch done: {len(records) - len(failed) - duplicates} processed, "
+            f"{duplicates} duplicate(s) skipped, {len(failed)} failed."
+        )
+        return {"batchItemFailures": failed}
+
+    async def _process_async(self, records, context) -> List[str]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(record):
+            async with semaphore:
+                if inspect.iscoroutinefunction(self.handler):
+                    return await self._process_record_async(record, context)
+                return await asyncio.to_thread(self._process_record, record, context)
+
+        return await asyncio.gather(*(run(record) for record in records))
+
+    def _process_record(self, record: Dict[str, Any], context: Any) -> str:
+        message_id, body, outcome = self._prepare(record, context)
+        if outcome is not None:
+            return outcome
+        try:
+            self.handler(body)
+        except Exception as e:
+            logger.error(f"Failed to process message {message_id}: {e}")
+            return "failed"
+        return self._mark_processed(message_id)
+
+    async def _process_record_async(self, record: Dict[str, Any], context) -> str:
+        message_id, body, outcome = self._prepare(record, context)
+        if outcome is not None:
+            return outcome
+        try:
+            await self.handler(body)
+        except Exception as e:
+            logger.error(f"Failed to process message {message_id}: {e}")
+            return "failed"
+        return self._mark_processed(message_id)
+
+    def _prepare(self, record: Dict[str, Any], context: Any):
+        message_id = record["messageId"]
+        if self._out_of_time(context):
+            return message_id, None, "skipped"
+        if self.dedupe_store is not None and message_id in self.dedupe_store:
+            logger.debug(f"Skipping already processed message {message_id}")
+            return message_id, None, "duplicate"
+        try:
+            return message_id, json.loads(record["body"]), None
+        except Exception as e:
+            logger.error(f"Invalid body in message {message_id}: {e}")
+            return message_id, None, "failed"
+
+    def _mark_processed(self, message_id: str) -> str:
+        if self.dedupe_store is not None:
+            try:
+                self.dedupe_store.set(message_id, PROCESSED, ttl=self.dedupe_ttl)
+            except Exception as e:
+                # Processed anyway: a redelivery will just be processed again
+                logger.warning(f"Failed to record message {message_id}: {e}")
+        return "processed"
+
+    def _purge_expired(self) -> None:
+        try:
+            purged = self.dedupe_store.purge_expired()
+        except Exception as e:
+            logger.warning(f"Failed to purge expired message ids: {e}")
+            return
+        if purged:
+            logger.info(f"Purged {purged} expired message id(s).")
+
+    def _out_of_time(self, context: Any) -> bool:
+        remaining = getattr(context, "get_remaining_time_in_millis", None)
+        return remaining is not None and remaining() < self.timeout_margin_ms
+
+
+def create_dedupe_store() -> Optional[KeyValueStore]:
+    """Return the dedupe store selected by ORDER_PROCESSOR_DEDUPE.
+
+    ``memory`` (default) keeps an in-process LRU, ``none`` disables dedupe and
+    any other value is used as the path of a SQLite database.
+    """
+    backend = os.getenv("ORDER_PROCESSOR_DEDUPE", "memory")
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryKeyValueStore(
+            max_entries=int(os.getenv("ORDER_PROCESSOR_DEDUPE_MAX_ENTRIES", "100000"))
+        )
+    return SQLiteKeyValueStore(backend)
@@ -0,0 +1,253 @@
+"""This module implements the admission control of the API.
+
+``AdmissionMiddleware`` decides, before a request reaches the app, whether
+to serve it:
+
+- each caller, identified by the subject of its JWT once verified by a
+  previous request, or else its address, has a token bucket, and gets a
+  ``429`` once it exceeds its rate;
+- at most a fixed number of requests are served concurrently, and further
+  ones get a ``503``;
+- a monitor task measures how late the event loop wakes up, which grows
+  when blocking calls hold it. Above a threshold, low-priority requests
+  (reads by default) get a ``503``, and above a critical lag every request.
+
+Shed requests carry ``Retry-After``. Exempt paths such as ``/health`` are
+always admitted. Every decision is counted in the request metrics.
+
+The middleware runs on the event loop of the server, so its state needs no
+lock.
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import structlog
+from pydantic.v1 import BaseSettings
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from poshub_api.shared.metrics import registry
+from poshub_api.shared.security import cached_subject
+
+logger = structlog.get_logger(__name__)
+
+# Streams stay open for as long as the client listens, so they are rate
+# limited but not counted against the concurrency limit
+LONG_LIVED_PATHS = ("/orders/feed",)
+
+
+class AdmissionSettings(BaseSettings):
+    """Admission control settings."""
+
+    # Off by default in cold-start mode: Lambda serves one request at a time
+    admission_enabled: Optional[bool] = None
+    admission_rate_per_second: float = 50.0
+    admission_burst: int = 100
+    admission_max_subjects: int = 10_000
+    admission_max_concurrency: int = 256
+    admission_lag_interval_ms: float = 50.0
+    admission_lag_threshold_ms: float = 100.0
+    admission_lag_critical_ms: float = 500.0
+    admission_low_priority_methods: str = "GET,HEAD"
+    admission_exempt_paths: str = "/health,/metrics"
+    admission_retry_after_seconds: int = 1
+
+    class Config:
+        env_file = ".env"
+
+
+class TokenBuckets:
+    """Token buckets by key, the least recently used dropped past ``max_keys``."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_keys: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> (tokens, time of the last update)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str) -> float:
+        """Take a token; return 0 if there was one, else the seconds until one."""
+        now = self._clock()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class LagMonitor:
+    """Measures the event loop lag from how late a periodic sleep wakes up."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._expected: Optional[float] = None
+
+    def ensure_started(self) -> None:
+        """Start the monitor on the running loop, unless already running there."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            # A task left on a previous loop says nothing about this one
+            self.lag, self._expected = 0.0, None
+            self._task = loop.create_task(self._run())
+
+    def current(self) -> float:
+        """Return the lag, counting a wake-up that is already overdue."""
+        if self._expected is None:
+            return self.lag
+        overdue = asyncio.get_running_loop().time() - self._expected
+        return max(self.lag, overdue)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - self._expected)
+            registry.event_loop_lag.set((), self.lag)
+
+
+def request_subject(
+    scope: Scope,
+    headers: Headers,
+    verify: Callable[[str], Optional[str]] = cached_subject,
+) -> str:
+    """Return the caller of a request, for rate limiting.
+
+    The principal set by the API Gateway authorizer when there is one, else
+    the ``sub`` of the bearer token if ``verify`` finds it already verified,
+    else the client address. An unverified subject is never used: anyone
+    could drain the bucket of another caller, or get a fresh one with each
+    new subject. ``verify`` must not block the event loop, so a token is not
+    verified here: its first request is counted against its address, and the
+    route's own check caches it for the next ones.
+    """
+    event = scope.get("aws.event") or {}
+    authorizer = (event.get("requestContext") or {}).get("authorizer") or {}
+    principal = authorizer.get("principalId")
+    if principal:
+        return f"sub:{principal}"
+
+    authorization = headers.get("authorization", "")
+    if authorization[:7].lower() == "bearer ":
+        subject = verify(authorization[7:].strip())
+        if subject:
+            return f"sub:{subject}"
+
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "anonymous"
+
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class AdmissionMiddleware:
+    """ASGI middleware admitting or shedding the requests."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        settings: Optional[AdmissionSettings] = None,
+        clock: Callable[[], float] = time.monotonic,
+        verify: Callable[[str], Optional[str]] = cached_subject,
+    ):
+        settings = settings or AdmissionSettings()
+        self.app = app
+        self.verify = verify
+        self.buckets = TokenBuckets(
+            settings.admission_rate_per_second,
+            settings.admission_burst,
+            settings.admission_max_subjects,
+            clock,
+        )
+        self.max_concurrency = settings.admission_max_concurrency
+        self.lag_threshold = settings.admission_lag_threshold_ms / 1e3
+        self.lag_critical = settings.admission_lag_critical_ms / 1e3
+        self.low_priority_methods = set(_split(settings.admission_low_priority_methods))
+        self.exempt_paths = set(_split(settings.admission_exempt_paths))
+        self.retry_after = settings.admission_retry_after_seconds
+        self.monitor = LagMonitor(settings.admission_lag_interval_ms / 1e3)
+        self.in_flight = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        self.monitor.ensure_started()
+        shed = self._decide(scope)
+        if shed is not None:
+            status, reason, retry_after = shed
+            registry.admission_decisions.add(("shed", reason), 1)
+            await self._reject(send, status, reason, retry_after)
+            return
+
+        registry.admission_decisions.add(("admitted", "ok"), 1)
+        counted = scope["path"] not in LONG_LIVED_PATHS
+        if counted:
+            self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if counted:
+                self.in_flight -= 1
+
+    def _decide(self, scope: Scope) -> Optional[Tuple[int, str, int]]:
+        """Return the status, reason and Retry-After of a shed request."""
+        lag = self.monitor.current()
+        if lag > self.lag_critical or (
+            lag > self.lag_threshold and scope["method"] in self.low_priority_methods
+        ):
+            return 503, "event_loop_lag", self.retry_after
+        if (
+            self.in_flight >= self.max_concurrency
+            and scope["path"] not in LONG_LIVED_PATHS
+        ):
+            return 503, "concurrency", self.retry_after
+        wait = self.buckets.take(
+            request_subject(scope, Headers(scope=scope), self.verify)
+        )
+        if wait:
+            return 429, "rate_limit", math.ceil(wait)
+        return None
+
+    async def _reject(
+        self, send: Send, status: int, reason: str, retry_after: int
+    ) -> None:
+        logger.warning("Request shed", reason=reason, status=status)
+        detail = "Too many requests" if status == 429 else "Service overloaded"
+        body = json.dumps({"detail": detail, "reason": reason}).encode()
+        headers: Dict[bytes, bytes] = {
+            b"content-type": b"application/json",
+            b"content-length": str(len(body)).encode(),
+            b"retry-after": str(retry_after).encode(),
+        }
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": list(headers.items()),
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,284 @@
+"""This module implements the negotiated compression of the responses.
+
+``CompressionMiddleware`` compresses the text responses of the app with the
+best encoding both the client accepts and the process supports: zstd when
+``zstandard`` is installed, brotli when ``brotli`` is, and gzip always.
+Responses under the minimum size stay uncompressed. Streaming responses,
+such as the order exports, are compressed chunk by chunk and flushed after
+each one, so the client keeps receiving orders as they are serialized.
+
+A compressed response is binary, which Lambda proxy integrations only carry
+base64-encoded: ``base64_body`` encodes the response of the Mangum handler.
+"""
+
+import base64
+import zlib
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+from pydantic.v1 import BaseSettings
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+
+class CompressionSettings(BaseSettings):
+    """Response compression settings."""
+
+    compression_enabled: bool = True
+    # Smaller bodies gain less than the encoding costs
+    compression_minimum_size: int = 1024
+    # Preferred first when the client accepts several with the same q-value
+    compression_encodings: str = "zstd,br,gzip"
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
+
+    class Config:
+        env_file = ".env"
+
+
+class Compressor(ABC):
+    """Incremental compressor of one response body."""
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk, flushed so the client can decode it right away."""
+
+    @abstractmethod
+    def finish(self, data: bytes = b"") -> bytes:
+        """Compress the last chunk and end the stream."""
+
+
+class GzipCompressor(Compressor):
+    def __init__(self, level: int):
+        # wbits 31: deflate with the gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliCompressor(Compressor):
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class ZstdCompressor(Compressor):
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def available_compressors(
+    settings: CompressionSettings,
+) -> Dict[str, Callable[[], Compressor]]:
+    """Return the configured encodings this process supports, by preference."""
+    factories = {"gzip": lambda: GzipCompressor(settings.compression_gzip_level)}
+    if brotli is not None:
+        factories["br"] = lambda: BrotliCompressor(settings.compression_brotli_quality)
+    if zstandard is not None:
+        factories["zstd"] = lambda: ZstdCompressor(settings.compression_zstd_level)
+    preferred = [e.strip() for e in settings.compression_encodings.split(",")]
+    return {e: factories[e] for e in preferred if e in factories}
+
+
+def negotiate(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """Return the encoding to use for an Accept-Encoding header, if any.
+
+    The highest q-value wins, then the order of ``encodings``; ``*`` stands
+    for every encoding not listed and ``q=0`` refuses one.
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                q = float(params.removeprefix("q="))
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    """Return whether the media type is text, which compresses well.
+
+    Event streams are not: buffering up to the minimum size would delay them.
+    """
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type == "text/event-stream":
+        return False
+    return (
+        media_type.startswith("text/")
+        or media_type.endswith(("json", "xml", "javascript"))
+        or media_type == "application/x-ndjson"
+    )
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing the responses with a negotiated encoding."""
+
+    def __init__(self, app: ASGIApp, settings: Optional[CompressionSettings] = None):
+        settings = settings or CompressionSettings()
+        self.app = app
+        self.minimum_size = settings.compression_minimum_size
+        self.compressors = available_compressors(settings)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate(accept_encoding, list(self.compressors))
+        responder = _CompressionResponder(
+            send,
+            encoding,
+            self.compressors[encoding] if encoding else None,
+            self.minimum_size,
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Compresses, or passes through, the messages of one response."""
+
+    def __init__(
+        self,
+        send: Send,
+        encoding: Optional[str],
+        factory: Optional[Callable[[], Compressor]],
+        minimum_size: int,
+    ):
+        self._send = send
+        self._encoding = encoding
+        self._factory = factory
+        self._minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._compressor: Optional[Compressor] = None
+        self._passthrough = False
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if "content-encoding" in headers or not is_compressible(
+                headers.get("content-type", "")
+            ):
+                self._passthrough = True
+                await self._send(message)
+            elif self._factory is None:
+                self._passthrough = True
+                await self._send(_vary(message))
+            else:
+                # Held until the body is known to reach the minimum size
+                self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._start is not None:
+            # Even a plain response comes in several chunks through the
+            # BaseHTTPMiddleware of the app, so small chunks are buffered
+            self._buffer.append(body)
+            self._buffered += len(body)
+            if more_body and self._buffered < self._minimum_size:
+                return
+            body, self._buffer = b"".join(self._buffer), []
+            start, self._start = _vary(self._start), None
+            if len(body) < self._minimum_size:
+                self._passthrough = True
+                await self._send(start)
+                await self._send({**message, "body": body})
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self._encoding
+            etag = headers.get("etag")
+            # The compressed bytes differ from the ones the strong ETag names
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            self._compressor = self._factory()
+            if not more_body:
+                body = self._compressor.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self._send(start)
+                await self._send({**message, "body": body})
+                return
+            del headers["Content-Length"]
+            await self._send(start)
+
+        if more_body:
+            body = self._compressor.compress(body)
+        else:
+            body = self._compressor.finish(body)
+        await self._send({**message, "body": body})
+
+
+def _vary(message: Message) -> Message:
+    """Return a copy of a response start message varying on Accept-Encoding."""
+    message = {**message, "headers": list(message.get("headers", []))}
+    MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+    return message
+
+
+def base64_body(response: Dict) -> Dict:
+    """Base64-encode the body of a compressed Lambda proxy response.
+
+    Mangum only base64-encodes bodies whose content type is not text or that
+    are not valid UTF-8, and a compressed JSON body can be both, so this
+    encodes every response with a Content-Encoding.
+    """
+    if response.get("isBase64Encoded") or not response.get("body"):
+        return response
+    headers = response.get("headers") or {}
+    multi_value_headers = response.get("multiValueHeaders") or {}
+    if not any(
+        name.lower() == "content-encoding" for name in [*headers, *multi_value_headers]
+    ):
+        return response
+    # Mangum decoded the body as UTF-8, so encoding it back is lossless
+    body = base64.b64encode(response["body"].encode()).decode()
+    return {**response, "body": body, "isBase64Encoded": True}
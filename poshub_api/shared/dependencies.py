@@ -1,14 +1,65 @@
-import httpx
-from fastapi import Request
+import os
+from typing import TYPE_CHECKING
 
+from fastapi import FastAPI, Request
+
+from poshub_api.infrastructure.storage.base import OrderStore
+from poshub_api.infrastructure.storage.columnar import ColumnarOrderStore
+from poshub_api.infrastructure.storage.journal import JournalOrderStore
+from poshub_api.infrastructure.storage.memory import DictOrderStore
+from poshub_api.infrastructure.storage.sqlite import SQLiteOrderStore
 from poshub_api.services.order_service import OrderService
 
-order_service = OrderService()
+if TYPE_CHECKING:
+    import httpx
+
+
+def create_order_store() -> OrderStore:
+    """Return the storage engine selected by the ORDER_STORE variable."""
+    engine = os.getenv("ORDER_STORE", "dict")
+    if engine == "columnar":
+        return ColumnarOrderStore()
+    if engine == "dict":
+        return DictOrderStore()
+    if engine == "journal":
+        return JournalOrderStore()
+    if engine == "sqlite":
+        # Shared by every worker process opening the same file
+        return SQLiteOrderStore(os.getenv("ORDER_STORE_PATH", "poshub_orders.db"))
+    raise ValueError(f"Unknown ORDER_STORE: {engine}")
+
+
+order_service = OrderService(store=create_order_store())
 
 
 def get_order_service() -> OrderService:
     return order_service
 
 
-def get_http_client(request: Request) -> httpx.AsyncClient:
-    return request.app.state.http
+def create_http_client() -> "httpx.AsyncClient":
+    # httpx is imported here so only requests calling out pay for the import
+    from poshub_api.infrastructure.http import client
+
+    return client.create_http_client()
+
+
+def ensure_http_client(app: FastAPI) -> "httpx.AsyncClient":
+    """Return the app's HTTP client, creating it on first use."""
+    http = getattr(app.state, "http", None)
+    if http is None:
+        http = app.state.http = create_http_client()
+    return http
+
+
+def get_http_client(request: Request) -> "httpx.AsyncClient":
+    return ensure_http_client(request.app)
+
+
+async def close_http_client(app: FastAPI) -> bool:
+    """Close the app's HTTP client if one was created; return whether it was."""
+    http = getattr(app.state, "http", None)
+    if http is None:
+        return False
+    app.state.http = None
+    await http.aclose()
+    return True
@@ -8,6 +8,16 @@ class NotFoundError(Exception):
         self.message = message
 
 
+class InvalidCursorError(Exception):
+    def __init__(self, message: str):
+        self.message = message
+
+
+class IdempotencyConflictError(Exception):
+    def __init__(self, message: str):
+        self.message = message
+
+
 class AuthError(HTTPException):
     def __init__(self, detail: str = "Could not validate credentials"):
         super().__init__(
@@ -1,20 +1,117 @@
+import atexit
+import itertools
 import logging
+import queue
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Tuple
 
 import structlog
+from pydantic.v1 import BaseSettings
+
+from poshub_api.shared.serialization import dumps_str
+
+
+class LoggingSettings(BaseSettings):
+    """Logging settings."""
+
+    log_level: str = "INFO"
+    log_async: bool = False
+    log_queue_size: int = 10_000
+    log_info_sample_rate: int = 1
+    log_sampled_loggers: str = "poshub_api.shared.security,poshub_api.api.routers"
+
+    class Config:
+        env_file = ".env"
+
+
+class SamplingFilter(logging.Filter):
+    """Keep 1 in ``rate`` records below WARNING from the sampled loggers.
+
+    Warnings and errors are always kept, as are records of other loggers.
+    Dropped records are never formatted.
+    """
+
+    def __init__(self, rate: int, loggers: Tuple[str, ...] = ("",)):
+        super().__init__()
+        self.rate = max(1, rate)
+        self.loggers = loggers
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if (
+            self.rate == 1
+            or record.levelno >= logging.WARNING
+            or not record.name.startswith(self.loggers)
+        ):
+            return True
+        return next(self._counter) % self.rate == 0
+
+
+class AsyncQueueHandler(QueueHandler):
+    """Queue handler leaving formatting to the listener thread.
+
+    The structlog context (``correlation_id``...) is captured on the record
+    since contextvars are not visible from the listener thread. Records are
+    dropped rather than blocking the request when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.structlog_context = structlog.contextvars.get_contextvars()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def add_record_context(logger, method_name, event_dict):
+    """Merge the structlog context captured by ``AsyncQueueHandler``."""
+    context = getattr(event_dict.get("_record"), "structlog_context", None)
+    if context:
+        for key, value in context.items():
+            event_dict.setdefault(key, value)
+    return event_dict
+
+
+def add_record_timestamp(logger, method_name, event_dict):
+    """Add the ISO timestamp of when the record was created, not rendered."""
+    record = event_dict.get("_record")
+    if record is not None and "timestamp" not in event_dict:
+        event_dict["timestamp"] = datetime.fromtimestamp(
+            record.created, tz=timezone.utc
+        ).isoformat()
+    return event_dict
+
+
+_listener: Optional[QueueListener] = None
+_queue: Optional[queue.Queue] = None
 
 
 def configure_logging() -> None:
     """Configure structured logging for the application.
 
-    Args:
-        debug: Whether to enable debug logging.
+    With LOG_ASYNC set, records are put on a queue and rendered to JSON and
+    written by a background listener thread, using the fast serializer.
     """
+    settings = LoggingSettings()
+    if settings.log_async:
+        _configure_async_logging(settings)
+        return
 
     logging.basicConfig(
         format="%(message)s",
-        level=logging.INFO,
+        level=settings.log_level,
         handlers=[logging.StreamHandler()],
     )
+    _add_sampling(logging.getLogger().handlers, settings)
 
     processors = [
         structlog.contextvars.merge_contextvars,
@@ -33,3 +130,74 @@ def configure_logging() -> None:
         logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
     )
+
+
+def _configure_async_logging(settings: LoggingSettings) -> None:
+    global _listener, _queue
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(
+        structlog.stdlib.ProcessorFormatter(
+            foreign_pre_chain=[
+                add_record_context,
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+            ],
+            processors=[
+                add_record_timestamp,
+                structlog.processors.format_exc_info,
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                structlog.processors.JSONRenderer(serializer=dumps_str),
+            ],
+        )
+    )
+    _queue = queue.Queue(maxsize=settings.log_queue_size)
+    handler = AsyncQueueHandler(_queue)
+    _add_sampling([handler], settings)
+    _listener = QueueListener(_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.log_level)
+
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.processors.StackInfoRenderer(),
+            # Exceptions must be captured while still being handled
+            structlog.processors.format_exc_info,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        cache_logger_on_first_use=True,
+    )
+
+
+def _add_sampling(handlers, settings: LoggingSettings) -> None:
+    if settings.log_info_sample_rate <= 1:
+        return
+    loggers = tuple(
+        name.strip() for name in settings.log_sampled_loggers.split(",") if name
+    )
+    sampler = SamplingFilter(settings.log_info_sample_rate, loggers)
+    for handler in handlers:
+        # configure_logging runs again on every Mangum lifespan: one sampler
+        # per handler, or the rates would multiply
+        if not any(isinstance(f, SamplingFilter) for f in handler.filters):
+            handler.addFilter(sampler)
+
+
+def flush_logging(timeout: float = 1.0) -> None:
+    """Wait until queued records are written, e.g. before Lambda freezes."""
+    if _queue is None:
+        return
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.001)
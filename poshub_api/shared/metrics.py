@@ -0,0 +1,262 @@
+"""This module implements the in-process request metrics.
+
+Request latencies are kept in per-route histograms next to in-flight gauges,
+and code on the request path records named phases (``auth``, ``service``,
+``sqs``...) into a per-request timer. The metrics are exposed in the
+Prometheus text format by ``GET /metrics`` and can also be written as
+CloudWatch Embedded Metric Format (EMF) log lines, one per request, which
+suits Lambda where nothing scrapes the process.
+"""
+
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic.v1 import BaseSettings
+
+from poshub_api.shared.serialization import dumps_str
+
+# Upper bounds of the latency buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+Labels = Tuple[str, ...]
+
+
+class MetricsSettings(BaseSettings):
+    """Request metrics settings."""
+
+    metrics_enabled: bool = True
+    metrics_emf: bool = False
+    metrics_namespace: str = "Poshub"
+
+    class Config:
+        env_file = ".env"
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label values."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str],
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket"
+                    f"{_labels(self.labels + ('le',), labels + (str(bound),))}"
+                    f" {cumulative}"
+                )
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {values[-1]}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {cumulative}"
+
+
+class Gauge:
+    """Gauge, one series per label values."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, labels: Labels, amount: float) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, labels: Labels, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def value(self, labels: Labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labels, labels)} {value}"
+
+
+class Counter(Gauge):
+    """Monotonic counter, one series per label values."""
+
+    def render(self) -> Iterator[str]:
+        for line in super().render():
+            yield line.replace(" gauge", " counter", 1) if line[0] == "#" else line
+
+
+class MetricsRegistry:
+    """The request metrics of the process."""
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            "poshub_http_request_duration_seconds",
+            "HTTP request latency by route.",
+            ("method", "route", "status"),
+        )
+        self.requests_in_flight = Gauge(
+            "poshub_http_requests_in_flight",
+            "HTTP requests being processed by route.",
+            ("method", "route"),
+        )
+        self.phase_duration = Histogram(
+            "poshub_http_request_phase_duration_seconds",
+            "Time spent in a named phase of a request.",
+            ("route", "phase"),
+        )
+        self.admission_decisions = Counter(
+            "poshub_admission_decisions_total",
+            "Requests admitted or shed by admission control, by reason.",
+            ("decision", "reason"),
+        )
+        self.event_loop_lag = Gauge(
+            "poshub_event_loop_lag_seconds",
+            "Latest event loop lag measured by admission control.",
+            (),
+        )
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in (
+            self.request_duration,
+            self.requests_in_flight,
+            self.phase_duration,
+            self.admission_decisions,
+            self.event_loop_lag,
+        ):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+# Phases of the current request; None outside of a request
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "poshub_phases", default=None
+)
+
+
+def start_phases() -> Dict[str, float]:
+    """Start recording phases for the current request and return them.
+
+    The dict itself is shared with the tasks and threads the request spawns,
+    so phases recorded there land in it as well.
+    """
+    phases: Dict[str, float] = {}
+    _phases.set(phases)
+    return phases
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Add ``seconds`` to the named phase of the current request, if any."""
+    phases = _phases.get()
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed_phase(name: str) -> Iterator[None]:
+    """Time the block into the named phase of the current request.
+
+    Repeated phases add up, e.g. one ``service`` phase per order of a batch.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - started)
+
+
+def server_timing(phases: Dict[str, float], total: float) -> str:
+    """Return the ``Server-Timing`` header value of the phases, in ms."""
+    entries = [f"{name};dur={seconds * 1e3:.2f}" for name, seconds in phases.items()]
+    entries.append(f"total;dur={total * 1e3:.2f}")
+    return ", ".join(entries)
+
+
+def emf_line(
+    namespace: str,
+    method: str,
+    route: str,
+    status: int,
+    total: float,
+    phases: Dict[str, float],
+    properties: Optional[Dict] = None,
+) -> str:
+    """Return the CloudWatch EMF log line of one request."""
+    document = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": namespace,
+                    "Dimensions": [["route"]],
+                    "Metrics": [{"Name": "latency", "Unit": "Milliseconds"}]
+                    + [
+                        {"Name": f"{phase}_latency", "Unit": "Milliseconds"}
+                        for phase in phases
+                    ],
+                }
+            ],
+        },
+        "route": route,
+        "method": method,
+        "status": status,
+        "latency": round(total * 1e3, 3),
+        **{f"{phase}_latency": round(s * 1e3, 3) for phase, s in phases.items()},
+        **(properties or {}),
+    }
+    return dumps_str(document)
+
+
+def write_emf(line: str) -> None:
+    """Write an EMF line to stdout, where Lambda ships it to CloudWatch."""
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
@@ -1,7 +1,38 @@
+import time
 import uuid
+from typing import Callable
 
 from fastapi import Request, Response
-from structlog.contextvars import bind_contextvars, clear_contextvars
+from starlette.routing import Match
+from starlette.types import Receive, Scope, Send
+from structlog.contextvars import bind_contextvars, clear_contextvars, get_contextvars
+
+from poshub_api.shared.metrics import (
+    MetricsSettings,
+    emf_line,
+    registry,
+    server_timing,
+    start_phases,
+    write_emf,
+)
+
+settings = MetricsSettings()
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(request: Request) -> str:
+    """Return the path template of the route serving the request.
+
+    Used as the metrics label instead of the raw path, whose ids would make
+    one series per order.
+    """
+    for route in request.app.router.routes:
+        match, child_scope = route.matches(request.scope)
+        if match != Match.NONE:
+            route = child_scope.get("route", route)
+            return getattr(route, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
 
 
 async def correlation_id_middleware(request: Request, call_next):
@@ -11,6 +42,64 @@ async def correlation_id_middleware(request: Request, call_next):
     correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
     bind_contextvars(correlation_id=correlation_id)
 
-    response: Response = await call_next(request)
+    if not settings.metrics_enabled:
+        response: Response = await call_next(request)
+        response.headers["X-Correlation-ID"] = correlation_id
+        return response
+
+    method = request.method
+    route = route_template(request)
+    phases = start_phases()
+    registry.requests_in_flight.add((method, route), 1)
+    started = time.perf_counter()
+
+    def finish(status: int) -> None:
+        total = time.perf_counter() - started
+        registry.requests_in_flight.add((method, route), -1)
+        registry.request_duration.observe((method, route, str(status)), total)
+        for phase, seconds in phases.items():
+            registry.phase_duration.observe((route, phase), seconds)
+        if settings.metrics_emf:
+            write_emf(
+                emf_line(
+                    settings.metrics_namespace,
+                    method,
+                    route,
+                    status,
+                    total,
+                    phases,
+                    properties=get_contextvars(),
+                )
+            )
+
+    try:
+        response = await call_next(request)
+    except BaseException:
+        finish(500)
+        raise
+
     response.headers["X-Correlation-ID"] = correlation_id
-    return response
+    # Time to the headers: the body of a streamed response is still to come
+    response.headers["Server-Timing"] = server_timing(
+        phases, time.perf_counter() - started
+    )
+    return _SentResponse(response, lambda: finish(response.status_code))
+
+
+class _SentResponse:
+    """Sends a response, then calls ``done``.
+
+    Streamed responses, such as the orders export or feed, are still being
+    sent when ``call_next`` returns, so a request is only measured once its
+    last body chunk is sent, or the client went away.
+    """
+
+    def __init__(self, response: Response, done: Callable[[], None]):
+        self.response = response
+        self.done = done
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.response(scope, receive, send)
+        finally:
+            self.done()
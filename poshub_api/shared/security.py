@@ -1,19 +1,22 @@
 import logging
 import os
+from functools import lru_cache
 from typing import List, Optional
 
-import boto3
 import jwt
 from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jwt import DecodeError
+from jwt import InvalidTokenError
 from pydantic.v1 import BaseSettings
 
+from poshub_api.infrastructure.aws.parameters import get_parameter_provider
 from poshub_api.shared.exceptions import AuthError, ScopeError
+from poshub_api.shared.metrics import timed_phase
+from poshub_api.shared.token_cache import VerifiedToken, get_token_cache
 
 # Setup logging
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
 
 
 class JWTSettings(BaseSettings):
@@ -28,17 +31,17 @@ class JWTSettings(BaseSettings):
         env_file = ".env"
 
 
+@lru_cache(maxsize=4)
+def _jwt_settings_for(secret: str) -> JWTSettings:
+    return JWTSettings(jwt_secret=secret)
+
+
 def get_jwt_settings() -> JWTSettings:
-    """Get JWT settings from SSM."""
+    """Get JWT settings from the cached SSM parameter provider."""
     try:
         param_name = os.environ["JWT_SECRET_PARAM"]
-        logger.info(f"Fetching JWT secret from SSM: {param_name}")
-        ssm = boto3.client("ssm")
-        secret = ssm.get_parameter(Name=param_name, WithDecryption=True)["Parameter"][
-            "Value"
-        ]
-        logger.info("Successfully retrieved JWT secret from SSM")
-        return JWTSettings(jwt_secret=secret)
+        secret = get_parameter_provider().get(param_name)
+        return _jwt_settings_for(secret)
     except Exception:
         logger.exception("Failed to load JWT settings from SSM")
         raise AuthError("Server error while fetching JWT config")
@@ -47,15 +50,13 @@ def get_jwt_settings() -> JWTSettings:
 security_scheme = HTTPBearer()
 
 
-def validate_token(
-    credentials: HTTPAuthorizationCredentials = Depends(security_scheme),
-) -> dict:
-    """Base token validation."""
-    jwt_settings = get_jwt_settings()
+def verify_bearer(token: str) -> VerifiedToken:
+    """Verify a bearer token, reusing cached verifications."""
+    with timed_phase("ssm"):
+        jwt_settings = get_jwt_settings()
 
-    try:
-        token = credentials.credentials
-        logger.info(f"Validating JWT token for issuer {jwt_settings.jwt_issuer}")
+    def decode(token: str) -> dict:
+        logger.info("Validating JWT token for issuer %s", jwt_settings.jwt_issuer)
         payload = jwt.decode(
             token,
             jwt_settings.jwt_secret,
@@ -63,33 +64,69 @@ def validate_token(
             iss=jwt_settings.jwt_issuer,
             options={"verify_exp": True},
         )
-        logger.info(f"Token validated. Subject: {payload.get('sub')}")
+        logger.info("Token validated. Subject: %s", payload.get("sub"))
         return payload
-    except DecodeError as e:
-        logger.warning(f"Invalid token: {e}")
+
+    try:
+        with timed_phase("jwt"):
+            return get_token_cache().verify(
+                token, decode, namespace=jwt_settings.jwt_secret
+            )
+    except InvalidTokenError as e:
+        # Expected from any bad client, so no traceback and no warning flood
+        logger.debug("Invalid token: %s", e)
         raise AuthError(f"Invalid token: {str(e)}")
     except Exception:
         logger.exception("Unexpected error during token validation")
         raise AuthError("Authorization failed")
 
 
+def verify_token(
+    credentials: HTTPAuthorizationCredentials = Depends(security_scheme),
+) -> VerifiedToken:
+    """Verify the bearer token of the request."""
+    return verify_bearer(credentials.credentials)
+
+
+def cached_subject(token: str) -> Optional[str]:
+    """Return the subject of the token if it was already verified, else None.
+
+    Only looks up the cached JWT secret and the verified-JWT cache: no SSM
+    call and no signature check, so it is safe to call on the event loop.
+    """
+    param_name = os.environ.get("JWT_SECRET_PARAM")
+    secret = get_parameter_provider().cached(param_name) if param_name else None
+    if secret is None:
+        return None
+    entry = get_token_cache().lookup(token, namespace=secret)
+    return entry.payload.get("sub") if entry is not None else None
+
+
+def validate_token(
+    credentials: HTTPAuthorizationCredentials = Depends(security_scheme),
+) -> dict:
+    """Base token validation."""
+    return verify_token(credentials).payload
+
+
 def check_scopes(
     required_scope: Optional[str] = None, required_scopes: Optional[List[str]] = None
 ):
     """Factory for scope checking."""
 
-    def dependency(payload: dict = Depends(validate_token)):
-        scopes = payload.get("scopes", [])
-        logger.info(f"Checking scopes: {scopes}")
+    def dependency(token: VerifiedToken = Depends(verify_token)):
+        scopes = token.scopes
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Checking scopes: %s", sorted(scopes))
 
         if required_scope and required_scope not in scopes:
-            logger.warning(f"Missing required scope: {required_scope}")
+            logger.warning("Missing required scope: %s", required_scope)
             raise ScopeError(required_scope)
 
-        if required_scopes and not any(scope in scopes for scope in required_scopes):
-            logger.warning(f"Missing one of required scopes: {required_scopes}")
+        if required_scopes and scopes.isdisjoint(required_scopes):
+            logger.warning("Missing one of required scopes: %s", required_scopes)
             raise ScopeError(", ".join(required_scopes))
 
-        return payload
+        return token.payload
 
     return dependency
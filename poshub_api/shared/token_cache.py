@@ -0,0 +1,203 @@
+"""This module implements the verified-JWT cache.
+
+Verified payloads are kept in a bounded LRU keyed by a SHA-256 digest of the
+token (never the raw token) and expire at the token's ``exp`` claim. Rejected
+tokens are remembered for a short while so replayed bad tokens skip the
+signature check too. The module has no FastAPI dependency so the authorizer
+Lambda can use it as well.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Optional, Tuple, Type
+
+import jwt
+from pydantic.v1 import BaseSettings
+
+
+class TokenCacheSettings(BaseSettings):
+    """Verified-JWT cache settings."""
+
+    jwt_cache_max_entries: int = 10_000
+    jwt_cache_max_ttl_seconds: float = 300.0
+    jwt_cache_negative_max_entries: int = 1_000
+    jwt_cache_negative_ttl_seconds: float = 30.0
+
+    class Config:
+        env_file = ".env"
+
+
+@dataclass(frozen=True)
+class VerifiedToken:
+    """A verified JWT payload with its pre-parsed scopes."""
+
+    payload: Dict
+    scopes: FrozenSet[str]
+    expires_at: float
+
+
+@dataclass(frozen=True)
+class _Rejection:
+    # The type and args rather than the instance: re-raising one instance
+    # would grow its traceback with every hit
+    error_type: Type[Exception]
+    args: Tuple
+    expires_at: float
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified JWT payloads with a negative cache."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_ttl: Optional[float] = None,
+        negative_max_entries: Optional[int] = None,
+        negative_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of verified tokens kept.
+            max_ttl: Lifetime of tokens that carry no ``exp`` claim.
+            negative_max_entries: Maximum number of rejected tokens kept.
+            negative_ttl: Seconds a rejected token is remembered.
+            clock: Wall clock, compared against ``exp``.
+        """
+        settings = TokenCacheSettings()
+        self.max_entries = max_entries or settings.jwt_cache_max_entries
+        self.max_ttl = (
+            settings.jwt_cache_max_ttl_seconds if max_ttl is None else max_ttl
+        )
+        self.negative_max_entries = (
+            negative_max_entries or settings.jwt_cache_negative_max_entries
+        )
+        self.negative_ttl = (
+            settings.jwt_cache_negative_ttl_seconds
+            if negative_ttl is None
+            else negative_ttl
+        )
+        self._clock = clock
+        self._entries: "OrderedDict[bytes, VerifiedToken]" = OrderedDict()
+        self._rejections: "OrderedDict[bytes, _Rejection]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(token: str, namespace: str = "") -> bytes:
+        """Return the cache key of the token.
+
+        The namespace (e.g. the signing secret) is folded into the digest so a
+        secret rotation invalidates every cached verification.
+        """
+        return hashlib.sha256(f"{namespace}\0{token}".encode()).digest()
+
+    def verify(
+        self,
+        token: str,
+        verifier: Callable[[str], Dict],
+        namespace: str = "",
+    ) -> VerifiedToken:
+        """Return the verified token, calling ``verifier`` only on a miss.
+
+        ``jwt.InvalidTokenError`` raised by the verifier is cached in the
+        negative cache and raised again, as a new instance, on subsequent
+        lookups; other errors are propagated without being cached.
+        """
+        key = self.key(token, namespace)
+        now = self._clock()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+                del self._entries[key]
+
+            rejection = self._rejections.get(key)
+            if rejection is not None:
+                if rejection.expires_at > now:
+                    self.negative_hits += 1
+                    raise rejection.error_type(*rejection.args)
+                del self._rejections[key]
+
+            self.misses += 1
+
+        try:
+            payload = verifier(token)
+        except jwt.InvalidTokenError as e:
+            self._reject(key, e, now)
+            raise
+
+        exp = payload.get("exp")
+        expires_at = float(exp) if exp is not None else now + self.max_ttl
+        scopes = payload.get("scopes") or []
+        if isinstance(scopes, str):
+            scopes = scopes.replace(",", " ").split()
+        entry = VerifiedToken(payload, frozenset(scopes), expires_at)
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def lookup(self, token: str, namespace: str = "") -> Optional[VerifiedToken]:
+        """Return the token if it was already verified, without verifying it."""
+        key = self.key(token, namespace)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= self._clock():
+            return None
+        return entry
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._rejections.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss counters and the current sizes."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "negative_hits": self.negative_hits,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "negative_size": len(self._rejections),
+        }
+
+    def _reject(self, key: bytes, error: Exception, now: float) -> None:
+        with self._lock:
+            self._rejections[key] = _Rejection(
+                type(error), error.args, now + self.negative_ttl
+            )
+            self._rejections.move_to_end(key)
+            while len(self._rejections) > self.negative_max_entries:
+                self._rejections.popitem(last=False)
+
+
+_cache: Optional[VerifiedTokenCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_token_cache() -> VerifiedTokenCache:
+    """Return the process-wide verified-JWT cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = VerifiedTokenCache()
+    return _cache
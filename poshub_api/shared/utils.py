@@ -1,16 +1,15 @@
 import logging
 import os
 
-import boto3
+from poshub_api.infrastructure.aws.parameters import get_parameter_provider
 
 
 def log_api_key() -> str:
     """Log API key and return it as string"""
-    ssm = boto3.client("ssm")
     param_path = os.getenv("API_KEY_PARAM", "/pos/api-key")
 
-    response = ssm.get_parameter(Name=param_path, WithDecryption=False)
-    api_key_value = response["Parameter"]["Value"]
+    parameter = get_parameter_provider().get_parameter(param_path)
+    api_key_value = parameter["Value"]
     logging.info(f"API KEY from SSM: {api_key_value}")
 
-    return {"name": response["Parameter"]["Name"], "ARN": response["Parameter"]["ARN"]}
+    return {"name": parameter["Name"], "ARN": parameter["ARN"]}
@@ -0,0 +1,87 @@
+"""This module implements the warm-up invocations of the Lambda handlers.
+
+Scheduled keep-warm pings send an event recognised by ``is_warmup_event``,
+e.g. an EventBridge rule with the constant input ``{"warmup": true}``. The
+handlers answer it without going through the ASGI app or the authorizer
+logic, after loading in parallel the resources real invocations would
+otherwise load on first use: SSM parameters, boto3 clients, the HTTP pool.
+The response reports how long each resource took to load, or its error.
+"""
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# ``source`` of the events sent by common keep-warm schedulers
+WARMUP_SOURCES = ("serverless-plugin-warmup", "poshub.warmup")
+
+
+@dataclass
+class WarmupTask:
+    """A resource to load, optionally once another one is loaded."""
+
+    name: str
+    load: Callable[[], Any]
+    after: Optional[str] = None
+
+
+def is_warmup_event(event: Any) -> bool:
+    """Return whether the Lambda event is a keep-warm ping."""
+    if not isinstance(event, dict):
+        return False
+    return bool(event.get("warmup")) or event.get("source") in WARMUP_SOURCES
+
+
+def warm_up(tasks: List[WarmupTask]) -> Dict:
+    """Load the resources in parallel and return the warm-up report.
+
+    A task with ``after`` starts once that task is done, even if it failed,
+    and its duration does not include the wait.
+    """
+    started = time.perf_counter()
+    futures: Dict[str, Future] = {}
+    with ThreadPoolExecutor(
+        max_workers=max(1, len(tasks)), thread_name_prefix="warmup"
+    ) as executor:
+        # Tasks are submitted in order, so a dependency is always submitted first
+        for task in tasks:
+            dependency = futures.get(task.after) if task.after else None
+            futures[task.name] = executor.submit(_run, task, dependency)
+        resources = {name: future.result() for name, future in futures.items()}
+
+    report = {
+        "warmup": True,
+        "duration_ms": round((time.perf_counter() - started) * 1e3, 1),
+        "resources": resources,
+    }
+    failed = [name for name, result in resources.items() if result["status"] != "ok"]
+    logger.info(
+        "Warm-up done",
+        duration_ms=report["duration_ms"],
+        warmed=len(resources) - len(failed),
+        failed=failed,
+    )
+    return report
+
+
+def _run(task: WarmupTask, dependency: Optional[Future]) -> Dict:
+    if dependency is not None:
+        dependency.result()
+    started = time.perf_counter()
+    try:
+        task.load()
+    except Exception as e:
+        return {
+            "status": "error",
+            "error": str(e) or type(e).__name__,
+            "duration_ms": round((time.perf_counter() - started) * 1e3, 1),
+        }
+    return {
+        "status": "ok",
+        "duration_ms": round((time.perf_counter() - started) * 1e3, 1),
+    }
@@ -0,0 +1,14 @@
+#!/usr/bin/env bash
+# Build the code packages deployed by sam-api.yml. Dependencies come from the
+# FastApiLayer; each package holds its handler and the poshub_api package,
+# which the authorizer and the order processor import as well.
+set -euo pipefail
+
+cd "$(dirname "$0")/.."
+
+rm -f lambda.zip authorizer.zip order_processor.zip
+zip -qr9 lambda.zip poshub_api openapi -x '*__pycache__*'
+zip -qr9 authorizer.zip authorizer.py poshub_api -x '*__pycache__*'
+zip -qr9 order_processor.zip order_processor.py poshub_api -x '*__pycache__*'
+
+echo "✅ Built lambda.zip, authorizer.zip and order_processor.zip"
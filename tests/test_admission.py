@@ -0,0 +1,203 @@
+import asyncio
+
+import httpx
+import jwt
+from fastapi import FastAPI
+
+from poshub_api.infrastructure.aws.parameters import ParameterProvider
+from poshub_api.shared import security
+from poshub_api.shared.admission import (
+    AdmissionMiddleware,
+    AdmissionSettings,
+    TokenBuckets,
+    request_subject,
+)
+from poshub_api.shared.metrics import registry
+from poshub_api.shared.token_cache import VerifiedTokenCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(coroutine):
+    # Not asyncio.run, which leaves no current event loop for later tests
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def make_middleware(release: asyncio.Event = None, **settings):
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/orders/all")
+    async def orders():
+        if release is not None:
+            await release.wait()
+        return []
+
+    @app.post("/orders/")
+    async def create():
+        return {}
+
+    settings.setdefault("admission_lag_interval_ms", 10_000)
+    return AdmissionMiddleware(
+        app, AdmissionSettings(**settings), clock=FakeClock(), verify=verify
+    )
+
+
+def verify(token: str):
+    try:
+        return jwt.decode(token, "secret", algorithms=["HS256"])["sub"]
+    except jwt.InvalidTokenError:
+        return None
+
+
+def bearer(sub: str, secret: str = "secret") -> dict:
+    return {"Authorization": "Bearer " + jwt.encode({"sub": sub}, secret)}
+
+
+def client(middleware) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=middleware), base_url="http://test"
+    )
+
+
+def test_token_bucket_refills_at_its_rate():
+    clock = FakeClock()
+    buckets = TokenBuckets(rate=2, burst=2, max_keys=1, clock=clock)
+
+    assert [buckets.take("a"), buckets.take("a")] == [0, 0]
+    assert buckets.take("a") == 0.5
+    clock.now = 0.5
+    assert buckets.take("a") == 0
+    # Past max_keys the least recently used bucket starts over
+    assert buckets.take("b") == 0
+    assert buckets.take("a") == 0
+
+
+def test_request_subject():
+    headers = bearer("pos-1")
+    scope = {"client": ("10.0.0.1", 1234)}
+    event = {"requestContext": {"authorizer": {"principalId": "pos-2"}}}
+    forged = bearer("pos-1", secret="forged")
+
+    assert request_subject(scope, httpx.Headers(headers), verify) == "sub:pos-1"
+    assert request_subject({**scope, "aws.event": event}, {}, verify) == "sub:pos-2"
+    assert request_subject(scope, httpx.Headers(forged), verify) == "ip:10.0.0.1"
+
+
+def test_cached_subject_neither_calls_ssm_nor_verifies(monkeypatch):
+    calls = []
+
+    class FakeSSM:
+        def get_parameter(self, Name, WithDecryption):
+            calls.append(Name)
+            return {"Parameter": {"Name": Name, "Value": "secret"}}
+
+    provider = ParameterProvider(client_factory=FakeSSM)
+    cache = VerifiedTokenCache()
+    monkeypatch.setenv("JWT_SECRET_PARAM", "/jwt")
+    monkeypatch.setattr(security, "get_parameter_provider", lambda: provider)
+    monkeypatch.setattr(security, "get_token_cache", lambda: cache)
+    token = jwt.encode({"sub": "pos-1"}, "secret")
+
+    assert security.cached_subject(token) is None
+    assert calls == []
+    provider.get("/jwt")
+    assert security.cached_subject(token) is None
+    cache.verify(token, lambda t: jwt.decode(t, "secret", ["HS256"]), "secret")
+    assert security.cached_subject(token) == "pos-1"
+    assert calls == ["/jwt"]
+
+
+def test_each_subject_is_rate_limited_and_health_is_exempt():
+    middleware = make_middleware(admission_burst=2, admission_rate_per_second=1)
+    shed = registry.admission_decisions.value(("shed", "rate_limit"))
+
+    async def scenario():
+        async with client(middleware) as http:
+            statuses = [
+                (await http.get("/orders/all", headers=bearer("pos-1"))).status_code
+                for _ in range(3)
+            ]
+            limited = await http.get("/orders/all", headers=bearer("pos-1"))
+            other = await http.get("/orders/all", headers=bearer("pos-2"))
+            health = [(await http.get("/health")).status_code for _ in range(5)]
+        return statuses, limited, other, health
+
+    statuses, limited, other, health = run(scenario())
+    assert statuses == [200, 200, 429]
+    assert limited.headers["retry-after"] == "1"
+    assert limited.json()["reason"] == "rate_limit"
+    assert other.status_code == 200
+    assert health == [200] * 5
+    assert registry.admission_decisions.value(("shed", "rate_limit")) == shed + 2
+
+
+def test_forged_tokens_do_not_spend_the_bucket_of_their_subject():
+    middleware = make_middleware(admission_burst=2, admission_rate_per_second=1)
+
+    async def scenario():
+        async with client(middleware) as http:
+            forged = [
+                await http.get("/orders/all", headers=bearer("pos-1", f"forged-{i}"))
+                for i in range(3)
+            ]
+            genuine = [
+                await http.get("/orders/all", headers=bearer("pos-1")) for _ in range(2)
+            ]
+        return forged, genuine
+
+    forged, genuine = run(scenario())
+    # Forged tokens share the bucket of their address, whatever their subject
+    assert [r.status_code for r in forged] == [200, 200, 429]
+    assert [r.status_code for r in genuine] == [200, 200]
+
+
+def test_requests_over_the_concurrency_limit_are_shed():
+    async def scenario():
+        release = asyncio.Event()
+        middleware = make_middleware(release, admission_max_concurrency=1)
+        async with client(middleware) as http:
+            first = asyncio.ensure_future(http.get("/orders/all"))
+            while middleware.in_flight == 0:
+                await asyncio.sleep(0.001)
+            second = await http.get("/orders/all")
+            release.set()
+            return (await first).status_code, second, middleware.in_flight
+
+    first, second, in_flight = run(scenario())
+    assert (first, second.status_code, in_flight) == (200, 503, 0)
+    assert second.json()["reason"] == "concurrency"
+
+
+def test_event_loop_lag_sheds_reads_then_everything():
+    middleware = make_middleware()
+
+    async def scenario():
+        async with client(middleware) as http:
+            assert (await http.get("/orders/all")).status_code == 200
+            middleware.monitor.lag = 0.2
+            lagging = [
+                (await http.get("/orders/all")).status_code,
+                (await http.post("/orders/")).status_code,
+            ]
+            middleware.monitor.lag = 0.6
+            critical = [
+                (await http.post("/orders/")).status_code,
+                (await http.get("/health")).status_code,
+            ]
+        return lagging, critical
+
+    assert run(scenario()) == ([503, 200], [503, 200])
@@ -0,0 +1,47 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from poshub_api.api.lazy import LazyRouter
+from poshub_api.main import OPENAPI_PATH, create_app, custom_openapi, load_openapi
+
+
+def test_lazy_router_imports_on_first_match():
+    app = FastAPI()
+    lazy = LazyRouter("poshub_api.api.routers.basics:router", ["/health"])
+    app.router.routes.append(lazy)
+    client = TestClient(app)
+
+    assert client.get("/missing").status_code == 404
+    assert lazy._router is None
+
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+    assert lazy._router is not None
+
+
+def test_lazy_router_reports_wrong_method():
+    app = FastAPI()
+    app.router.routes.append(
+        LazyRouter("poshub_api.api.routers.basics:router", ["/health"])
+    )
+
+    assert TestClient(app).post("/health").status_code == 405
+
+
+def test_openapi_is_loaded_from_file():
+    app = FastAPI()
+    app.openapi = lambda: load_openapi(app)
+
+    assert app.openapi() == json.loads(OPENAPI_PATH.read_text())
+    assert TestClient(app).get("/openapi.json").json()["info"]["title"]
+
+
+def test_openapi_file_matches_the_routes():
+    app = FastAPI()
+    generated = custom_openapi(create_app(cold_start=False))
+
+    # Regenerate with: python -m poshub_api.main
+    assert load_openapi(app) == json.loads(json.dumps(generated))
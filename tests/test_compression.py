@@ -0,0 +1,151 @@
+import asyncio
+import base64
+import gzip
+import json
+import zlib
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from mangum import Mangum
+from starlette.testclient import TestClient
+
+from poshub_api.shared.compression import (
+    CompressionMiddleware,
+    CompressionSettings,
+    base64_body,
+    negotiate,
+)
+
+ORDERS = [
+    {"order": i, "nom_client": f"Client {i}", "devise": "EUR"} for i in range(200)
+]
+
+
+def make_app(**settings) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, settings=CompressionSettings(**settings))
+
+    @app.get("/orders")
+    def orders():
+        return ORDERS
+
+    @app.get("/small")
+    def small():
+        return {"status": "ok"}
+
+    @app.get("/export")
+    def export():
+        lines = (json.dumps(order) + "\n" for order in ORDERS)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    return app
+
+
+def test_negotiate():
+    encodings = ["zstd", "br", "gzip"]
+    assert negotiate("gzip, deflate, br", encodings) == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5", encodings) == "gzip"
+    assert negotiate("*;q=0.1, zstd;q=0", encodings) == "br"
+    assert negotiate("identity", encodings) is None
+    assert negotiate("", encodings) is None
+
+
+def test_large_responses_are_compressed_with_the_negotiated_encoding():
+    client = TestClient(make_app(compression_gzip_level=9))
+
+    response = client.get("/orders", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(json.dumps(ORDERS)) / 4
+    assert response.json() == ORDERS
+
+    identity = client.get("/orders", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.json() == ORDERS
+
+
+def test_small_responses_are_not_compressed():
+    response = TestClient(make_app()).get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == {"status": "ok"}
+
+
+def test_streaming_response_is_compressed_chunk_by_chunk():
+    app = make_app(compression_minimum_size=0)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/export",
+        "raw_path": b"/export",
+        "query_string": b"",
+        "headers": [(b"accept-encoding", b"gzip")],
+        "http_version": "1.1",
+        "scheme": "http",
+        "server": ("test", 80),
+        "client": ("test", 1234),
+        "root_path": "",
+    }
+    messages = []
+
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # The client stays connected
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    # Not asyncio.run, which leaves no current event loop for Mangum
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(app(scope, receive, send))
+    finally:
+        loop.close()
+
+    start, *bodies = messages
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    # Every chunk decodes as soon as it is received
+    decompressor = zlib.decompressobj(31)
+    lines = []
+    for message in bodies:
+        chunk = decompressor.decompress(message["body"])
+        if message.get("more_body"):
+            assert chunk.endswith(b"\n")
+        lines += chunk.splitlines()
+    assert len(bodies) > 100
+    assert [json.loads(line) for line in lines] == ORDERS
+
+
+def test_compressed_lambda_responses_are_base64_encoded():
+    handler = Mangum(make_app(), lifespan="off")
+    event = {
+        "version": "2.0",
+        "routeKey": "GET /orders",
+        "rawPath": "/orders",
+        "rawQueryString": "",
+        "headers": {"accept-encoding": "gzip", "host": "api.example.com"},
+        "requestContext": {
+            "http": {"method": "GET", "path": "/orders", "sourceIp": "1.2.3.4"},
+            "stage": "$default",
+        },
+        "isBase64Encoded": False,
+    }
+
+    response = base64_body(handler(event, None))
+
+    assert response["isBase64Encoded"] is True
+    body = gzip.decompress(base64.b64decode(response["body"]))
+    assert json.loads(body) == ORDERS
+
+
+def test_base64_body_keeps_text_responses():
+    response = {"statusCode": 200, "headers": {}, "body": "{}"}
+
+    assert base64_body(response) == response
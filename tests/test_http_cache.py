@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from poshub_api.infrastructure.http.cache import (
+    ResponseCache,
+    UpstreamResponse,
+    cache_ttl,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeUpstream:
+    def __init__(self, cache_control=None, delay=0.0):
+        self.calls = []
+        self.cache_control = cache_control
+        self.delay = delay
+        self.fail = False
+        self.version = 1
+
+    async def __call__(self, etag):
+        self.calls.append(etag)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise HTTPException(status_code=408, detail="Failed to reach external API")
+        current = f'"v{self.version}"'
+        if etag == current:
+            return UpstreamResponse(None, current, self.cache_control, True)
+        return UpstreamResponse({"version": self.version}, current, self.cache_control)
+
+
+def test_cache_control_sets_the_ttl():
+    assert cache_ttl(None, 60) == 60
+    assert cache_ttl("public, max-age=120", 60) == 120
+    assert cache_ttl("max-age=120, s-maxage=30", 60) == 30
+    assert cache_ttl("no-cache", 60) == 0
+    assert cache_ttl("private, max-age=120", 60) is None
+    assert cache_ttl("no-store", 60) is None
+
+
+def test_concurrent_callers_share_one_request():
+    upstream = FakeUpstream(delay=0.05)
+    cache = ResponseCache(ttl=60)
+
+    async def burst():
+        return await asyncio.gather(*(cache.get("u", upstream) for _ in range(50)))
+
+    assert asyncio.run(burst()) == [{"version": 1}] * 50
+    assert upstream.calls == [None]
+    assert asyncio.run(cache.get("u", upstream)) == {"version": 1}
+    assert len(upstream.calls) == 1
+
+
+def test_expired_entry_is_revalidated_with_etag():
+    upstream, clock = FakeUpstream(cache_control="max-age=10"), FakeClock()
+    cache = ResponseCache(ttl=60, clock=clock)
+
+    asyncio.run(cache.get("u", upstream))
+    clock.now = 11
+    assert asyncio.run(cache.get("u", upstream)) == {"version": 1}
+    assert upstream.calls == [None, '"v1"']
+    assert cache.stats()["revalidated"] == 1
+
+    upstream.version = 2
+    clock.now = 22
+    assert asyncio.run(cache.get("u", upstream)) == {"version": 2}
+
+
+def test_stale_entry_served_on_upstream_error():
+    upstream, clock = FakeUpstream(), FakeClock()
+    cache = ResponseCache(ttl=10, max_stale=60, clock=clock)
+    asyncio.run(cache.get("u", upstream))
+
+    upstream.fail = True
+    clock.now = 30
+    assert asyncio.run(cache.get("u", upstream)) == {"version": 1}
+
+    clock.now = 100
+    with pytest.raises(HTTPException):
+        asyncio.run(cache.get("u", upstream))
@@ -0,0 +1,132 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from tenacity import wait_none
+
+from poshub_api.infrastructure.http import breaker as breaker_module
+from poshub_api.infrastructure.http import client as client_module
+from poshub_api.infrastructure.http.breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+)
+from poshub_api.infrastructure.http.client import fetch, pool_stats
+from poshub_api.infrastructure.http.hedging import LatencyTracker, hedged
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_then_half_opens_then_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()["opened"] == 2
+
+
+def test_open_breaker_fails_fast_without_calling_upstream(monkeypatch):
+    monkeypatch.setattr(breaker_module, "_breakers", {})
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(502)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            statuses = []
+            for _ in range(7):
+                with pytest.raises(HTTPException) as e:
+                    await fetch(client, "http://upstream.test/posts")
+                statuses.append(e.value.status_code)
+            return statuses
+
+    assert asyncio.run(run()) == [400] * 5 + [503] * 2
+    assert len(calls) == 5
+
+
+def test_network_errors_are_retried_before_failing(monkeypatch):
+    monkeypatch.setattr(breaker_module, "_breakers", {})
+    monkeypatch.setattr(client_module._send.retry, "wait", wait_none())
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if request.url.path == "/flaky" and len(calls) == 1:
+            raise httpx.ConnectError("connection reset")
+        if request.url.path == "/down":
+            raise httpx.ConnectError("connection refused")
+        return httpx.Response(200, json={"ok": True})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            response = await fetch(client, "http://upstream.test/flaky")
+            with pytest.raises(HTTPException) as e:
+                await fetch(client, "http://upstream.test/down")
+            return response, e.value.status_code
+
+    response, status = asyncio.run(run())
+    assert response.data == {"ok": True}
+    assert status == 408
+    assert len(calls) == 4
+    stats = breaker_module.get_breaker("upstream.test").stats()
+    assert stats["consecutive_failures"] == 1
+
+
+def test_slow_request_is_hedged():
+    tracker = LatencyTracker(min_samples=1, min_delay=0.01, max_delay=1)
+    tracker.record(0.01)
+    delays = iter([1.0, 0.0])
+
+    async def call():
+        delay = next(delays)
+        await asyncio.sleep(delay)
+        return delay
+
+    assert asyncio.run(hedged(call, tracker)) == 0.0
+    assert tracker.stats()["hedged"] == 1
+    assert tracker.stats()["hedge_wins"] == 1
+
+
+def test_hedging_waits_for_enough_samples():
+    tracker = LatencyTracker(min_samples=5)
+    for _ in range(4):
+        tracker.record(0.2)
+    assert tracker.delay() is None
+    tracker.record(0.2)
+    assert tracker.delay() == pytest.approx(0.2)
+
+
+def test_pool_stats_reports_limits():
+    async def run():
+        async with httpx.AsyncClient() as client:
+            return pool_stats(client)
+
+    stats = asyncio.run(run())
+    assert stats["connections"] == 0
+    assert stats["max_connections"] == 100
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+
+import pytest
+from starlette.testclient import TestClient
+
+from poshub_api.api.routers import orders
+from poshub_api.infrastructure.storage.kv import (
+    MemoryKeyValueStore,
+    SQLiteKeyValueStore,
+)
+from poshub_api.main import app
+from poshub_api.services.idempotency import IdempotencyCache
+from poshub_api.shared.exceptions import IdempotencyConflictError
+from poshub_api.shared.security import verify_token
+from poshub_api.shared.token_cache import VerifiedToken
+
+ORDER = {"nom_client": "client", "montant": 10.0, "devise": "EUR"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    sent = []
+
+    async def publish(body, wait=None):
+        sent.append(body)
+        return "message-id"
+
+    cache = IdempotencyCache(MemoryKeyValueStore())
+    monkeypatch.setattr(orders.sqs_outbox, "publish", publish)
+    monkeypatch.setattr(orders, "get_idempotency_cache", lambda: cache)
+    app.dependency_overrides[verify_token] = lambda: VerifiedToken(
+        {"sub": "pos-1"}, frozenset({"orders:write"}), float("inf")
+    )
+    try:
+        yield TestClient(app), sent
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_retry_with_same_key_replays_the_order(client):
+    client, sent = client
+    headers = {"Idempotency-Key": "retry-1"}
+
+    first = client.post("/orders/", json=ORDER, headers=headers)
+    retry = client.post("/orders/", json=ORDER, headers=headers)
+    other = client.post("/orders/", json=ORDER, headers={"Idempotency-Key": "2"})
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.content == first.content
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert other.json()["order"] != first.json()["order"]
+    assert len(sent) == 2
+
+
+def test_key_reused_with_another_body_is_rejected(client):
+    client, sent = client
+    headers = {"Idempotency-Key": "retry-1"}
+
+    client.post("/orders/", json=ORDER, headers=headers)
+    response = client.post("/orders/", json={**ORDER, "montant": 11}, headers=headers)
+
+    assert response.status_code == 409
+    assert len(sent) == 1
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_concurrent_requests_share_one_call(tmp_path, backend):
+    if backend == "sqlite":
+        store = SQLiteKeyValueStore(str(tmp_path / "idempotency.db"))
+    else:
+        store = MemoryKeyValueStore()
+    cache = IdempotencyCache(store, poll_interval=0.01)
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 201, b'{"order": 1}'
+
+    async def main():
+        return await asyncio.gather(*(cache.run("k", "f", handler) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert [replayed for _, replayed in results].count(False) == 1
+    assert {response.body for response, _ in results} == {b'{"order": 1}'}
+
+
+def test_blocking_store_is_called_off_the_loop(tmp_path):
+    threads = set()
+
+    class RecordingStore(SQLiteKeyValueStore):
+        def get(self, key):
+            threads.add(threading.get_ident())
+            return super().get(key)
+
+        def add(self, key, value, ttl=None):
+            threads.add(threading.get_ident())
+            return super().add(key, value, ttl)
+
+    cache = IdempotencyCache(RecordingStore(str(tmp_path / "idempotency.db")))
+
+    async def handler():
+        return 201, b"{}"
+
+    asyncio.run(cache.run("k", "f", handler))
+
+    assert threads and threading.get_ident() not in threads
+
+
+def test_failed_request_releases_the_key():
+    cache = IdempotencyCache(MemoryKeyValueStore())
+
+    async def fail():
+        raise RuntimeError("SQS down")
+
+    async def succeed():
+        return 201, b"{}"
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.run("k", "f", fail))
+    response, replayed = asyncio.run(cache.run("k", "f", succeed))
+    assert (response.status_code, replayed) == (201, False)
+
+
+def test_key_pending_elsewhere_times_out():
+    store = MemoryKeyValueStore()
+    # Pending marker of another worker that never completes
+    store.add("k", b"f\n0\n")
+    cache = IdempotencyCache(store, lock_timeout=0.05, poll_interval=0.01)
+
+    async def handler():
+        return 201, b"{}"
+
+    with pytest.raises(IdempotencyConflictError):
+        asyncio.run(cache.run("k", "f", handler))
@@ -0,0 +1,72 @@
+import json
+import logging
+import queue
+
+import structlog
+
+from poshub_api.shared.logging import (
+    AsyncQueueHandler,
+    LoggingSettings,
+    SamplingFilter,
+    _add_sampling,
+    add_record_context,
+)
+
+
+def make_record(name: str, level: int, msg: str = "event %s") -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, ("x",), None)
+
+
+def test_sampling_keeps_warnings_and_other_loggers():
+    sampler = SamplingFilter(rate=4, loggers=("poshub_api.shared.security",))
+
+    kept = [
+        sampler.filter(make_record("poshub_api.shared.security", logging.INFO))
+        for _ in range(100)
+    ]
+    assert sum(kept) == 25
+    assert sampler.filter(make_record("poshub_api.shared.security", logging.WARNING))
+    assert sampler.filter(make_record("poshub_api.main", logging.INFO))
+
+
+def test_sampling_is_added_once_per_handler():
+    handler = logging.StreamHandler()
+    settings = LoggingSettings(log_info_sample_rate=4)
+
+    _add_sampling([handler], settings)
+    _add_sampling([handler], settings)
+
+    assert len(handler.filters) == 1
+
+
+def test_queued_records_keep_the_correlation_id():
+    log_queue = queue.Queue()
+    handler = AsyncQueueHandler(log_queue)
+    formatter = structlog.stdlib.ProcessorFormatter(
+        foreign_pre_chain=[add_record_context],
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.JSONRenderer(),
+        ],
+    )
+
+    structlog.contextvars.bind_contextvars(correlation_id="abc")
+    try:
+        handler.handle(make_record("poshub_api.shared.security", logging.INFO))
+    finally:
+        structlog.contextvars.clear_contextvars()
+
+    # Rendered later, as the listener thread does, outside the request context
+    record = log_queue.get_nowait()
+    assert record.msg == "event %s"
+    assert json.loads(formatter.format(record)) == {
+        "event": "event x",
+        "correlation_id": "abc",
+    }
+
+
+def test_full_queue_drops_records():
+    handler = AsyncQueueHandler(queue.Queue(maxsize=1))
+    for _ in range(3):
+        handler.handle(make_record("poshub_api.api.routers.orders", logging.INFO))
+    assert handler.dropped == 2
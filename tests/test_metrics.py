@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from starlette.testclient import TestClient
+
+from poshub_api.shared import middleware
+from poshub_api.shared.metrics import (
+    Histogram,
+    emf_line,
+    record_phase,
+    registry,
+    timed_phase,
+)
+from poshub_api.shared.middleware import correlation_id_middleware
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.middleware("http")(correlation_id_middleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        with timed_phase("service"):
+            record_phase("ssm", 0.002)
+        record_phase("ssm", 0.001)
+        return {"id": item_id}
+
+    return app
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), (0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(("/a",), value)
+
+    lines = list(histogram.render())
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{route="/a"} 4' in lines
+
+
+def test_requests_record_route_metrics_and_server_timing():
+    client = TestClient(make_app())
+
+    response = client.get("/items/1", headers={"X-Correlation-ID": "abc"})
+
+    timing = dict(
+        entry.split(";dur=") for entry in response.headers["Server-Timing"].split(", ")
+    )
+    assert set(timing) == {"service", "ssm", "total"}
+    assert float(timing["ssm"]) >= 3.0
+    rendered = registry.render()
+    assert (
+        'poshub_http_request_duration_seconds_count{method="GET",'
+        'route="/items/{item_id}",status="200"}'
+    ) in rendered
+    assert registry.requests_in_flight.value(("GET", "/items/{item_id}")) == 0
+
+
+def test_streamed_responses_are_measured_until_sent(monkeypatch):
+    app = make_app()
+    in_flight, observed = [], []
+
+    @app.get("/stream")
+    def stream():
+        async def body():
+            yield b"first"
+            await asyncio.sleep(0.05)
+            in_flight.append(registry.requests_in_flight.value(("GET", "/stream")))
+            yield b"last"
+
+        return StreamingResponse(body())
+
+    monkeypatch.setattr(
+        registry.request_duration,
+        "observe",
+        lambda labels, value: observed.append((labels, value)),
+    )
+    response = TestClient(app).get("/stream")
+
+    assert response.content == b"firstlast"
+    assert in_flight == [1]
+    assert registry.requests_in_flight.value(("GET", "/stream")) == 0
+    assert observed[0][0] == ("GET", "/stream", "200")
+    assert observed[0][1] >= 0.05
+
+
+def test_emf_lines_are_written_per_request(monkeypatch, capsys):
+    monkeypatch.setattr(middleware.settings, "metrics_emf", True)
+    client = TestClient(make_app())
+
+    client.get("/items/2", headers={"X-Correlation-ID": "abc"})
+
+    line = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    metrics = line["_aws"]["CloudWatchMetrics"][0]
+    assert metrics["Dimensions"] == [["route"]]
+    assert {m["Name"] for m in metrics["Metrics"]} == {
+        "latency",
+        "service_latency",
+        "ssm_latency",
+    }
+    assert line["route"] == "/items/{item_id}"
+    assert line["correlation_id"] == "abc"
+
+
+def test_emf_line_without_phases():
+    line = json.loads(emf_line("Poshub", "GET", "/health", 200, 0.01, {}))
+    assert line["latency"] == 10.0
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+from poshub_api.api.routers import orders
+from poshub_api.main import app
+from poshub_api.shared.security import verify_token
+from poshub_api.shared.token_cache import VerifiedToken
+
+
+def order(name: str = "client") -> dict:
+    return {"nom_client": name, "montant": 10.0, "devise": "EUR"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    sent = []
+
+    async def publish(body, wait=None):
+        if json.loads(body)["nom_client"] == "unsendable":
+            raise RuntimeError("SQS unavailable")
+        sent.append(body)
+        return "message-id"
+
+    monkeypatch.setattr(orders.sqs_outbox, "publish", publish)
+    app.dependency_overrides[verify_token] = lambda: VerifiedToken(
+        {"sub": "pos-1"}, frozenset({"orders:write"}), float("inf")
+    )
+    try:
+        yield TestClient(app), sent
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_batch_reports_each_item(client):
+    client, sent = client
+
+    response = client.post(
+        "/orders/batch",
+        json=[
+            order("a"),
+            {"nom_client": "b"},
+            {**order("c"), "montant": "ten"},
+            order("d"),
+        ],
+    )
+
+    assert response.status_code == 207
+    body = response.json()
+    assert (body["created"], body["failed"]) == (2, 2)
+    assert [item["status"] for item in body["items"]] == [201, 422, 422, 201]
+    assert [item["index"] for item in body["items"]] == [0, 1, 2, 3]
+    assert body["items"][1]["errors"][0]["loc"] == ["montant"]
+    assert body["items"][0]["order"]["created_by"] == "pos-1"
+    assert [json.loads(b)["nom_client"] for b in sent] == ["a", "d"]
+
+
+def test_batch_reports_orders_not_sent_to_sqs(client):
+    client, sent = client
+
+    response = client.post("/orders/batch", json=[order("a"), order("unsendable")])
+
+    items = response.json()["items"]
+    assert [item["status"] for item in items] == [201, 500]
+    # Created, so returned with its id, but not published
+    assert items[1]["order"]["nom_client"] == "unsendable"
+    assert items[1]["errors"] == [{"msg": "Failed to send order to SQS"}]
+    assert len(sent) == 1
+
+
+def test_batch_over_the_maximum_size_is_rejected(client, monkeypatch):
+    client, sent = client
+    monkeypatch.setattr(orders, "BATCH_MAX_SIZE", 2)
+
+    response = client.post("/orders/batch", json=[order()] * 3)
+
+    assert response.status_code == 413
+    assert sent == []
+
+
+def test_batch_body_must_be_a_list(client):
+    client, _ = client
+
+    assert client.post("/orders/batch", json=order()).status_code == 422
+
+
+def test_batch_body_is_documented_as_a_list_of_orders():
+    schema = app.openapi()
+    body = schema["paths"]["/orders/batch"]["post"]["requestBody"]
+
+    items = body["content"]["application/json"]["schema"]["items"]
+    assert items == {"$ref": "#/components/schemas/OrderIn"}
+    assert "OrderIn" in schema["components"]["schemas"]
@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+from poshub_api.domain.models import OrderFilter, OrderIn
+from poshub_api.services.order_feed import (
+    DROPPED_EVENT,
+    HEARTBEAT,
+    RESET_EVENT,
+    OrderFeed,
+    OrderFeedSettings,
+)
+from poshub_api.services.order_service import OrderService
+
+
+def run(coroutine):
+    # Not asyncio.run, which leaves no current event loop for later tests
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def create(service: OrderService, currency: str = "EUR", amount: float = 10.0):
+    return service.create_order(
+        OrderIn(nom_client="client", montant=amount, devise=currency),
+        user_context={"sub": "pos-1"},
+    )
+
+
+def parse(event: bytes):
+    fields = dict(line.split(": ", 1) for line in event.decode().strip().split("\n"))
+    return int(fields["id"]), json.loads(fields["data"])
+
+
+def make_service(**settings) -> OrderService:
+    service = OrderService()
+    service.feed = OrderFeed(OrderFeedSettings(**settings))
+    return service
+
+
+def test_subscribers_receive_matching_orders_as_they_are_created():
+    service = make_service(order_feed_heartbeat_seconds=0.05)
+
+    async def scenario():
+        events = service.subscribe(OrderFilter(currency="EUR", min_amount=5))
+        first = asyncio.ensure_future(events.__anext__())
+        await asyncio.sleep(0)
+        create(service, "USD")
+        create(service, "EUR", amount=1.0)
+        order = create(service, "EUR")
+        received = [await first]
+        # Nothing else matches, so the next event is a heartbeat
+        received.append(await events.__anext__())
+        assert service.feed.subscribers == 1
+        await events.aclose()
+        assert service.feed.subscribers == 0
+        return order, received
+
+    order, (event, heartbeat) = run(scenario())
+    assert parse(event) == (2, json.loads(order.to_json()))
+    assert heartbeat == HEARTBEAT
+
+
+def test_resume_replays_missed_orders_from_the_ring_buffer():
+    service = make_service(order_feed_buffer_size=4)
+    for _ in range(6):
+        create(service)
+
+    async def first_events(last_event_id, count):
+        events = service.subscribe(last_event_id=last_event_id)
+        try:
+            return [await events.__anext__() for _ in range(count)]
+        finally:
+            await events.aclose()
+
+    assert [parse(e)[0] for e in run(first_events(3, 2))] == [4, 5]
+    # Orders 1 and 2 left the buffer; an id ahead of this process is unknown
+    assert run(first_events(0, 1)) == [RESET_EVENT]
+    assert run(first_events(10, 1)) == [RESET_EVENT]
+
+
+def test_slow_subscriber_is_disconnected():
+    service = make_service(order_feed_subscriber_queue_size=2)
+
+    async def scenario():
+        events = service.subscribe()
+        first = asyncio.ensure_future(events.__anext__())
+        await asyncio.sleep(0)
+        for _ in range(5):
+            create(service)
+        received = [await first]
+        async for event in events:
+            received.append(event)
+        return received
+
+    received = run(scenario())
+    assert [parse(e)[0] for e in received[:2]] == [0, 1]
+    assert received[2:] == [DROPPED_EVENT]
+    assert service.feed.dropped == 1
+    assert service.feed.subscribers == 0
@@ -0,0 +1,115 @@
+import os
+import threading
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from poshub_api.domain.models import OrderFilter, OrderOut
+from poshub_api.infrastructure.storage.journal import JournalOrderStore
+from poshub_api.services.order_service import OrderService
+
+
+def make_order(i: int) -> OrderOut:
+    return OrderOut(
+        order=uuid4(),
+        created_at=datetime(2025, 7, 1, 12, 0, i % 60, 123456),
+        nom_client=f"Café {i}",
+        montant=i + 0.5,
+        devise="EUR" if i % 2 else "MAD",
+        created_by=None if i % 3 == 0 else f"pos-{i % 3}",
+    )
+
+
+def open_store(path, **kwargs) -> JournalOrderStore:
+    return JournalOrderStore(str(path), snapshot_interval=0, **kwargs)
+
+
+def test_orders_survive_restart_through_snapshot_and_journal(tmp_path):
+    orders = [make_order(i) for i in range(3000)]
+    store = open_store(tmp_path)
+    store.add_many(orders[:2000])
+    store.compact()
+    for order in orders[2000:]:
+        store.add(order)
+    store.close()
+
+    assert sorted(os.listdir(tmp_path)) == [
+        "journal.00000001",
+        "orders.snapshot",
+        "store.id",
+    ]
+    reopened = open_store(tmp_path)
+    assert len(reopened) == 3000
+    assert reopened.store_id == store.store_id
+    assert list(reopened.values()) == orders
+    assert reopened[orders[2500].order_id] == orders[2500]
+    assert reopened.row_of(orders[10].order_id) == 10
+    assert reopened.row_of(uuid4()) is None
+
+    # A second restart replays the same journal and appends to it
+    reopened.add(make_order(3000))
+    reopened.close()
+    assert len(open_store(tmp_path)) == 3001
+
+
+def test_torn_journal_record_is_truncated(tmp_path):
+    store = open_store(tmp_path)
+    store.add_many([make_order(i) for i in range(3)])
+    store.close()
+    journal = tmp_path / "journal.00000000"
+    intact = journal.stat().st_size
+    with open(journal, "ab") as f:
+        f.write(b"\x40\x00\x00\x00torn")
+
+    assert len(open_store(tmp_path)) == 3
+    assert journal.stat().st_size == intact
+
+
+def test_concurrent_durable_writes_share_fsyncs(tmp_path):
+    store = open_store(tmp_path, durable_writes=True, commit_interval=0.01)
+    threads = [
+        threading.Thread(target=lambda: store.add(make_order(1))) for _ in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store._writer.commits < 20
+    store.close()
+    assert len(open_store(tmp_path)) == 20
+
+
+def test_writes_fail_once_a_journal_commit_failed(tmp_path):
+    class FailingFile:
+        def write(self, data):
+            raise OSError(28, "No space left on device")
+
+        def close(self):
+            pass
+
+    store = open_store(tmp_path, commit_interval=0)
+    store._writer._file = FailingFile()
+    store.add(make_order(0))
+
+    with pytest.raises(OSError):
+        store.flush()
+    for _ in range(2):
+        with pytest.raises(OSError) as error:
+            store.add(make_order(1))
+        assert len(error.traceback) < 10
+    # Not acknowledged, so not stored either
+    assert len(store) == 1
+
+
+def test_order_service_indexes_loaded_orders_on_first_listing(tmp_path):
+    store = open_store(tmp_path)
+    store.add_many([make_order(i) for i in range(100)])
+    store.close()
+
+    service = OrderService(store=open_store(tmp_path))
+    page = service.list_orders(OrderFilter(currency="EUR"), limit=1000)
+
+    assert len(page.items) == 50
+    assert service.get_order_by_id(page.items[0].order_id) == page.items[0]
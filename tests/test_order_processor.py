@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from order_processor import process_order
+from poshub_api.infrastructure.storage.kv import (
+    MemoryKeyValueStore,
+    SQLiteKeyValueStore,
+)
+from poshub_api.services.sqs_batch import SQSBatchProcessor
+
+
+def make_records(amounts):
+    return [
+        {"messageId": f"msg-{i}", "body": json.dumps({"id": i, "montant": amount})}
+        for i, amount in enumerate(amounts)
+    ]
+
+
+class FakeContext:
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+@pytest.mark.parametrize("mode", ["thread", "asyncio"])
+def test_failures_are_reported_per_message(mode):
+    processor = SQSBatchProcessor(process_order, max_concurrency=4, mode=mode)
+    records = make_records([10, -1, 5, -1]) + [{"messageId": "bad", "body": "{"}]
+
+    response = processor.process(records)
+
+    assert response == {
+        "batchItemFailures": [
+            {"itemIdentifier": "msg-1"},
+            {"itemIdentifier": "msg-3"},
+            {"itemIdentifier": "bad"},
+        ]
+    }
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_redelivered_messages_are_skipped(backend, tmp_path):
+    store = (
+        MemoryKeyValueStore()
+        if backend == "memory"
+        else SQLiteKeyValueStore(str(tmp_path / "dedupe.db"))
+    )
+    calls = []
+    processor = SQSBatchProcessor(calls.append, dedupe_store=store)
+    records = make_records([1, 2, 3])
+
+    processor.process(records)
+    processor.process(records)
+
+    assert len(calls) == 3
+
+
+def test_messages_are_not_started_past_the_deadline():
+    processor = SQSBatchProcessor(process_order)
+
+    response = processor.process(make_records([1, 2]), FakeContext(500))
+
+    assert len(response["batchItemFailures"]) == 2
+
+
+def test_expired_message_ids_are_purged_periodically(tmp_path):
+    now = [0.0]
+    store = SQLiteKeyValueStore(str(tmp_path / "dedupe.db"), clock=lambda: now[0])
+    processor = SQSBatchProcessor(
+        process_order, dedupe_store=store, dedupe_ttl=10, purge_every=2
+    )
+
+    def stored():
+        return store._connection().execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+    processor.process(make_records([10, 5]))
+    now[0] = 20
+    processor.process([{"messageId": "late-1", "body": json.dumps({"montant": 1})}])
+    assert stored() == 3
+    processor.process([{"messageId": "late-2", "body": json.dumps({"montant": 1})}])
+    assert stored() == 2
@@ -0,0 +1,130 @@
+import json
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from starlette.testclient import TestClient
+
+from poshub_api.api.routers import orders
+from poshub_api.domain.models import OrderIn, OrderOut
+from poshub_api.main import app
+from poshub_api.services.order_service import OrderService
+from poshub_api.shared.security import verify_token
+from poshub_api.shared.token_cache import VerifiedToken
+
+
+@pytest.fixture
+def client(monkeypatch):
+    sent = []
+
+    async def publish(body, wait=None):
+        sent.append(body)
+        return "message-id"
+
+    monkeypatch.setattr(orders.sqs_outbox, "publish", publish)
+    app.dependency_overrides[verify_token] = lambda: VerifiedToken(
+        {"sub": "pos-1"}, frozenset({"orders:write"}), float("inf")
+    )
+    try:
+        yield TestClient(app), sent
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_trusted_order_matches_validated_order():
+    values = dict(
+        order_id=uuid4(),
+        created_at=datetime(2024, 1, 2, 3, 4, 5, 6),
+        customer_name="client",
+        total_amount=12.5,
+        currency="EUR",
+        created_by=None,
+    )
+    trusted = OrderOut.trusted(**values)
+    validated = OrderOut(
+        order=values["order_id"],
+        created_at=values["created_at"],
+        nom_client=values["customer_name"],
+        montant=values["total_amount"],
+        devise=values["currency"],
+        created_by=None,
+    )
+
+    assert trusted == validated
+    assert json.loads(trusted.to_json()) == jsonable_encoder(validated)
+
+
+def test_order_is_serialized_once_for_sqs_and_response(client):
+    client, sent = client
+
+    response = client.post(
+        "/orders/", json={"nom_client": "client", "montant": 10.0, "devise": "EUR"}
+    )
+
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/json"
+    assert sent == [response.text]
+    order = response.json()
+    assert order["created_by"] == "pos-1"
+
+    fetched = client.get(f"/orders/{order['order']}")
+    assert fetched.content == response.content
+    listed = client.get("/orders/all", params={"created_by": "pos-1", "limit": 1000})
+    assert order in listed.json()
+
+
+def test_order_etag_is_answered_before_reading_the_order(client, monkeypatch):
+    client, _ = client
+    order = client.post(
+        "/orders/", json={"nom_client": "client", "montant": 10.0, "devise": "EUR"}
+    ).json()
+    response = client.get(f"/orders/{order['order']}")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"].startswith("private, max-age=")
+    # An order that does not exist here matches no ETag
+    missing = client.get(f"/orders/{uuid4()}", headers={"If-None-Match": "*"})
+    assert missing.status_code == 404
+
+    def read(self, order_id):
+        raise AssertionError("the order was read")
+
+    monkeypatch.setattr(OrderService, "get_order_by_id", read)
+    revalidated = client.get(
+        f"/orders/{order['order']}", headers={"If-None-Match": f'"x", W/{etag}'}
+    )
+
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+
+def test_listing_etag_changes_with_each_created_order(client):
+    client, _ = client
+    first = client.get("/orders/all", params={"limit": 1})
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    revalidated = client.get(
+        "/orders/all", params={"limit": 1}, headers={"If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+
+    client.post(
+        "/orders/", json={"nom_client": "client", "montant": 10.0, "devise": "EUR"}
+    )
+    changed = client.get(
+        "/orders/all", params={"limit": 1}, headers={"If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_listing_etags_differ_between_processes_with_equal_counts():
+    order_in = OrderIn(nom_client="client", montant=10.0, devise="EUR")
+    worker_1, worker_2 = OrderService(), OrderService()
+    worker_1.create_order(order_in)
+    worker_2.create_order(order_in)
+
+    assert len(worker_1.orders) == len(worker_2.orders)
+    assert worker_1.version != worker_2.version
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from poshub_api.domain.models import OrderFilter, OrderIn, OrderOut
+from poshub_api.services import order_index
+from poshub_api.services.order_index import OrderIndex
+from poshub_api.services.order_service import OrderService
+from poshub_api.shared.exceptions import InvalidCursorError
+
+
+def make_service(n: int = 30) -> OrderService:
+    service = OrderService()
+    for i in range(n):
+        service.create_order(
+            OrderIn(
+                nom_client=f"client-{i}",
+                montant=float(i),
+                devise="EUR" if i % 3 else "USD",
+            ),
+            user_context={"sub": f"pos-{i % 2}"},
+        )
+    return service
+
+
+def test_cursor_pagination_walks_every_order_once():
+    service = make_service()
+
+    seen, cursor = [], None
+    while True:
+        page = service.list_orders(cursor=cursor, limit=7)
+        seen.extend(order.customer_name for order in page.items)
+        cursor = page.next_cursor
+        if not cursor:
+            break
+
+    assert seen == [f"client-{i}" for i in range(30)]
+
+
+def test_filters_are_combined():
+    service = make_service()
+
+    page = service.list_orders(
+        OrderFilter(created_by="pos-0", currency="USD", min_amount=5, max_amount=20)
+    )
+
+    assert [order.total_amount for order in page.items] == [6.0, 12.0, 18.0]
+
+
+def test_amount_filtered_pages_are_in_time_order():
+    service = OrderService()
+    for i in range(200):
+        service.create_order(
+            OrderIn(nom_client=f"client-{i}", montant=float(i * 37 % 200), devise="EUR")
+        )
+    filters = OrderFilter(min_amount=150)
+
+    seen, cursor = [], None
+    while True:
+        page = service.list_orders(filters, cursor=cursor, limit=7)
+        seen.extend(order.customer_name for order in page.items)
+        cursor = page.next_cursor
+        if not cursor:
+            break
+
+    expected = [f"client-{i}" for i in range(200) if i * 37 % 200 >= 150]
+    assert seen == expected
+    assert [o.customer_name for o in service.iter_orders(filters)] == expected
+
+
+def test_date_range_filter():
+    service = make_service(5)
+    created = [order.created_at for order in service.orders.values()]
+
+    page = service.list_orders(
+        OrderFilter(created_from=created[1], created_to=created[3])
+    )
+    assert [order.created_at for order in page.items] == created[1:4]
+
+    page = service.list_orders(
+        OrderFilter(created_from=datetime.utcnow() + timedelta(days=1))
+    )
+    assert page.items == []
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(InvalidCursorError):
+        make_service(1).list_orders(cursor="not-a-cursor")
+
+
+def test_iter_orders_resumes_after_an_order():
+    service = make_service(10)
+    orders = list(service.iter_orders(OrderFilter(currency="EUR")))
+
+    resumed = service.iter_orders(
+        OrderFilter(currency="EUR"), cursor=service.cursor_after(orders[2].order_id)
+    )
+
+    assert list(resumed) == orders[3:]
+
+
+def test_iter_orders_filters_amounts_without_collecting_matches(monkeypatch):
+    service = make_service(10)
+
+    def collect(lo, hi):
+        raise AssertionError("an export must not collect every amount match")
+
+    monkeypatch.setattr(service._index._by_amount, "range", collect)
+    orders = service.iter_orders(OrderFilter(min_amount=4, max_amount=6))
+
+    assert [order.total_amount for order in orders] == [4.0, 5.0, 6.0]
+
+
+def test_scan_survives_inserts_while_suspended(monkeypatch):
+    monkeypatch.setattr(order_index, "SCAN_BATCH_SIZE", 4)
+    monkeypatch.setattr(order_index._SortedRows, "CHUNK_SIZE", 2)
+    index = OrderIndex()
+
+    def add(seconds: float) -> int:
+        created_at = datetime(2025, 1, 1) + timedelta(seconds=seconds)
+        return index.add(
+            OrderOut.trusted(uuid4(), created_at, "client", seconds, "EUR", None)
+        )
+
+    rows = [add(i) for i in range(10)]
+    scan = index.scan(OrderFilter())
+    first = [next(scan) for _ in range(5)]
+    # Shifts the rows of the time index and splits chunks of the amount index
+    add(2.5)
+    add(20)
+    page = index.query(OrderFilter(min_amount=0, max_amount=3), limit=10)
+
+    assert first + list(scan) == rows
+    assert len(page.rows) == 5
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from starlette.testclient import TestClient
+
+from poshub_api.domain.models import OrderIn, OrderOut
+from poshub_api.main import app
+from poshub_api.services.order_service import OrderService
+from poshub_api.services.order_stats import OrderStatsAggregator, OrderStatsSettings
+from poshub_api.shared.dependencies import get_order_service
+
+START = datetime(2025, 7, 1, 12, 0)
+
+
+def make_order(minute: int, amount: float, currency: str, by=None) -> OrderOut:
+    return OrderOut.trusted(
+        order_id=uuid4(),
+        created_at=START + timedelta(minutes=minute, seconds=30),
+        customer_name="client",
+        total_amount=amount,
+        currency=currency,
+        created_by=by,
+    )
+
+
+def test_aggregates_per_currency_terminal_and_bucket():
+    stats = OrderStatsAggregator()
+    for order in [
+        make_order(0, 10.0, "EUR", "pos-1"),
+        make_order(1, 5.0, "EUR", "pos-2"),
+        make_order(61, 7.5, "MAD", "pos-1"),
+        make_order(62, 2.5, "EUR"),
+    ]:
+        stats.add(order)
+
+    result = stats.stats("hour")
+    assert result.count == 4
+    eur = result.by_currency["EUR"]
+    assert (eur.count, eur.sum, eur.min, eur.max) == (3, 17.5, 2.5, 10.0)
+    assert {g.created_by: set(g.by_currency) for g in result.by_created_by} == {
+        "pos-1": {"EUR", "MAD"},
+        "pos-2": {"EUR"},
+        None: {"EUR"},
+    }
+    assert [(b.start, set(b.by_currency)) for b in result.buckets] == [
+        (START, {"EUR"}),
+        (START + timedelta(hours=1), {"EUR", "MAD"}),
+    ]
+    assert stats.stats("day").buckets[0].by_currency["EUR"].count == 3
+
+    mad = stats.stats("minute", created_from=START + timedelta(minutes=61, seconds=45))
+    assert [b.start.minute for b in mad.buckets] == [1, 2]
+    only_mad = stats.stats("minute", currency="MAD")
+    assert only_mad.count == 1
+    assert [g.created_by for g in only_mad.by_created_by] == ["pos-1"]
+    assert len(only_mad.buckets) == 1
+
+
+def test_minute_buckets_are_bounded():
+    stats = OrderStatsAggregator(OrderStatsSettings(order_stats_minute_buckets=10))
+    for minute in range(100):
+        stats.add(make_order(minute, 1.0, "EUR"))
+
+    buckets = stats.stats("minute").buckets
+    assert 10 <= len(buckets) <= 12
+    assert buckets[-1].start == START + timedelta(minutes=99)
+    assert stats.stats("hour").by_currency["EUR"].count == 100
+
+
+def test_stats_endpoint_counts_created_orders():
+    service = OrderService()
+    service.create_orders(
+        [OrderIn(nom_client="a", montant=float(i), devise="EUR") for i in range(5)],
+        user_context={"sub": "pos-1"},
+    )
+    app.dependency_overrides[get_order_service] = lambda: service
+    try:
+        response = TestClient(app).get("/orders/stats", params={"granularity": "day"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["by_currency"]["EUR"] == {
+        "count": 5,
+        "sum": 10.0,
+        "min": 0.0,
+        "max": 4.0,
+    }
+    assert body["by_created_by"][0]["created_by"] == "pos-1"
+    assert len(body["buckets"]) == 1
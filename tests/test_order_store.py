@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from starlette.testclient import TestClient
+
+from poshub_api.domain.models import OrderFilter, OrderIn, OrderOut
+from poshub_api.infrastructure.storage.columnar import ColumnarOrderStore
+from poshub_api.infrastructure.storage.memory import DictOrderStore
+from poshub_api.infrastructure.storage.sqlite import SQLiteOrderStore
+from poshub_api.main import app
+from poshub_api.services.order_service import OrderService
+from poshub_api.shared.dependencies import get_order_service
+
+
+def make_order(i: int) -> OrderOut:
+    return OrderOut(
+        order=uuid4(),
+        created_at=datetime(2025, 7, 1, 12, 0, i % 60, 123456),
+        nom_client=f"Café {i}",
+        montant=i + 0.5,
+        devise="EUR" if i % 2 else "MAD",
+        created_by=None if i % 3 == 0 else f"pos-{i % 3}",
+    )
+
+
+@pytest.fixture(params=["dict", "columnar", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteOrderStore(str(tmp_path / "orders.db"))
+    return {"dict": DictOrderStore, "columnar": ColumnarOrderStore}[request.param]()
+
+
+def test_store_round_trip(store):
+    orders = [make_order(i) for i in range(3000)]
+
+    rows = [store.add(order) for order in orders]
+
+    assert rows == list(range(3000))
+    assert len(store) == 3000
+    for order in orders[::97]:
+        assert store[order.order_id] == order
+    assert list(store.values())[1500] == orders[1500]
+    assert store.row_of(uuid4()) is None
+    assert store.get(uuid4()) is None
+
+
+def test_columnar_store_backs_order_service():
+    service = OrderService(store=ColumnarOrderStore(initial_slots=2))
+    created = [
+        service.create_order(
+            OrderIn(nom_client=f"c{i}", montant=float(i), devise="USD"),
+            user_context={"sub": "pos-1"},
+        )
+        for i in range(50)
+    ]
+
+    assert service.get_order_by_id(created[42].order_id) == created[42]
+    page = service.list_orders(OrderFilter(min_amount=10, max_amount=12))
+    assert page.items == created[10:13]
+
+
+def test_store_batches(store):
+    orders = [make_order(i) for i in range(10)]
+    store.add(orders[0])
+
+    assert store.add_many(orders[1:]) == list(range(1, 10))
+    assert store.at_many([7, 2, 9]) == [orders[7], orders[2], orders[9]]
+    assert list(store.rows(8)) == orders[8:]
+    assert list(store.rows(2, 4)) == orders[2:4]
+
+
+def test_sqlite_store_is_shared_by_workers(tmp_path):
+    path = str(tmp_path / "orders.db")
+    worker_1 = OrderService(store=SQLiteOrderStore(path))
+    worker_2 = OrderService(store=SQLiteOrderStore(path))
+    order_in = OrderIn(nom_client="c", montant=1.0, devise="EUR")
+
+    first = worker_1.create_order(order_in, user_context={"sub": "pos-1"})
+    second = worker_2.create_order(order_in, user_context={"sub": "pos-2"})
+    batch = worker_1.create_orders([order_in] * 3, user_context={"sub": "pos-2"})
+
+    assert worker_1.get_order_by_id(second.order_id) == second
+    assert worker_2.list_orders().items == [first, second, *batch]
+    page = worker_1.list_orders(OrderFilter(created_by="pos-2"))
+    assert page.items == [second, *batch]
+    restarted = OrderService(store=SQLiteOrderStore(path))
+    assert restarted.list_orders(limit=1).items == [first]
+    assert restarted.version == worker_1.version == worker_2.version
+
+
+def test_blocking_stores_are_called_off_the_event_loop(tmp_path):
+    class RecordingStore(SQLiteOrderStore):
+        def __len__(self):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return super().__len__()
+
+    on_loop = []
+    service = OrderService(store=RecordingStore(str(tmp_path / "orders.db")))
+    service.create_order(OrderIn(nom_client="c", montant=1.0, devise="EUR"))
+    app.dependency_overrides[get_order_service] = lambda: service
+    try:
+        client = TestClient(app)
+        assert client.get("/orders/all").status_code == 200
+        assert client.get("/orders/stats").status_code == 200
+    finally:
+        app.dependency_overrides.clear()
+
+    assert on_loop and not any(on_loop)
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from poshub_api.infrastructure.aws.outbox import OutboxError, SQSOutbox
+
+
+class FakeSQS:
+    def __init__(self, fail_first=()):
+        self.batches = []
+        self.fail_first = set(fail_first)
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.batches.append([entry["MessageBody"] for entry in Entries])
+        successful, failed = [], []
+        for entry in Entries:
+            if entry["MessageBody"] in self.fail_first:
+                self.fail_first.discard(entry["MessageBody"])
+                failed.append({"Id": entry["Id"], "Code": "InternalError"})
+            elif entry["MessageBody"] == "poison":
+                failed.append(
+                    {"Id": entry["Id"], "Code": "InvalidMessage", "SenderFault": True}
+                )
+            else:
+                successful.append(
+                    {"Id": entry["Id"], "MessageId": f"id-{entry['MessageBody']}"}
+                )
+        return {"Successful": successful, "Failed": failed}
+
+
+def make_outbox(sqs, **kwargs):
+    return SQSOutbox(
+        queue_url=lambda: "https://sqs.local/orders",
+        client_factory=lambda: sqs,
+        **kwargs,
+    )
+
+
+def test_messages_are_coalesced_into_batches_of_ten():
+    sqs = FakeSQS()
+    outbox = make_outbox(sqs, linger=0.05, workers=1)
+
+    async def run():
+        ids = await asyncio.gather(*(outbox.publish(str(i)) for i in range(25)))
+        await outbox.stop()
+        return ids
+
+    ids = asyncio.run(run())
+
+    assert ids == [f"id-{i}" for i in range(25)]
+    assert [len(batch) for batch in sqs.batches] == [10, 10, 5]
+
+
+def test_partial_failures_are_retried_per_entry():
+    sqs = FakeSQS(fail_first={"3"})
+    outbox = make_outbox(sqs, linger=0.01, workers=1)
+
+    async def run():
+        return await asyncio.gather(*(outbox.publish(str(i)) for i in range(5)))
+
+    assert asyncio.run(run())[3] == "id-3"
+    assert sqs.batches[1] == ["3"]
+
+
+def test_sender_fault_is_not_retried():
+    sqs = FakeSQS()
+    outbox = make_outbox(sqs, linger=0.0, workers=1)
+
+    with pytest.raises(OutboxError):
+        asyncio.run(outbox.publish("poison"))
+    assert len(sqs.batches) == 1
+
+
+def test_fire_and_forget_is_flushed_on_stop():
+    sqs = FakeSQS()
+    outbox = make_outbox(sqs, linger=0.01, wait_for_ack=False)
+
+    async def run():
+        results = [await outbox.publish(str(i)) for i in range(12)]
+        await outbox.stop()
+        return results
+
+    assert asyncio.run(run()) == [None] * 12
+    assert sum(len(batch) for batch in sqs.batches) == 12
@@ -0,0 +1,173 @@
+import threading
+import time
+
+import pytest
+
+from poshub_api.infrastructure.aws.parameters import ParameterProvider
+
+
+class FakeSSM:
+    def __init__(self, delay: float = 0.0, secure=()):
+        self.calls = 0
+        self.fail = False
+        self.delay = delay
+        self.secure = set(secure)
+        self.requests = []
+
+    def parameter(self, name, value, decrypt):
+        if name not in self.secure:
+            return {"Name": name, "Value": value, "Type": "String"}
+        value = value if decrypt else "ciphertext"
+        return {"Name": name, "Value": value, "Type": "SecureString"}
+
+    def get_parameter(self, Name, WithDecryption):
+        self.calls += 1
+        self.requests.append((Name, WithDecryption))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("ThrottlingException")
+        value = f"value-{self.calls}"
+        return {"Parameter": self.parameter(Name, value, WithDecryption)}
+
+    def get_parameters(self, Names, WithDecryption):
+        self.calls += 1
+        self.requests.append((tuple(Names), WithDecryption))
+        return {
+            "Parameters": [
+                self.parameter(n, f"batch-{n}", WithDecryption) for n in Names
+            ],
+            "InvalidParameters": [],
+        }
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def settle(provider):
+    # The refresh executor has one worker, so this runs after queued refreshes
+    provider._executor.submit(lambda: None).result()
+
+
+def test_get_is_cached_until_ttl():
+    ssm, clock = FakeSSM(), FakeClock()
+    provider = ParameterProvider(
+        lambda: ssm, ttl=10, refresh_ratio=1, max_stale=0, clock=clock
+    )
+
+    assert provider.get("/pos/jwt-secret") == "value-1"
+    assert provider.get("/pos/jwt-secret") == "value-1"
+    clock.now = 11
+    assert provider.get("/pos/jwt-secret") == "value-2"
+    assert ssm.calls == 2
+
+
+def test_concurrent_misses_share_one_fetch():
+    ssm = FakeSSM(delay=0.05)
+    provider = ParameterProvider(lambda: ssm, ttl=10)
+    results = []
+
+    threads = [
+        threading.Thread(target=lambda: results.append(provider.get("/pos/q")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert ssm.calls == 1
+    assert results == ["value-1"] * 8
+
+
+def test_expired_value_served_while_refreshing():
+    ssm, clock = FakeSSM(), FakeClock()
+    provider = ParameterProvider(
+        lambda: ssm, ttl=10, refresh_ratio=1, max_stale=60, clock=clock
+    )
+    provider.get("/pos/jwt-secret")
+
+    clock.now = 30
+    ssm.delay = 0.2
+    started = time.monotonic()
+    assert provider.get("/pos/jwt-secret") == "value-1"
+    assert time.monotonic() - started < 0.2
+    settle(provider)
+    assert provider.get("/pos/jwt-secret") == "value-2"
+
+
+def test_failed_refreshes_back_off():
+    ssm, clock = FakeSSM(), FakeClock()
+    provider = ParameterProvider(
+        lambda: ssm, ttl=10, refresh_ratio=1, max_stale=60, backoff=1, clock=clock
+    )
+    provider.get("/pos/jwt-secret")
+    ssm.fail = True
+
+    calls = []
+    for now in (30, 30.5, 31.5, 32.5, 34, 100):
+        clock.now = now
+        if now < 100:
+            assert provider.get("/pos/jwt-secret") == "value-1"
+            settle(provider)
+        calls.append(ssm.calls)
+
+    # Retried 1 s, then 2 s after each failure rather than on every call
+    assert calls == [2, 2, 3, 3, 4, 4]
+
+    clock.now = 100
+    with pytest.raises(RuntimeError):
+        provider.get("/pos/jwt-secret")
+
+
+def test_only_secure_strings_are_decrypted():
+    ssm = FakeSSM(secure={"/pos/jwt-secret", "/pos/api-key"})
+    provider = ParameterProvider(lambda: ssm, ttl=10, secure_names=["/pos/jwt-secret"])
+
+    assert provider.get("/pos/jwt-secret") == "value-1"
+    assert provider.get("/pos/queue-url") == "value-2"
+    # Not declared secure: fetched again with decryption
+    assert provider.get("/pos/api-key") == "value-4"
+
+    assert ssm.requests == [
+        ("/pos/jwt-secret", True),
+        ("/pos/queue-url", False),
+        ("/pos/api-key", False),
+        ("/pos/api-key", True),
+    ]
+    provider.invalidate()
+    provider.preload(["/pos/api-key", "/pos/queue-url"])
+    assert ssm.requests[4:] == [(("/pos/api-key",), True), (("/pos/queue-url",), False)]
+
+
+def test_preload_batches_names():
+    ssm = FakeSSM()
+    provider = ParameterProvider(lambda: ssm, ttl=10)
+    names = [f"/pos/p{i}" for i in range(12)]
+
+    provider.preload(names)
+
+    assert ssm.calls == 2
+    assert provider.get("/pos/p11") == "batch-/pos/p11"
+    assert ssm.calls == 2
+
+    provider.preload(names)
+    assert ssm.calls == 2
+
+
+def test_refresh_ahead_is_queued_once():
+    ssm, clock = FakeSSM(delay=0.02), FakeClock()
+    provider = ParameterProvider(lambda: ssm, ttl=10, refresh_ratio=0.5, clock=clock)
+    provider.get("/pos/jwt-secret")
+
+    clock.now = 6
+    for _ in range(20):
+        assert provider.get("/pos/jwt-secret") == "value-1"
+    provider._executor.shutdown(wait=True)
+
+    assert ssm.calls == 2
+    assert provider.get("/pos/jwt-secret") == "value-2"
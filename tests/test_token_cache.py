@@ -0,0 +1,98 @@
+import jwt
+import pytest
+
+from poshub_api.shared.token_cache import VerifiedTokenCache
+
+SECRET = "test-secret"
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def counting_decoder():
+    calls = []
+
+    def decode(token):
+        calls.append(token)
+        return jwt.decode(
+            token, SECRET, algorithms=["HS256"], options={"verify_exp": False}
+        )
+
+    return decode, calls
+
+
+def test_verified_token_is_cached_until_exp():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(clock=clock)
+    token = jwt.encode(
+        {"sub": "pos-1", "scopes": ["orders:write"], "exp": 1_060}, SECRET
+    )
+    decode, calls = counting_decoder()
+
+    first = cache.verify(token, decode)
+    second = cache.verify(token, decode)
+
+    assert first is second
+    assert "orders:write" in first.scopes
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+    clock.now = 1_061
+    cache.verify(token, decode)
+    assert len(calls) == 2
+
+
+def test_rejected_token_is_negatively_cached():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(negative_ttl=30, clock=clock)
+    decode, calls = counting_decoder()
+
+    for _ in range(3):
+        with pytest.raises(jwt.DecodeError):
+            cache.verify("not-a-jwt", decode)
+
+    assert len(calls) == 1
+    assert cache.stats()["negative_hits"] == 2
+
+    clock.now += 31
+    with pytest.raises(jwt.DecodeError):
+        cache.verify("not-a-jwt", decode)
+    assert len(calls) == 2
+
+
+def test_negative_hits_raise_fresh_exceptions():
+    cache = VerifiedTokenCache(clock=FakeClock())
+
+    def expired(token):
+        raise jwt.ExpiredSignatureError("Signature has expired")
+
+    def traceback_length():
+        with pytest.raises(jwt.ExpiredSignatureError) as info:
+            cache.verify("expired", expired)
+        return len(info.traceback), info.value
+
+    traceback_length()
+    first_length, first = traceback_length()
+    second_length, second = traceback_length()
+    assert first_length == second_length
+    assert first is not second
+    assert second.args == ("Signature has expired",)
+
+
+def test_lru_bound_and_namespace():
+    cache = VerifiedTokenCache(max_entries=2, clock=FakeClock())
+    decode, calls = counting_decoder()
+    tokens = [jwt.encode({"sub": str(i)}, SECRET) for i in range(3)]
+
+    for token in tokens:
+        cache.verify(token, decode)
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["evictions"] == 1
+
+    cache.verify(tokens[2], decode, namespace="rotated-secret")
+    assert len(calls) == 4
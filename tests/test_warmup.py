@@ -0,0 +1,100 @@
+import threading
+import time
+
+from fastapi import FastAPI
+
+import authorizer
+from poshub_api import main
+from poshub_api.infrastructure.aws import clients, parameters
+from poshub_api.infrastructure.aws.parameters import ParameterProvider
+from poshub_api.shared.warmup import WarmupTask, is_warmup_event, warm_up
+
+
+class FakeSSM:
+    def get_parameter(self, Name, WithDecryption):
+        return {"Parameter": {"Name": Name, "Value": "secret"}}
+
+    def get_parameters(self, Names, WithDecryption):
+        return {
+            "Parameters": [{"Name": n, "Value": "value"} for n in Names],
+            "InvalidParameters": [],
+        }
+
+
+def test_is_warmup_event():
+    assert is_warmup_event({"warmup": True})
+    assert is_warmup_event({"source": "serverless-plugin-warmup"})
+    assert not is_warmup_event({"warmup": False})
+    assert not is_warmup_event({"httpMethod": "GET", "path": "/health"})
+    assert not is_warmup_event("warmup")
+
+
+def test_warm_up_reports_each_resource():
+    loaded = []
+
+    def load_parameters():
+        time.sleep(0.05)
+        loaded.append("ssm")
+
+    def fail():
+        raise RuntimeError("AccessDenied")
+
+    report = warm_up(
+        [
+            WarmupTask("ssm", load_parameters),
+            WarmupTask("broken", fail),
+            WarmupTask("settings", lambda: loaded.append("settings"), after="ssm"),
+        ]
+    )
+
+    assert report["warmup"] is True
+    assert loaded == ["ssm", "settings"]
+    assert report["resources"]["ssm"]["status"] == "ok"
+    assert report["resources"]["settings"]["duration_ms"] < 50
+    assert report["resources"]["broken"] == {
+        "status": "error",
+        "error": "AccessDenied",
+        "duration_ms": report["resources"]["broken"]["duration_ms"],
+    }
+
+
+def test_independent_resources_load_in_parallel():
+    barrier = threading.Barrier(2, timeout=1)
+
+    report = warm_up([WarmupTask("a", barrier.wait), WarmupTask("b", barrier.wait)])
+
+    assert {r["status"] for r in report["resources"].values()} == {"ok"}
+
+
+def test_handler_answers_warmup_without_asgi_dispatch(monkeypatch):
+    monkeypatch.setattr(parameters, "_provider", ParameterProvider(FakeSSM))
+    monkeypatch.setitem(clients._clients, "sqs", object())
+    monkeypatch.setattr(main, "app", FastAPI())
+    monkeypatch.setenv("JWT_SECRET_PARAM", "/pos/jwt-secret")
+    monkeypatch.delenv("QUEUE_URL_PARAM", raising=False)
+
+    def dispatch(event, context):
+        raise AssertionError("warm-up reached the ASGI app")
+
+    monkeypatch.setattr(main, "mangum_handler", dispatch)
+    report = main.handler({"warmup": True}, None)
+
+    assert set(report["resources"]) == {
+        "ssm_parameters",
+        "sqs_client",
+        "http_client",
+        "jwt_settings",
+    }
+    assert {r["status"] for r in report["resources"].values()} == {"ok"}
+    assert main.app.state.http is not None
+
+
+def test_authorizer_answers_warmup(monkeypatch):
+    provider = ParameterProvider(FakeSSM)
+    monkeypatch.setattr(authorizer, "get_parameter_provider", lambda: provider)
+
+    report = authorizer.lambda_handler({"source": "poshub.warmup"}, None)
+
+    assert report["resources"]["jwt_secret"]["status"] == "ok"
+    assert report["resources"]["token_cache"]["status"] == "ok"
+    assert provider.get("/pos/jwt-secret") == "secret"